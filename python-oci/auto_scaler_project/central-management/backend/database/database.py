@@ -1,5 +1,6 @@
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -14,17 +15,42 @@ MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
 MYSQL_PORT = os.getenv("MYSQL_PORT", "3306")
 MYSQL_DB = os.getenv("MYSQL_DB", "autoscaler_central")
 
-DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
-
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using them
-    pool_recycle=3600,   # Recycle connections every hour
-    pool_size=10         # Connection pool size
+# Either URL can be overridden, e.g. sqlite:///./central.db and sqlite+aiosqlite:///./central.db for local testing
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+)
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 )
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "20"))  # Connections shared by all async requests of a process
+
+def _pool_options(url, pool_size):
+    # SQLite uses its own single-file pools that take no sizing options
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_pre_ping": True,  # Verify connections before using them
+        "pool_recycle": 3600,   # Recycle connections every hour
+        "pool_size": pool_size  # Connection pool size
+    }
+
+engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL, 10))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the high-traffic agent routes; a request waiting on the database
+# holds no thread, only a pooled connection while a query runs
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL, ASYNC_POOL_SIZE))
+
+AsyncSessionLocal = sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # Objects stay readable after commit without another round trip
+)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -32,3 +58,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
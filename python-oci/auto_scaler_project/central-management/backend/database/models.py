@@ -1,5 +1,5 @@
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, JSON, Table
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, JSON, Table, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,11 +18,12 @@ class Node(Base):
     status = Column(String(20), default="REGISTERED")  # REGISTERED, ACTIVE, OFFLINE, ERROR
     created_at = Column(DateTime, default=func.now())
     last_seen = Column(DateTime, nullable=True)
-    api_key = Column(String(255), nullable=False)
+    api_key = Column(String(255), nullable=False, unique=True, index=True)
     
     # Relationships
     configs = relationship("NodeConfig", back_populates="node", cascade="all, delete-orphan")
     metrics = relationship("NodeMetric", back_populates="node", cascade="all, delete-orphan")
+    metric_rollups = relationship("NodeMetricRollup", back_populates="node", cascade="all, delete-orphan")
     instance_pools = relationship("InstancePool", back_populates="node", cascade="all, delete-orphan")
 
 class NodeConfig(Base):
@@ -86,6 +87,43 @@ class NodeMetric(Base):
     scaling_event = Column(Boolean, default=False)
     scaling_direction = Column(String(10), nullable=True)  # UP, DOWN, or NULL
     additional_data = Column(JSON, nullable=True)
+    idempotency_key = Column(String(64), nullable=True)  # Set by agents so retried samples are stored once
+
+    __table_args__ = (
+        UniqueConstraint("node_id", "idempotency_key", name="uq_node_metrics_idempotency"),
+        # Time-range scans grouped by pool, such as the dashboard summary
+        Index("ix_node_metrics_timestamp_pool", "timestamp", "instance_pool_id"),
+    )
     
     # Relationships
     node = relationship("Node", back_populates="metrics")
+
+class NodeMetricRollup(Base):
+    """Per-bucket aggregates of node metrics at a fixed resolution, maintained at ingest."""
+    __tablename__ = "node_metric_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    node_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False)
+    instance_pool_id = Column(String(255), nullable=False)
+    resolution = Column(String(3), nullable=False)  # 1m, 5m or 1h
+    bucket_start = Column(DateTime, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+    cpu_sum = Column(Float, nullable=False, default=0)
+    cpu_min = Column(Float, nullable=True)
+    cpu_max = Column(Float, nullable=True)
+    memory_sum = Column(Float, nullable=False, default=0)
+    memory_min = Column(Float, nullable=True)
+    memory_max = Column(Float, nullable=True)
+    instance_count_sum = Column(Integer, nullable=False, default=0)
+    instance_count_min = Column(Integer, nullable=True)
+    instance_count_max = Column(Integer, nullable=True)
+    scaling_events = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("node_id", "instance_pool_id", "resolution", "bucket_start", name="uq_node_metric_rollups_bucket"),
+        # Range scans across pools at one resolution, such as the dashboard summary
+        Index("ix_node_metric_rollups_resolution_bucket", "resolution", "bucket_start", "instance_pool_id"),
+    )
+
+    # Relationships
+    node = relationship("Node", back_populates="metric_rollups")
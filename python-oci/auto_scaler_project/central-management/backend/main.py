@@ -4,6 +4,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from database.database import get_db
 from routes import nodes, auth, configs, metrics
+from utils.compression import GzipRequestMiddleware
+from utils.retention import metrics_retention
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -26,12 +28,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Accept gzip-compressed request bodies from the agents
+app.add_middleware(GzipRequestMiddleware)
+
 # Include routers
 app.include_router(auth.router, tags=["Authentication"], prefix="/api")
 app.include_router(nodes.router, tags=["Nodes"], prefix="/api")
 app.include_router(configs.router, tags=["Configurations"], prefix="/api")
 app.include_router(metrics.router, tags=["Metrics"], prefix="/api")
 
+# Expire old raw metrics and rollups in the background
+@app.on_event("startup")
+def start_background_jobs():
+    metrics_retention.start()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    metrics_retention.stop()
+
 @app.get("/")
 def read_root():
     return {"message": "OCI Autoscaler Central Management API"}
@@ -0,0 +1,109 @@
+"""Initial schema
+
+Revision ID: 5d0c1f3a9b12
+Revises: 
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0c1f3a9b12'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created before migrations were kept in the repository already have these tables
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "nodes" not in existing:
+        op.create_table(
+            "nodes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("node_id", sa.String(length=36), nullable=True),
+            sa.Column("hostname", sa.String(length=255), nullable=False),
+            sa.Column("ip_address", sa.String(length=45), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("last_seen", sa.DateTime(), nullable=True),
+            sa.Column("api_key", sa.String(length=255), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_nodes_id", "nodes", ["id"], unique=False)
+        op.create_index("ix_nodes_node_id", "nodes", ["node_id"], unique=True)
+
+    if "node_configs" not in existing:
+        op.create_table(
+            "node_configs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("node_id", sa.Integer(), nullable=True),
+            sa.Column("version", sa.Integer(), nullable=True),
+            sa.Column("config_yaml", sa.Text(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("applied_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["node_id"], ["nodes.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_node_configs_id", "node_configs", ["id"], unique=False)
+
+    if "instance_pools" not in existing:
+        op.create_table(
+            "instance_pools",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("node_id", sa.Integer(), nullable=True),
+            sa.Column("pool_id", sa.String(length=255), nullable=False),
+            sa.Column("display_name", sa.String(length=255), nullable=True),
+            sa.Column("region", sa.String(length=50), nullable=False),
+            sa.Column("compartment_id", sa.String(length=255), nullable=False),
+            sa.Column("min_instances", sa.Integer(), nullable=True),
+            sa.Column("max_instances", sa.Integer(), nullable=True),
+            sa.Column("current_instances", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["node_id"], ["nodes.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_instance_pools_id", "instance_pools", ["id"], unique=False)
+
+    if "pool_schedules" not in existing:
+        op.create_table(
+            "pool_schedules",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("instance_pool_id", sa.Integer(), nullable=True),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("cron_expression", sa.String(length=100), nullable=False),
+            sa.Column("target_instances", sa.Integer(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(["instance_pool_id"], ["instance_pools.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_pool_schedules_id", "pool_schedules", ["id"], unique=False)
+
+    if "node_metrics" not in existing:
+        op.create_table(
+            "node_metrics",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("node_id", sa.Integer(), nullable=True),
+            sa.Column("instance_pool_id", sa.String(length=255), nullable=False),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.Column("cpu_utilization", sa.Float(), nullable=True),
+            sa.Column("memory_utilization", sa.Float(), nullable=True),
+            sa.Column("instance_count", sa.Integer(), nullable=True),
+            sa.Column("scaling_event", sa.Boolean(), nullable=True),
+            sa.Column("scaling_direction", sa.String(length=10), nullable=True),
+            sa.Column("additional_data", sa.JSON(), nullable=True),
+            sa.ForeignKeyConstraint(["node_id"], ["nodes.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_node_metrics_id", "node_metrics", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table("node_metrics")
+    op.drop_table("pool_schedules")
+    op.drop_table("instance_pools")
+    op.drop_table("node_configs")
+    op.drop_table("nodes")
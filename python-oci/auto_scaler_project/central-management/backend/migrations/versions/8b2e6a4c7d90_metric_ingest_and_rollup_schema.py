@@ -0,0 +1,65 @@
+"""Metric idempotency keys, ingest indexes and metric rollups
+
+Revision ID: 8b2e6a4c7d90
+Revises: 5d0c1f3a9b12
+Create Date: 2026-10-17 12:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e6a4c7d90'
+down_revision = '5d0c1f3a9b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # API keys are looked up on every authenticated request
+    op.create_index("ix_nodes_api_key", "nodes", ["api_key"], unique=True)
+
+    # Batch mode lets SQLite add the unique constraint by copying the table
+    with op.batch_alter_table("node_metrics") as batch_op:
+        batch_op.add_column(sa.Column("idempotency_key", sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint("uq_node_metrics_idempotency", ["node_id", "idempotency_key"])
+    op.create_index("ix_node_metrics_timestamp_pool", "node_metrics", ["timestamp", "instance_pool_id"], unique=False)
+
+    op.create_table(
+        "node_metric_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("node_id", sa.Integer(), nullable=False),
+        sa.Column("instance_pool_id", sa.String(length=255), nullable=False),
+        sa.Column("resolution", sa.String(length=3), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("cpu_sum", sa.Float(), nullable=False),
+        sa.Column("cpu_min", sa.Float(), nullable=True),
+        sa.Column("cpu_max", sa.Float(), nullable=True),
+        sa.Column("memory_sum", sa.Float(), nullable=False),
+        sa.Column("memory_min", sa.Float(), nullable=True),
+        sa.Column("memory_max", sa.Float(), nullable=True),
+        sa.Column("instance_count_sum", sa.Integer(), nullable=False),
+        sa.Column("instance_count_min", sa.Integer(), nullable=True),
+        sa.Column("instance_count_max", sa.Integer(), nullable=True),
+        sa.Column("scaling_events", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["node_id"], ["nodes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("node_id", "instance_pool_id", "resolution", "bucket_start",
+                            name="uq_node_metric_rollups_bucket"),
+    )
+    op.create_index("ix_node_metric_rollups_id", "node_metric_rollups", ["id"], unique=False)
+    op.create_index("ix_node_metric_rollups_resolution_bucket", "node_metric_rollups",
+                    ["resolution", "bucket_start", "instance_pool_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_node_metric_rollups_resolution_bucket", table_name="node_metric_rollups")
+    op.drop_index("ix_node_metric_rollups_id", table_name="node_metric_rollups")
+    op.drop_table("node_metric_rollups")
+    op.drop_index("ix_node_metrics_timestamp_pool", table_name="node_metrics")
+    with op.batch_alter_table("node_metrics") as batch_op:
+        batch_op.drop_constraint("uq_node_metrics_idempotency", type_="unique")
+        batch_op.drop_column("idempotency_key")
+    op.drop_index("ix_nodes_api_key", table_name="nodes")
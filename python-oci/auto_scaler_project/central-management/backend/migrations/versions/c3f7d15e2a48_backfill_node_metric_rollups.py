@@ -0,0 +1,122 @@
+"""Backfill node metric rollups
+
+Revision ID: c3f7d15e2a48
+Revises: 8b2e6a4c7d90
+Create Date: 2026-10-17 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import timedelta
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7d15e2a48'
+down_revision = '8b2e6a4c7d90'
+branch_labels = None
+depends_on = None
+
+# Bucket widths in seconds; each divides an hour, so an hour of samples fills its buckets completely
+RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600}
+ROWS_PER_STATEMENT = 500
+
+node_metrics = sa.table(
+    "node_metrics",
+    sa.column("node_id", sa.Integer),
+    sa.column("instance_pool_id", sa.String),
+    sa.column("timestamp", sa.DateTime),
+    sa.column("cpu_utilization", sa.Float),
+    sa.column("memory_utilization", sa.Float),
+    sa.column("instance_count", sa.Integer),
+    sa.column("scaling_event", sa.Boolean),
+)
+
+node_metric_rollups = sa.table(
+    "node_metric_rollups",
+    sa.column("node_id", sa.Integer),
+    sa.column("instance_pool_id", sa.String),
+    sa.column("resolution", sa.String),
+    sa.column("bucket_start", sa.DateTime),
+    sa.column("sample_count", sa.Integer),
+    sa.column("cpu_sum", sa.Float),
+    sa.column("cpu_min", sa.Float),
+    sa.column("cpu_max", sa.Float),
+    sa.column("memory_sum", sa.Float),
+    sa.column("memory_min", sa.Float),
+    sa.column("memory_max", sa.Float),
+    sa.column("instance_count_sum", sa.Integer),
+    sa.column("instance_count_min", sa.Integer),
+    sa.column("instance_count_max", sa.Integer),
+    sa.column("scaling_events", sa.Integer),
+)
+
+
+def _aggregate(rows, hour):
+    buckets = {}
+    for row in rows:
+        timestamp = row.timestamp.replace(microsecond=0)
+        # Text timestamps compare as strings on SQLite, so keep each sample to its own hour
+        if timestamp.replace(minute=0, second=0) != hour:
+            continue
+        for resolution, seconds in RESOLUTIONS.items():
+            start = timestamp - timedelta(seconds=(timestamp.minute * 60 + timestamp.second) % seconds)
+            key = (row.node_id, row.instance_pool_id, resolution, start)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    "node_id": row.node_id, "instance_pool_id": row.instance_pool_id,
+                    "resolution": resolution, "bucket_start": start, "sample_count": 0, "scaling_events": 0,
+                    "cpu_sum": 0.0, "cpu_min": row.cpu_utilization, "cpu_max": row.cpu_utilization,
+                    "memory_sum": 0.0, "memory_min": row.memory_utilization, "memory_max": row.memory_utilization,
+                    "instance_count_sum": 0, "instance_count_min": row.instance_count,
+                    "instance_count_max": row.instance_count,
+                }
+            bucket["sample_count"] += 1
+            bucket["scaling_events"] += 1 if row.scaling_event else 0
+            for column, value in (("cpu", row.cpu_utilization), ("memory", row.memory_utilization),
+                                  ("instance_count", row.instance_count)):
+                bucket[f"{column}_sum"] += value
+                bucket[f"{column}_min"] = min(bucket[f"{column}_min"], value)
+                bucket[f"{column}_max"] = max(bucket[f"{column}_max"], value)
+    return list(buckets.values())
+
+
+def upgrade() -> None:
+    """
+    Rebuilds the rollups from the raw samples still in node_metrics, one hour at a time.
+
+    Only whole hours are rebuilt, from the first full hour of raw data on; those buckets
+    are deleted first, so running it again does not double count.
+    """
+    bind = op.get_bind()
+    first = bind.execute(sa.select(sa.func.min(node_metrics.c.timestamp))).scalar()
+    if first is None:
+        return
+    hour = first.replace(minute=0, second=0, microsecond=0)
+    if hour < first:
+        hour += timedelta(hours=1)
+
+    bind.execute(node_metric_rollups.delete().where(node_metric_rollups.c.bucket_start >= hour))
+
+    while hour is not None:
+        rows = bind.execute(sa.select(node_metrics).where(
+            node_metrics.c.timestamp >= hour - timedelta(seconds=1),
+            node_metrics.c.timestamp < hour + timedelta(hours=1, seconds=1),
+            node_metrics.c.cpu_utilization.isnot(None),
+            node_metrics.c.memory_utilization.isnot(None),
+            node_metrics.c.instance_count.isnot(None),
+        )).all()
+        aggregates = _aggregate(rows, hour)
+        for i in range(0, len(aggregates), ROWS_PER_STATEMENT):
+            bind.execute(node_metric_rollups.insert(), aggregates[i:i + ROWS_PER_STATEMENT])
+
+        # Skip ahead to the next hour that has samples
+        following = bind.execute(sa.select(sa.func.min(node_metrics.c.timestamp)).where(
+            node_metrics.c.timestamp >= hour + timedelta(hours=1)
+        )).scalar()
+        hour = following.replace(minute=0, second=0, microsecond=0) if following is not None else None
+
+
+def downgrade() -> None:
+    # The rollups are derived data and are left in place
+    pass
@@ -1,22 +1,41 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, Security
-from sqlalchemy.orm import Session
-from database.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Security, Header, Query, Response
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database.database import get_async_db, AsyncSessionLocal
 from database.models import Node, NodeConfig
 from schemas.config import ConfigCreate, ConfigResponse, ConfigUpdate
-from utils.auth import get_api_key
+from utils.auth import NodeIdentity, get_authenticated_node, get_long_poll_node
+from utils.config_notifier import config_notifier
 from datetime import datetime
+import asyncio
+import os
 
 router = APIRouter()
 
+DEFAULT_POLL_TIMEOUT = 30  # Seconds a long-poll is held when nothing changes
+MAX_POLL_TIMEOUT = 120
+# Changes published on this worker wake long-polls at once. Changes published on other workers are
+# caught by the check at the start of the node's next poll, or by a recheck of polls held longer than this.
+MIN_POLL_RECHECK_INTERVAL = 30
+POLL_RECHECK_INTERVAL = max(MIN_POLL_RECHECK_INTERVAL, int(os.getenv("CONFIG_POLL_RECHECK_INTERVAL", "60")))
+
+def config_etag(config_id, version):
+    """Entity tag of a configuration version, as sent in the ETag header."""
+    return f'"{config_id}-{version}"'
+
 # Get node configuration
 @router.get("/nodes/{node_id}/config", response_model=ConfigResponse)
-def get_node_config(
+async def get_node_config(
     node_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    since_version: Optional[int] = Query(None, description="Version the node has already applied"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Find the node
-    db_node = db.query(Node).filter(Node.node_id == node_id).first()
+    db_node = (await db.execute(select(Node.id).where(Node.node_id == node_id))).first()
     
     if not db_node:
         raise HTTPException(
@@ -24,17 +43,25 @@ def get_node_config(
             detail="Node not found"
         )
         
-    # Get the active configuration
-    config = db.query(NodeConfig).filter(
+    # Look up the active version first, without loading the YAML
+    active = (await db.execute(select(NodeConfig.id, NodeConfig.version).where(
         NodeConfig.node_id == db_node.id,
         NodeConfig.is_active == True
-    ).first()
+    ))).first()
     
-    if not config:
+    if not active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active configuration found for this node"
         )
+
+    # Nothing changed since the version the node already has
+    etag = config_etag(active.id, active.version)
+    if if_none_match == etag or (since_version is not None and since_version >= active.version):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    config = await db.get(NodeConfig, active.id)
+    response.headers["ETag"] = etag
         
     return {
         "config_id": config.id,
@@ -45,15 +72,80 @@ def get_node_config(
         "applied_at": config.applied_at
     }
 
+async def _load_config_if_newer(node_id, since_version):
+    """
+    Returns (response body, ETag) of the node's active configuration if it is newer
+    than `since_version`, otherwise None. Uses its own short-lived session so that no
+    connection is held while a long-poll waits.
+    """
+    async with AsyncSessionLocal() as db:
+        # Node and active version in one indexed query; the YAML is only loaded when it is newer
+        active = (await db.execute(
+            select(Node.id, NodeConfig.id.label("config_id"), NodeConfig.version)
+            .outerjoin(NodeConfig, and_(NodeConfig.node_id == Node.id, NodeConfig.is_active == True))
+            .where(Node.node_id == node_id)
+        )).first()
+        if not active:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Node not found"
+            )
+        if active.config_id is None or active.version <= since_version:
+            return None
+
+        config = await db.get(NodeConfig, active.config_id)
+        return {
+            "config_id": config.id,
+            "node_id": node_id,
+            "version": config.version,
+            "config": config.config_yaml,
+            "created_at": config.created_at,
+            "applied_at": config.applied_at
+        }, config_etag(config.id, config.version)
+
+# Long-poll for a configuration newer than the node's version
+@router.get("/nodes/{node_id}/config/poll", response_model=ConfigResponse)
+async def poll_node_config(
+    node_id: str,
+    response: Response,
+    since_version: int = Query(0, description="Version the node has already applied"),
+    timeout: int = Query(DEFAULT_POLL_TIMEOUT, ge=0, le=MAX_POLL_TIMEOUT, description="Seconds to wait for a change"),
+    # Only the node itself may hold a poll open; no database session is kept for the wait
+    node: NodeIdentity = Depends(get_long_poll_node),
+):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while True:
+        # Subscribe before reading, so a change committed in between is not missed
+        waiter = config_notifier.subscribe(node_id)
+        try:
+            result = await _load_config_if_newer(node_id, since_version)
+            if result is not None:
+                body, etag = result
+                response.headers["ETag"] = etag
+                return body
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+            notified = await config_notifier.wait(waiter, min(remaining, POLL_RECHECK_INTERVAL))
+            # Without a notification the database is only read again if the hold continues;
+            # at the deadline the check is left to the node's next poll
+            if not notified and deadline - loop.time() <= 0:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        finally:
+            config_notifier.unsubscribe(node_id, waiter)
+
 # Create or update node configuration
 @router.post("/nodes/{node_id}/config", response_model=ConfigResponse)
-def update_node_config(
+async def update_node_config(
     node_id: str,
     config: ConfigCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Find the node
-    db_node = db.query(Node).filter(Node.node_id == node_id).first()
+    db_node = (await db.execute(select(Node.id).where(Node.node_id == node_id))).first()
     
     if not db_node:
         raise HTTPException(
@@ -62,10 +154,10 @@ def update_node_config(
         )
         
     # Get current active configuration
-    current_config = db.query(NodeConfig).filter(
+    current_config = (await db.execute(select(NodeConfig).where(
         NodeConfig.node_id == db_node.id,
         NodeConfig.is_active == True
-    ).first()
+    ))).scalars().first()
     
     # Determine new version number
     new_version = 1 if not current_config else current_config.version + 1
@@ -84,8 +176,10 @@ def update_node_config(
         current_config.is_active = False
         
     db.add(new_config)
-    db.commit()
-    db.refresh(new_config)
+    await db.commit()
+
+    # Release long-polls of this node
+    config_notifier.notify(node_id)
     
     return {
         "config_id": new_config.id,
@@ -98,26 +192,17 @@ def update_node_config(
 
 # Notify that config was applied
 @router.put("/nodes/{node_id}/config/{config_id}/applied")
-def config_applied(
+async def config_applied(
     node_id: str,
     config_id: int,
-    api_key: str = Security(get_api_key),
-    db: Session = Depends(get_db)
+    node: NodeIdentity = Depends(get_authenticated_node),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Find the node
-    db_node = db.query(Node).filter(Node.node_id == node_id).first()
-    
-    if not db_node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
-        )
-        
     # Find the configuration
-    config = db.query(NodeConfig).filter(
+    config = (await db.execute(select(NodeConfig).where(
         NodeConfig.id == config_id,
-        NodeConfig.node_id == db_node.id
-    ).first()
+        NodeConfig.node_id == node.id
+    ))).scalars().first()
     
     if not config:
         raise HTTPException(
@@ -127,6 +212,6 @@ def config_applied(
         
     # Mark as applied
     config.applied_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return {"status": "applied", "config_id": config_id}
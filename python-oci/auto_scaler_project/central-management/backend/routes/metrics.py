@@ -1,60 +1,199 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, Security, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database.database import get_db
-from database.models import Node, NodeMetric, InstancePool
-from schemas.metric import MetricCreate, MetricResponse, MetricSummary
-from utils.auth import get_api_key
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, select, union_all
+from sqlalchemy.exc import IntegrityError
+from database.database import get_async_db
+from database.models import Node, NodeMetric, NodeMetricRollup, InstancePool
+from schemas.metric import MetricCreate, MetricResponse, MetricSummary, BulkMetricResponse, MetricSeries
+from utils.auth import NodeIdentity, get_authenticated_node
+from utils.rollups import RESOLUTIONS, bucket_start, choose_resolution, chunked, upsert_rollups
 from typing import List, Dict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import json
 
 router = APIRouter()
 
+MAX_BULK_METRICS = 5000  # Samples accepted in one bulk request
+
+def _metric_row(node_pk, metric, received_at):
+    """Column values for one sample, with every key present so rows share one multi-row INSERT."""
+    return {
+        "node_id": node_pk,
+        "instance_pool_id": metric.instance_pool_id,
+        # Samples replayed from an agent's spool keep the time they were taken
+        "timestamp": _naive_utc(metric.timestamp) if metric.timestamp else received_at,
+        "cpu_utilization": metric.cpu_utilization,
+        "memory_utilization": metric.memory_utilization,
+        "instance_count": metric.instance_count,
+        "scaling_event": metric.scaling_event,
+        "scaling_direction": metric.scaling_direction,
+        "additional_data": metric.additional_data,
+        "idempotency_key": metric.idempotency_key,
+    }
+
+def _naive_utc(timestamp):
+    """Timestamps are stored as naive UTC, like datetime.utcnow()."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+async def _store_rows(db, rows):
+    """Inserts raw samples and folds them into the rollups in one transaction."""
+    for chunk in chunked(rows):
+        await db.execute(NodeMetric.__table__.insert().values(chunk))
+    await upsert_rollups(db, rows)
+    await db.commit()
+
+async def _existing_idempotency_keys(db, node_pk, keys):
+    if not keys:
+        return set()
+    result = await db.execute(select(NodeMetric.idempotency_key).where(
+        NodeMetric.node_id == node_pk,
+        NodeMetric.idempotency_key.in_(keys)
+    ))
+    return set(result.scalars())
+
+async def _new_rows(db, node_pk, metrics, received_at):
+    """Drops samples whose idempotency key is repeated in the batch or already stored."""
+    stored = await _existing_idempotency_keys(db, node_pk, list({m.idempotency_key for m in metrics if m.idempotency_key}))
+    seen = set()
+    rows = []
+    for metric in metrics:
+        key = metric.idempotency_key
+        if key:
+            if key in stored or key in seen:
+                continue
+            seen.add(key)
+        rows.append(_metric_row(node_pk, metric, received_at))
+    return rows
+
+async def parse_metric_batch(request: Request) -> List[MetricCreate]:
+    """Reads a bulk body given either as a JSON array or as newline-delimited JSON."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        text = body.decode("utf-8").strip()
+        if "ndjson" in content_type or not text.startswith("["):
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            items = json.loads(text)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or newline-delimited JSON"
+        )
+
+    if len(items) > MAX_BULK_METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_METRICS} metrics per request"
+        )
+
+    try:
+        return [MetricCreate.model_validate(item) for item in items]
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False)
+        )
+
 # Submit metrics from a node
 @router.post("/nodes/{node_id}/metrics")
-def submit_metrics(
+async def submit_metrics(
     node_id: str,
     metric: MetricCreate,
-    api_key: str = Security(get_api_key),
-    db: Session = Depends(get_db)
+    node: NodeIdentity = Depends(get_authenticated_node),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Find the node
-    db_node = db.query(Node).filter(Node.node_id == node_id).first()
-    
-    if not db_node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
-        )
-        
-    # Create the metric
-    new_metric = NodeMetric(
-        node_id=db_node.id,
-        instance_pool_id=metric.instance_pool_id,
-        cpu_utilization=metric.cpu_utilization,
-        memory_utilization=metric.memory_utilization,
-        instance_count=metric.instance_count,
-        scaling_event=metric.scaling_event,
-        scaling_direction=metric.scaling_direction,
-        additional_data=metric.additional_data
-    )
-    
-    db.add(new_metric)
-    db.commit()
-    
+    rows = await _new_rows(db, node.id, [metric], datetime.utcnow())
+    if not rows:
+        return {"status": "duplicate"}
+
+    try:
+        await _store_rows(db, rows)
+    except IntegrityError:
+        # A concurrent retry stored the same idempotency key first
+        await db.rollback()
+        return {"status": "duplicate"}
+
     return {"status": "recorded"}
 
+# Submit a batch of metrics from a node in one request
+@router.post("/nodes/{node_id}/metrics/bulk", response_model=BulkMetricResponse)
+async def submit_metrics_bulk(
+    node_id: str,
+    node: NodeIdentity = Depends(get_authenticated_node),
+    metrics: List[MetricCreate] = Depends(parse_metric_batch),
+    db: AsyncSession = Depends(get_async_db)
+):
+    received_at = datetime.utcnow()
+    rows = await _new_rows(db, node.id, metrics, received_at)
+
+    if rows:
+        try:
+            await _store_rows(db, rows)
+        except IntegrityError:
+            # A concurrent retry stored some of the keys first; drop those and insert once more
+            await db.rollback()
+            rows = await _new_rows(db, node.id, metrics, received_at)
+            if rows:
+                await _store_rows(db, rows)
+
+    return {
+        "status": "recorded",
+        "received": len(metrics),
+        "recorded": len(rows),
+        "duplicates": len(metrics) - len(rows),
+    }
+
+def _rollup_as_metric(bucket):
+    """Presents a rollup bucket in the shape of a raw sample, with averages as the values."""
+    return {
+        "id": bucket.id,
+        "node_id": bucket.node_id,
+        "instance_pool_id": bucket.instance_pool_id,
+        "timestamp": bucket.bucket_start,
+        "cpu_utilization": bucket.cpu_sum / bucket.sample_count,
+        "memory_utilization": bucket.memory_sum / bucket.sample_count,
+        "instance_count": round(bucket.instance_count_sum / bucket.sample_count),
+        "scaling_event": bucket.scaling_events > 0,
+        "scaling_direction": None,
+        "additional_data": {
+            "resolution": bucket.resolution,
+            "samples": bucket.sample_count,
+            "min_cpu": bucket.cpu_min,
+            "max_cpu": bucket.cpu_max,
+            "min_memory": bucket.memory_min,
+            "max_memory": bucket.memory_max,
+            "min_instances": bucket.instance_count_min,
+            "max_instances": bucket.instance_count_max,
+            "scaling_events": bucket.scaling_events,
+        },
+    }
+
 # Get metrics for a specific node and instance pool
 @router.get("/nodes/{node_id}/metrics/{pool_id}", response_model=List[MetricResponse])
-def get_node_pool_metrics(
+async def get_node_pool_metrics(
     node_id: str,
     pool_id: str,
-    hours: int = Query(24, description="Number of hours of data to retrieve"),
-    db: Session = Depends(get_db)
+    response: Response,
+    hours: int = Query(24, gt=0, description="Number of hours of data to retrieve"),
+    resolution: str = Query(None, description="raw, 1m, 5m or 1h; chosen from the span when omitted"),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    if resolution is None:
+        resolution = choose_resolution(timedelta(hours=hours), include_raw=True)
+    elif resolution != "raw" and resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resolution must be raw or one of {', '.join(RESOLUTIONS)}"
+        )
+    response.headers["X-Metrics-Resolution"] = resolution
+
     # Find the node
-    db_node = db.query(Node).filter(Node.node_id == node_id).first()
+    db_node = (await db.execute(select(Node.id).where(Node.node_id == node_id))).first()
     
     if not db_node:
         raise HTTPException(
@@ -65,66 +204,171 @@ def get_node_pool_metrics(
     # Calculate the time range
     end_time = datetime.utcnow()
     start_time = end_time - timedelta(hours=hours)
+
+    # Longer ranges are served from the rollups, one averaged row per bucket
+    if resolution != "raw":
+        result = await db.execute(select(NodeMetricRollup).where(
+            NodeMetricRollup.node_id == db_node.id,
+            NodeMetricRollup.instance_pool_id == pool_id,
+            NodeMetricRollup.resolution == resolution,
+            NodeMetricRollup.bucket_start >= bucket_start(start_time, RESOLUTIONS[resolution])
+        ).order_by(NodeMetricRollup.bucket_start.desc()))
+        return [_rollup_as_metric(bucket) for bucket in result.scalars()]
     
     # Get metrics for the specified time range
-    metrics = db.query(NodeMetric).filter(
+    result = await db.execute(select(NodeMetric).where(
         NodeMetric.node_id == db_node.id,
         NodeMetric.instance_pool_id == pool_id,
         NodeMetric.timestamp >= start_time,
         NodeMetric.timestamp <= end_time
-    ).order_by(NodeMetric.timestamp.desc()).all()
+    ).order_by(NodeMetric.timestamp.desc()))
+    
+    return result.scalars().all()
+
+# Get bucketed metrics for a node and instance pool, read from the rollups
+@router.get("/nodes/{node_id}/metrics/{pool_id}/series", response_model=MetricSeries)
+async def get_node_pool_metric_series(
+    node_id: str,
+    pool_id: str,
+    hours: int = Query(24, gt=0, description="Number of hours of data to retrieve"),
+    resolution: str = Query(None, description="1m, 5m or 1h; chosen from the span when omitted"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if resolution is None:
+        resolution = choose_resolution(timedelta(hours=hours))
+    elif resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resolution must be one of {', '.join(RESOLUTIONS)}"
+        )
+
+    # Find the node
+    db_node = (await db.execute(select(Node.id).where(Node.node_id == node_id))).first()
     
-    return metrics
+    if not db_node:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Node not found"
+        )
+
+    start_time = bucket_start(datetime.utcnow() - timedelta(hours=hours), RESOLUTIONS[resolution])
+    result = await db.execute(select(NodeMetricRollup).where(
+        NodeMetricRollup.node_id == db_node.id,
+        NodeMetricRollup.instance_pool_id == pool_id,
+        NodeMetricRollup.resolution == resolution,
+        NodeMetricRollup.bucket_start >= start_time
+    ).order_by(NodeMetricRollup.bucket_start))
+    buckets = result.scalars().all()
+
+    return {
+        "resolution": resolution,
+        "points": [
+            {
+                "timestamp": bucket.bucket_start,
+                "samples": bucket.sample_count,
+                "avg_cpu": bucket.cpu_sum / bucket.sample_count,
+                "min_cpu": bucket.cpu_min,
+                "max_cpu": bucket.cpu_max,
+                "avg_memory": bucket.memory_sum / bucket.sample_count,
+                "min_memory": bucket.memory_min,
+                "max_memory": bucket.memory_max,
+                "avg_instances": bucket.instance_count_sum / bucket.sample_count,
+                "min_instances": bucket.instance_count_min,
+                "max_instances": bucket.instance_count_max,
+                "scaling_events": bucket.scaling_events,
+            }
+            for bucket in buckets
+        ]
+    }
 
 # Get summary metrics for all pools
 @router.get("/metrics/summary", response_model=Dict[str, MetricSummary])
-def get_metrics_summary(
-    db: Session = Depends(get_db)
+async def get_metrics_summary(
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Get all instance pools
-    pools = db.query(InstancePool).all()
+    # The last 24 hours: whole hourly buckets from the first full hour on (the current
+    # bucket is kept up to date at ingest), plus raw samples for the partial hour before it
+    since = datetime.utcnow() - timedelta(hours=24)
+    full_hours_from = bucket_start(since, RESOLUTIONS["1h"])
+    if full_hours_from < since:
+        full_hours_from += timedelta(hours=1)
+
+    hourly = select(
+        NodeMetricRollup.instance_pool_id.label("pool_id"),
+        NodeMetricRollup.sample_count.label("cpu_samples"),
+        NodeMetricRollup.sample_count.label("memory_samples"),
+        NodeMetricRollup.cpu_sum.label("cpu_sum"),
+        NodeMetricRollup.memory_sum.label("memory_sum"),
+        NodeMetricRollup.cpu_min.label("cpu_min"),
+        NodeMetricRollup.cpu_max.label("cpu_max"),
+        NodeMetricRollup.memory_min.label("memory_min"),
+        NodeMetricRollup.memory_max.label("memory_max"),
+        NodeMetricRollup.instance_count_min.label("instances_min"),
+        NodeMetricRollup.instance_count_max.label("instances_max"),
+        NodeMetricRollup.scaling_events.label("scaling_events")
+    ).where(
+        NodeMetricRollup.resolution == "1h",
+        NodeMetricRollup.bucket_start >= full_hours_from
+    )
+    leading_edge = select(
+        NodeMetric.instance_pool_id,
+        # Older rows may lack a metric; sum() skips them, so the averages must not count them either
+        func.count(NodeMetric.cpu_utilization),
+        func.count(NodeMetric.memory_utilization),
+        func.sum(NodeMetric.cpu_utilization),
+        func.sum(NodeMetric.memory_utilization),
+        func.min(NodeMetric.cpu_utilization),
+        func.max(NodeMetric.cpu_utilization),
+        func.min(NodeMetric.memory_utilization),
+        func.max(NodeMetric.memory_utilization),
+        func.min(NodeMetric.instance_count),
+        func.max(NodeMetric.instance_count),
+        func.sum(case((NodeMetric.scaling_event == True, 1), else_=0))
+    ).where(
+        NodeMetric.timestamp >= since,
+        NodeMetric.timestamp < full_hours_from
+    ).group_by(NodeMetric.instance_pool_id)
+    window = union_all(hourly, leading_edge).subquery()
+
+    # Aggregate every pool in one pass
+    stats = select(
+        window.c.pool_id,
+        (func.sum(window.c.cpu_sum) / func.sum(window.c.cpu_samples)).label("avg_cpu"),
+        (func.sum(window.c.memory_sum) / func.sum(window.c.memory_samples)).label("avg_memory"),
+        func.max(window.c.cpu_max).label("max_cpu"),
+        func.max(window.c.memory_max).label("max_memory"),
+        func.min(window.c.cpu_min).label("min_cpu"),
+        func.min(window.c.memory_min).label("min_memory"),
+        func.max(window.c.instances_max).label("max_instances"),
+        func.min(window.c.instances_min).label("min_instances"),
+        func.sum(window.c.scaling_events).label("scaling_events")
+    ).group_by(window.c.pool_id).subquery()
+
+    # Pools without data in the window are left out by the join
+    rows = (await db.execute(select(
+        InstancePool.pool_id,
+        InstancePool.display_name,
+        InstancePool.region,
+        InstancePool.current_instances,
+        stats
+    ).join(stats, stats.c.pool_id == InstancePool.pool_id))).all()
+
     result = {}
-    
-    for pool in pools:
-        # Calculate statistics for this pool
-        stats = db.query(
-            func.avg(NodeMetric.cpu_utilization).label("avg_cpu"),
-            func.avg(NodeMetric.memory_utilization).label("avg_memory"),
-            func.max(NodeMetric.cpu_utilization).label("max_cpu"),
-            func.max(NodeMetric.memory_utilization).label("max_memory"),
-            func.min(NodeMetric.cpu_utilization).label("min_cpu"),
-            func.min(NodeMetric.memory_utilization).label("min_memory"),
-            func.max(NodeMetric.instance_count).label("max_instances"),
-            func.min(NodeMetric.instance_count).label("min_instances"),
-            func.count(NodeMetric.id).label("data_points")
-        ).filter(
-            NodeMetric.instance_pool_id == pool.pool_id,
-            NodeMetric.timestamp >= datetime.utcnow() - timedelta(hours=24)
-        ).first()
-        
-        # Count scaling events
-        scaling_events = db.query(func.count(NodeMetric.id)).filter(
-            NodeMetric.instance_pool_id == pool.pool_id,
-            NodeMetric.scaling_event == True,
-            NodeMetric.timestamp >= datetime.utcnow() - timedelta(hours=24)
-        ).scalar()
-        
-        # Add to result if we have data
-        if stats and stats.data_points > 0:
-            result[pool.pool_id] = {
-                "pool_id": pool.pool_id,
-                "display_name": pool.display_name,
-                "region": pool.region,
-                "avg_cpu": float(stats.avg_cpu) if stats.avg_cpu else 0,
-                "avg_memory": float(stats.avg_memory) if stats.avg_memory else 0,
-                "max_cpu": float(stats.max_cpu) if stats.max_cpu else 0,
-                "max_memory": float(stats.max_memory) if stats.max_memory else 0,
-                "min_cpu": float(stats.min_cpu) if stats.min_cpu else 0,
-                "min_memory": float(stats.min_memory) if stats.min_memory else 0,
-                "current_instances": pool.current_instances,
-                "max_instances": stats.max_instances,
-                "min_instances": stats.min_instances,
-                "scaling_events_24h": scaling_events
-            }
+    for row in rows:
+        result[row.pool_id] = {
+            "pool_id": row.pool_id,
+            "display_name": row.display_name,
+            "region": row.region,
+            "avg_cpu": float(row.avg_cpu) if row.avg_cpu else 0,
+            "avg_memory": float(row.avg_memory) if row.avg_memory else 0,
+            "max_cpu": float(row.max_cpu) if row.max_cpu else 0,
+            "max_memory": float(row.max_memory) if row.max_memory else 0,
+            "min_cpu": float(row.min_cpu) if row.min_cpu else 0,
+            "min_memory": float(row.min_memory) if row.min_memory else 0,
+            "current_instances": row.current_instances,
+            "max_instances": row.max_instances,
+            "min_instances": row.min_instances,
+            "scaling_events_24h": int(row.scaling_events or 0)
+        }
     
     return result
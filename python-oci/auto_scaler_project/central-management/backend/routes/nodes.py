@@ -1,7 +1,9 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Security
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.database import get_db
+from database.database import get_db, get_async_db
 from database.models import Node, InstancePool, NodeConfig
 from schemas.node import (
     NodeCreate, NodeResponse, NodeUpdate, NodeList,
@@ -12,7 +14,7 @@ from typing import List
 import uuid
 from datetime import datetime
 import secrets
-from utils.auth import get_api_key
+from utils.auth import NodeIdentity, get_authenticated_node, identity_cache
 
 router = APIRouter()
 
@@ -74,40 +76,49 @@ def register_node(node: NodeCreate, db: Session = Depends(get_db)):
 
 # Node heartbeat endpoint
 @router.post("/nodes/{node_id}/heartbeat")
-def node_heartbeat(
+async def node_heartbeat(
     node_id: str,
     metrics: dict = None,
-    api_key: str = Security(get_api_key),
-    db: Session = Depends(get_db)
+    node: NodeIdentity = Depends(get_authenticated_node),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Find the node
-    db_node = db.query(Node).filter(Node.node_id == node_id).first()
+    # Update the last_seen timestamp and status
+    await db.execute(
+        update(Node).where(Node.id == node.id).values(last_seen=datetime.utcnow(), status="ACTIVE")
+    )
     
-    if not db_node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
+    # Update the instance counts of all reported pools in one statement
+    instance_counts = (metrics or {}).get("instance_counts")
+    if instance_counts:
+        await db.execute(
+            update(InstancePool)
+            .where(
+                InstancePool.node_id == node.id,
+                InstancePool.pool_id.in_(list(instance_counts))
+            )
+            .values(current_instances=case(instance_counts, value=InstancePool.pool_id))
+            .execution_options(synchronize_session=False)
         )
-
-    # Update the last_seen timestamp and status
-    db_node.last_seen = datetime.utcnow()
-    db_node.status = "ACTIVE"
-    
-    # Update instance counts if provided
-    if metrics and "instance_counts" in metrics:
-        for pool_id, count in metrics["instance_counts"].items():
-            pool = db.query(InstancePool).filter(
-                InstancePool.node_id == db_node.id,
-                InstancePool.pool_id == pool_id
-            ).first()
-            
-            if pool:
-                pool.current_instances = count
     
-    db.commit()
+    # Both updates commit together
+    await db.commit()
     
     return {"status": "acknowledged"}
 
+# Replace a node's API key; the old key stops working immediately on this worker
+@router.post("/nodes/{node_id}/rotate-key")
+async def rotate_api_key(
+    node_id: str,
+    node: NodeIdentity = Depends(get_authenticated_node),
+    db: AsyncSession = Depends(get_async_db)
+):
+    api_key = secrets.token_urlsafe(32)
+    await db.execute(update(Node).where(Node.id == node.id).values(api_key=api_key))
+    await db.commit()
+    identity_cache.invalidate_node(node_id)
+    
+    return {"node_id": node_id, "api_key": api_key}
+
 # List all nodes (admin interface)
 @router.get("/nodes", response_model=List[NodeList])
 def list_nodes(
@@ -170,6 +181,7 @@ def update_node(
         db_node.status = node_update.status
         
     db.commit()
+    identity_cache.invalidate_node(node_id)
     
     return {"status": "updated", "node_id": node_id}
 
@@ -189,5 +201,6 @@ def delete_node(
     
     db.delete(db_node)
     db.commit()
+    identity_cache.invalidate_node(node_id)
     
     return {"status": "deleted", "node_id": node_id}
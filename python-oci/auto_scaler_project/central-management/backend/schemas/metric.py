@@ -1,6 +1,6 @@
 
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 class MetricBase(BaseModel):
@@ -13,7 +13,14 @@ class MetricBase(BaseModel):
     additional_data: Optional[Dict[str, Any]] = None
 
 class MetricCreate(MetricBase):
-    pass
+    timestamp: Optional[datetime] = None  # When the sample was taken; defaults to the time of receipt
+    idempotency_key: Optional[str] = Field(None, max_length=64)  # Retries with the same key are stored once
+
+class BulkMetricResponse(BaseModel):
+    status: str
+    received: int
+    recorded: int
+    duplicates: int
 
 class MetricResponse(MetricBase):
     id: int
@@ -23,6 +30,24 @@ class MetricResponse(MetricBase):
     class Config:
         orm_mode = True
 
+class MetricBucket(BaseModel):
+    timestamp: datetime  # Start of the bucket
+    samples: int
+    avg_cpu: float
+    min_cpu: float
+    max_cpu: float
+    avg_memory: float
+    min_memory: float
+    max_memory: float
+    avg_instances: float
+    min_instances: int
+    max_instances: int
+    scaling_events: int
+
+class MetricSeries(BaseModel):
+    resolution: str
+    points: List[MetricBucket]
+
 class MetricSummary(BaseModel):
     pool_id: str
     display_name: Optional[str] = None
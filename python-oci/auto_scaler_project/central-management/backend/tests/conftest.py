@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Both engines point at a throwaway SQLite file; set before the database module is imported
+_database_file = os.path.join(tempfile.mkdtemp(), "central.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_database_file}")
+os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{_database_file}")
+
+# The backend's packages are imported top-level, as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database import engine
+from database.models import Base
+
+
+@pytest.fixture
+def database():
+    """Creates the schema for one test and drops it afterwards."""
+    Base.metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(engine)
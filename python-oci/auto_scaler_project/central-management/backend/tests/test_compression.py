@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+
+from utils.compression import GzipRequestMiddleware
+
+
+class RecordingApp:
+    """ASGI app that stores the scope and body it was called with and answers 200."""
+
+    def __init__(self):
+        self.scope = None
+        self.body = None
+
+    async def __call__(self, scope, receive, send):
+        self.scope = scope
+        message = await receive()
+        self.body = message["body"]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def call(middleware, headers, chunks):
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware({"type": "http", "headers": headers}, receive, send))
+    return sent[0]["status"]
+
+
+def test_gzip_body_is_inflated_and_other_headers_are_kept():
+    app = RecordingApp()
+    body = b'[{"cpu_utilization": 50}]' * 100
+    compressed = gzip.compress(body)
+    headers = [
+        (b"content-encoding", b"gzip"),
+        (b"content-length", str(len(compressed)).encode()),
+        (b"x-forwarded-for", b"10.0.0.1"),
+        (b"x-forwarded-for", b"10.0.0.2"),
+    ]
+
+    assert call(GzipRequestMiddleware(app), headers, [compressed[:100], compressed[100:]]) == 200
+    assert app.body == body
+    assert app.scope["headers"] == [
+        (b"x-forwarded-for", b"10.0.0.1"),
+        (b"x-forwarded-for", b"10.0.0.2"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+
+
+def test_oversized_compressed_upload_is_refused_while_reading():
+    app = RecordingApp()
+    middleware = GzipRequestMiddleware(app, max_compressed_size=1000)
+    chunks = [b"\0" * 600, b"\0" * 600, b"\0" * 600]
+
+    # Without a Content-Length the limit applies to the bytes received so far
+    assert call(middleware, [(b"content-encoding", b"gzip")], chunks) == 413
+    assert app.scope is None
+
+    declared = [(b"content-encoding", b"gzip"), (b"content-length", b"5000")]
+    assert call(middleware, declared, [b""]) == 413
+
+
+def test_oversized_inflated_body_is_refused():
+    app = RecordingApp()
+    compressed = gzip.compress(b"\0" * 10000)
+
+    assert call(GzipRequestMiddleware(app, max_size=1000), [(b"content-encoding", b"gzip")], [compressed]) == 413
+    assert app.scope is None
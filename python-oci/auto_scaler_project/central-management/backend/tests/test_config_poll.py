@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import event
+
+from database.database import async_engine
+from database.models import Node, NodeConfig
+from routes.configs import poll_node_config
+from utils.auth import get_long_poll_node
+
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(Node.__table__.insert(), [
+            {"id": 1, "node_id": "node-1", "hostname": "node-1", "api_key": "key-1"},
+            {"id": 2, "node_id": "node-2", "hostname": "node-2", "api_key": "key-2"},
+        ])
+        connection.execute(NodeConfig.__table__.insert().values(
+            id=10, node_id=1, version=3, config_yaml="pools: []\n", is_active=True
+        ))
+
+
+@pytest.mark.parametrize("api_key, status_code", [("unknown", 401), ("key-2", 403)])
+def test_poll_requires_the_key_of_the_node(database, api_key, status_code):
+    seed(database)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_long_poll_node("node-1", api_key))
+    assert error.value.status_code == status_code
+
+
+def test_held_poll_keeps_no_connection_checked_out(database):
+    seed(database)
+    # Counted with pool events, as SQLite's pool does not track checked out connections
+    checked_out = []
+    pool = async_engine.sync_engine.pool
+    on_checkout = lambda *args: checked_out.append(1)
+    on_checkin = lambda *args: checked_out.append(-1)
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", on_checkin)
+
+    async def poll():
+        node = await get_long_poll_node("node-1", "key-1")
+        held = asyncio.ensure_future(
+            poll_node_config("node-1", Response(), since_version=3, timeout=1, node=node)
+        )
+        await asyncio.sleep(0.3)
+        during_wait = sum(checked_out)
+        return during_wait, await held
+
+    try:
+        checked_out_during_wait, response = asyncio.run(poll())
+    finally:
+        event.remove(pool, "checkout", on_checkout)
+        event.remove(pool, "checkin", on_checkin)
+
+    assert checked_out  # The key and config reads did use connections
+    assert checked_out_during_wait == 0
+    assert response.status_code == 304
+
+
+def test_poll_returns_a_newer_version_at_once(database):
+    seed(database)
+
+    async def poll():
+        node = await get_long_poll_node("node-1", "key-1")
+        return await poll_node_config("node-1", Response(), since_version=2, timeout=30, node=node)
+
+    assert asyncio.run(poll())["version"] == 3
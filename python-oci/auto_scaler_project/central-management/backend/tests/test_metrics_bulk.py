@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func
+
+from database.database import AsyncSessionLocal, SessionLocal, async_engine
+from database.models import Node, NodeMetric, NodeMetricRollup
+from routes.metrics import MAX_BULK_METRICS, submit_metrics_bulk
+from schemas.metric import MetricCreate
+from utils.auth import NodeIdentity
+
+
+SQLITE_MAX_VARIABLE_NUMBER = 32766  # Default limit of SQLite builds since 3.32
+
+
+def test_full_bulk_batch_is_stored_in_one_request(database):
+    with database.begin() as connection:
+        connection.execute(Node.__table__.insert().values(id=1, node_id="node-1", hostname="node-1", api_key="key"))
+
+    start = datetime.utcnow() - timedelta(hours=2)
+    # More samples than fit in one statement within SQLite's default bind parameter limit
+    metrics = [
+        MetricCreate(
+            instance_pool_id=f"pool-{i % 3}",
+            cpu_utilization=float(i % 100),
+            memory_utilization=50.0,
+            instance_count=2,
+            timestamp=start + timedelta(seconds=i),
+            idempotency_key=f"sample-{i}",
+        )
+        for i in range(MAX_BULK_METRICS)
+    ]
+
+    async def submit():
+        async with AsyncSessionLocal() as db:
+            return await submit_metrics_bulk(
+                node_id="node-1", node=NodeIdentity(1, "node-1", "ACTIVE"), metrics=metrics, db=db
+            )
+
+    # Local SQLite builds may allow more parameters, so the limit is checked per statement
+    parameter_counts = []
+
+    def count_parameters(conn, cursor, statement, parameters, context, executemany):
+        parameter_counts.append(len(parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_parameters)
+    try:
+        assert asyncio.run(submit())["recorded"] == MAX_BULK_METRICS
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_parameters)
+    assert max(parameter_counts) <= SQLITE_MAX_VARIABLE_NUMBER
+
+    # Resending the batch stores nothing twice
+    assert asyncio.run(submit())["duplicates"] == MAX_BULK_METRICS
+
+    db = SessionLocal()
+    try:
+        assert db.query(func.count(NodeMetric.id)).scalar() == MAX_BULK_METRICS
+        for resolution in ("1m", "5m", "1h"):
+            assert db.query(func.sum(NodeMetricRollup.sample_count)).filter(
+                NodeMetricRollup.resolution == resolution
+            ).scalar() == MAX_BULK_METRICS
+    finally:
+        db.close()
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from database.database import AsyncSessionLocal, SessionLocal
+from database.models import InstancePool, Node, NodeMetric
+from routes.metrics import get_metrics_summary
+from utils.rollups import aggregate, upsert_statement
+
+
+def seed(engine, now):
+    """Stores 30 hours of samples for two pools, with rollups as ingest writes them."""
+    with engine.begin() as connection:
+        connection.execute(Node.__table__.insert().values(id=1, node_id="node-1", hostname="node-1", api_key="key"))
+        connection.execute(InstancePool.__table__.insert(), [
+            {"node_id": 1, "pool_id": pool_id, "display_name": pool_id, "region": "eu-frankfurt-1",
+             "compartment_id": "compartment", "current_instances": 3}
+            for pool_id in ("pool-a", "pool-b", "pool-idle")
+        ])
+
+        rows = []
+        for pool_index, pool_id in enumerate(("pool-a", "pool-b")):
+            for i in range(0, 30 * 60, 7):
+                timestamp = now - timedelta(minutes=i, seconds=13 * pool_index)
+                # Keep clear of the 24 hour boundary, which moves while the test runs
+                if abs(timestamp - (now - timedelta(hours=24))) < timedelta(minutes=1):
+                    continue
+                rows.append({
+                    "node_id": 1,
+                    "instance_pool_id": pool_id,
+                    "timestamp": timestamp,
+                    "cpu_utilization": float((i * 7 + pool_index * 31) % 100),
+                    "memory_utilization": float((i * 3 + 17) % 90),
+                    "instance_count": 2 + (i + pool_index) % 5,
+                    "scaling_event": i % 70 == 0,
+                })
+        connection.execute(NodeMetric.__table__.insert(), rows)
+        connection.execute(upsert_statement(connection.dialect.name, aggregate(rows)))
+
+        # Rows without metrics, as older agents stored them, in the partial hour read from the raw samples
+        since = now - timedelta(hours=24)
+        full_hours_from = since.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        connection.execute(NodeMetric.__table__.insert(), [
+            {"node_id": 1, "instance_pool_id": "pool-a", "timestamp": since + (full_hours_from - since) / 2,
+             "cpu_utilization": None, "memory_utilization": None, "instance_count": 3, "scaling_event": False}
+            for _ in range(20)
+        ])
+
+
+def per_pool_summary(since):
+    """The figures of the summary as it used to compute them, two queries per pool."""
+    db = SessionLocal()
+    try:
+        result = {}
+        for pool in db.query(InstancePool).all():
+            stats = db.query(
+                func.avg(NodeMetric.cpu_utilization).label("avg_cpu"),
+                func.avg(NodeMetric.memory_utilization).label("avg_memory"),
+                func.max(NodeMetric.cpu_utilization).label("max_cpu"),
+                func.max(NodeMetric.memory_utilization).label("max_memory"),
+                func.min(NodeMetric.cpu_utilization).label("min_cpu"),
+                func.min(NodeMetric.memory_utilization).label("min_memory"),
+                func.max(NodeMetric.instance_count).label("max_instances"),
+                func.min(NodeMetric.instance_count).label("min_instances"),
+                func.count(NodeMetric.id).label("data_points")
+            ).filter(
+                NodeMetric.instance_pool_id == pool.pool_id,
+                NodeMetric.timestamp >= since
+            ).first()
+            scaling_events = db.query(func.count(NodeMetric.id)).filter(
+                NodeMetric.instance_pool_id == pool.pool_id,
+                NodeMetric.scaling_event == True,
+                NodeMetric.timestamp >= since
+            ).scalar()
+            if stats.data_points > 0:
+                result[pool.pool_id] = {
+                    "avg_cpu": stats.avg_cpu,
+                    "avg_memory": stats.avg_memory,
+                    "max_cpu": stats.max_cpu,
+                    "max_memory": stats.max_memory,
+                    "min_cpu": stats.min_cpu,
+                    "min_memory": stats.min_memory,
+                    "max_instances": stats.max_instances,
+                    "min_instances": stats.min_instances,
+                    "scaling_events_24h": scaling_events,
+                }
+        return result
+    finally:
+        db.close()
+
+
+async def summary():
+    async with AsyncSessionLocal() as db:
+        return await get_metrics_summary(db=db)
+
+
+def test_summary_matches_per_pool_queries(database):
+    now = datetime.utcnow()
+    seed(database, now)
+
+    expected = per_pool_summary(now - timedelta(hours=24))
+    result = asyncio.run(summary())
+
+    assert set(result) == {"pool-a", "pool-b"}
+    for pool_id, figures in expected.items():
+        assert result[pool_id]["current_instances"] == 3
+        for name, value in figures.items():
+            assert result[pool_id][name] == pytest.approx(value), name
@@ -1,24 +1,126 @@
-
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
-from sqlalchemy.orm import Session
-from database.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import OrderedDict
+from database.database import AsyncSessionLocal, get_async_db
 from database.models import Node
+import threading
+import time
+
+IDENTITY_CACHE_TTL = 60  # Seconds a resolved API key is trusted without asking the database
+IDENTITY_CACHE_SIZE = 10000  # Least recently used keys are evicted beyond this
 
 # Define API key security scheme
 api_key_header = APIKeyHeader(name="X-API-Key")
 
-def get_api_key(
+class NodeIdentity:
+    """The parts of a Node that authenticated routes need."""
+
+    def __init__(self, id, node_id, status):
+        self.id = id
+        self.node_id = node_id
+        self.status = status
+
+class IdentityCache:
+    """
+    In-process TTL/LRU cache of API key -> NodeIdentity.
+
+    Entries are dropped when a node is deleted, updated or rotates its key; other
+    worker processes see such changes once their entry expires after `ttl` seconds.
+    """
+
+    def __init__(self, ttl=IDENTITY_CACHE_TTL, max_size=IDENTITY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()  # api_key -> (expires_at, NodeIdentity)
+        self.lock = threading.Lock()
+
+    def get(self, api_key):
+        with self.lock:
+            entry = self.entries.get(api_key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[api_key]
+                return None
+            self.entries.move_to_end(api_key)
+            return entry[1]
+
+    def put(self, api_key, identity):
+        with self.lock:
+            self.entries[api_key] = (time.monotonic() + self.ttl, identity)
+            self.entries.move_to_end(api_key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate_node(self, node_id):
+        """Drops every cached key of a node."""
+        with self.lock:
+            for api_key in [key for key, (_, identity) in self.entries.items() if identity.node_id == node_id]:
+                del self.entries[api_key]
+
+identity_cache = IdentityCache()
+
+async def resolve_api_key(api_key, db):
+    """Returns the NodeIdentity owning an API key, from the cache or with one indexed query."""
+    identity = identity_cache.get(api_key)
+    if identity is not None:
+        return identity
+
+    result = await db.execute(select(Node.id, Node.node_id, Node.status).where(Node.api_key == api_key))
+    row = result.first()
+    if not row:
+        return None
+    identity = NodeIdentity(row.id, row.node_id, row.status)
+    identity_cache.put(api_key, identity)
+    return identity
+
+async def get_api_key(
     api_key: str = Depends(api_key_header),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check if API key exists in database
-    node = db.query(Node).filter(Node.api_key == api_key).first()
-    
-    if not node:
+    if not await resolve_api_key(api_key, db):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key"
         )
-        
+
     return api_key
+
+async def get_authenticated_node(
+    node_id: str,
+    api_key: str = Depends(api_key_header),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Resolves the API key to its node and checks it is the node named in the path."""
+    return _check_node(await resolve_api_key(api_key, db), node_id)
+
+async def get_long_poll_node(
+    node_id: str,
+    api_key: str = Depends(api_key_header)
+):
+    """
+    Like get_authenticated_node, for requests held open for a long time: the key is
+    resolved with a short-lived session, so no connection stays checked out while
+    the request waits.
+    """
+    async with AsyncSessionLocal() as db:
+        identity = await resolve_api_key(api_key, db)
+    return _check_node(identity, node_id)
+
+def _check_node(identity, node_id):
+    if not identity:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key"
+        )
+
+    if identity.node_id != node_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="API key does not belong to this node"
+        )
+
+    return identity
@@ -0,0 +1,87 @@
+import zlib
+
+MAX_DECOMPRESSED_BYTES = 16 * 1024 * 1024  # Refuse request bodies that inflate beyond this
+MAX_COMPRESSED_BYTES = 4 * 1024 * 1024  # Refuse compressed uploads larger than this before inflating them
+
+
+class GzipRequestMiddleware:
+    """
+    Decompresses request bodies sent with `Content-Encoding: gzip`, so agents can
+    compress large uploads. Other requests pass through untouched.
+
+    Both the compressed upload (`max_compressed_size`) and its inflated body
+    (`max_size`) are bounded; either limit answers 413.
+    """
+
+    def __init__(self, app, max_size=MAX_DECOMPRESSED_BYTES, max_compressed_size=MAX_COMPRESSED_BYTES):
+        self.app = app
+        self.max_size = max_size
+        self.max_compressed_size = max_compressed_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = b""
+        declared_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-encoding":
+                encoding = value.lower()
+            elif name == b"content-length":
+                declared_length = value
+        if encoding != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        if declared_length is not None and declared_length.isdigit() and int(declared_length) > self.max_compressed_size:
+            await _respond(send, 413, b'{"detail":"Compressed body too large"}')
+            return
+
+        compressed = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            compressed += message.get("body", b"")
+            if len(compressed) > self.max_compressed_size:
+                await _respond(send, 413, b'{"detail":"Compressed body too large"}')
+                return
+            more_body = message.get("more_body", False)
+
+        try:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(compressed, self.max_size)
+            if decompressor.unconsumed_tail:
+                await _respond(send, 413, b'{"detail":"Decompressed body too large"}')
+                return
+        except zlib.error:
+            await _respond(send, 400, b'{"detail":"Invalid gzip body"}')
+            return
+
+        # Repeated headers are kept; only the ones describing the body change
+        headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        scope = dict(scope, headers=headers)
+
+        body_sent = False
+
+        async def receive_decompressed():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, receive_decompressed, send)
+
+
+async def _respond(send, status_code, body):
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
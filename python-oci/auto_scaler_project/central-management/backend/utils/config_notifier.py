@@ -0,0 +1,53 @@
+import asyncio
+
+
+class ConfigNotifier:
+    """
+    Wakes long-poll requests waiting for a node's configuration to change.
+
+    Waiters are futures on the event loop, so a held request costs no worker thread.
+    `notify()` may be called from any thread, including the threadpool that runs
+    the sync routes. Notifications only reach waiters in the same process; the
+    long-poll route re-checks the database periodically to cover other workers.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.waiters = {}  # node_id -> set of futures, only touched on the event loop
+
+    def subscribe(self, node_id):
+        """Registers a waiter for a node. Must be called on the event loop."""
+        self.loop = asyncio.get_running_loop()
+        future = self.loop.create_future()
+        self.waiters.setdefault(node_id, set()).add(future)
+        return future
+
+    def unsubscribe(self, node_id, future):
+        waiters = self.waiters.get(node_id)
+        if waiters is not None:
+            waiters.discard(future)
+            if not waiters:
+                del self.waiters[node_id]
+
+    async def wait(self, future, timeout):
+        """Returns True if the node was notified within `timeout` seconds."""
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def notify(self, node_id):
+        """Wakes every waiter of a node. Safe to call from any thread."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._wake, node_id)
+
+    def _wake(self, node_id):
+        for future in self.waiters.pop(node_id, ()):
+            if not future.done():
+                future.set_result(True)
+
+
+config_notifier = ConfigNotifier()
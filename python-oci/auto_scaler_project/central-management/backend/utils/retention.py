@@ -0,0 +1,263 @@
+from sqlalchemy import func, text
+from database.database import SessionLocal
+from database.models import NodeMetric, NodeMetricRollup
+from datetime import datetime, timedelta
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+
+METRICS_RETENTION_DAYS = int(os.getenv("METRICS_RETENTION_DAYS", "30"))  # 0 keeps raw metrics forever
+ROLLUP_RETENTION_DAYS = {  # Per rollup resolution; 0 keeps that resolution forever
+    "1m": int(os.getenv("ROLLUP_RETENTION_DAYS_1M", "7")),
+    "5m": int(os.getenv("ROLLUP_RETENTION_DAYS_5M", "90")),
+    "1h": int(os.getenv("ROLLUP_RETENTION_DAYS_1H", "0")),
+}
+METRICS_RETENTION_INTERVAL = int(os.getenv("METRICS_RETENTION_INTERVAL", "3600"))  # Seconds between runs
+METRICS_RETENTION_BATCH_SIZE = int(os.getenv("METRICS_RETENTION_BATCH_SIZE", "5000"))  # Rows deleted per transaction
+METRICS_RETENTION_PAUSE = float(os.getenv("METRICS_RETENTION_PAUSE", "0.2"))  # Seconds between chunks
+METRICS_ARCHIVE_DIR = os.getenv("METRICS_ARCHIVE_DIR", "")  # Archive expired rows here before deleting them
+METRICS_RETENTION_DRY_RUN = os.getenv("METRICS_RETENTION_DRY_RUN", "false").lower() in ("1", "true", "yes")
+
+RETENTION_LOCK_NAME = "autoscaler_metrics_retention"  # Lets one backend worker at a time run the job
+ARCHIVED_COLUMNS = [column.name for column in NodeMetric.__table__.columns]
+
+
+class MetricsRetention:
+    def __init__(self, retention_days=METRICS_RETENTION_DAYS, rollup_retention_days=None,
+                 interval=METRICS_RETENTION_INTERVAL, batch_size=METRICS_RETENTION_BATCH_SIZE,
+                 pause=METRICS_RETENTION_PAUSE, archive_dir=METRICS_ARCHIVE_DIR, dry_run=METRICS_RETENTION_DRY_RUN,
+                 session_factory=SessionLocal):
+        """
+        Deletes raw node metrics and fine-grained rollups older than their retention
+        period from a background thread.
+
+        Expired rows are removed oldest first in chunks of `batch_size`, each selected
+        through the timestamp (or rollup bucket) index and deleted by primary key in
+        its own short transaction. When `archive_dir` is set, each raw chunk is first
+        appended to gzip NDJSON files laid out as `<archive_dir>/<pool>/<YYYY-MM-DD>.ndjson.gz`;
+        a chunk is only deleted once it has been archived, so a crash in between may
+        archive it twice but never loses it. Rollups are deleted without archiving.
+
+        Every backend worker runs the thread, but a run only proceeds in the worker
+        holding a database advisory lock (GET_LOCK on MySQL), so workers never
+        archive and delete the same chunks.
+
+        Args:
+            retention_days (int): Age in days beyond which raw rows are removed; 0 keeps them.
+            rollup_retention_days (dict): Resolution -> age in days beyond which its rollups are
+                removed; 0 keeps them. Defaults to ROLLUP_RETENTION_DAYS.
+            interval (float): Seconds between runs.
+            batch_size (int): Rows deleted per transaction.
+            pause (float): Seconds to wait between chunks so other writers get the table.
+            archive_dir (str): Directory of the archive, or empty to delete without archiving.
+            dry_run (bool): Only log how many rows would be removed.
+            session_factory (Callable): Creates database sessions.
+        """
+        self.retention_days = retention_days
+        self.rollup_retention_days = dict(ROLLUP_RETENTION_DAYS if rollup_retention_days is None else rollup_retention_days)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.archive_dir = archive_dir
+        self.dry_run = dry_run
+        self.session_factory = session_factory
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.retention_days <= 0 and not any(days > 0 for days in self.rollup_retention_days.values()):
+            logging.info("Metrics retention disabled.")
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="metrics-retention", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Metrics retention run failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    def run_once(self, now=None):
+        """
+        Applies the retention policy once, unless another worker is already doing so.
+
+        Returns:
+            dict: {"node_metrics": rows per pool, "rollups": rows per resolution} that expired,
+                or None if another worker holds the lock. In dry-run mode nothing is deleted.
+        """
+        now = now or datetime.utcnow()
+        lock_session = self.session_factory()
+        try:
+            if not self._acquire_lock(lock_session):
+                logging.info("Metrics retention is running in another worker, skipping this run.")
+                return None
+            try:
+                return self._expire(now)
+            finally:
+                self._release_lock(lock_session)
+        finally:
+            lock_session.close()
+
+    def count_expired(self, cutoff):
+        db = self.session_factory()
+        try:
+            rows = db.query(NodeMetric.instance_pool_id, func.count(NodeMetric.id)).filter(
+                NodeMetric.timestamp < cutoff
+            ).group_by(NodeMetric.instance_pool_id).all()
+            return {pool_id: count for pool_id, count in rows}
+        finally:
+            db.close()
+
+    def count_expired_rollups(self, resolution, cutoff):
+        db = self.session_factory()
+        try:
+            return db.query(func.count(NodeMetricRollup.id)).filter(
+                NodeMetricRollup.resolution == resolution,
+                NodeMetricRollup.bucket_start < cutoff
+            ).scalar()
+        finally:
+            db.close()
+
+    def _expire(self, now):
+        report = {"node_metrics": {}, "rollups": {}}
+        rollup_cutoffs = {
+            resolution: now - timedelta(days=days)
+            for resolution, days in self.rollup_retention_days.items()
+            if days > 0
+        }
+
+        if self.dry_run:
+            if self.retention_days > 0:
+                report["node_metrics"] = self.count_expired(now - timedelta(days=self.retention_days))
+            for resolution, cutoff in rollup_cutoffs.items():
+                report["rollups"][resolution] = self.count_expired_rollups(resolution, cutoff)
+            logging.info(f"Metrics retention dry run, rows that would be removed: {report}.")
+            return report
+
+        if self.retention_days > 0:
+            cutoff = now - timedelta(days=self.retention_days)
+            while not self.stop_event.is_set():
+                removed = self._remove_chunk(cutoff)
+                if not removed:
+                    break
+                for pool_id, count in removed.items():
+                    report["node_metrics"][pool_id] = report["node_metrics"].get(pool_id, 0) + count
+                self.stop_event.wait(self.pause)
+
+        for resolution, cutoff in rollup_cutoffs.items():
+            while not self.stop_event.is_set():
+                removed = self._remove_rollup_chunk(resolution, cutoff)
+                if not removed:
+                    break
+                report["rollups"][resolution] = report["rollups"].get(resolution, 0) + removed
+                self.stop_event.wait(self.pause)
+
+        if report["node_metrics"] or report["rollups"]:
+            logging.info(f"Metrics retention removed {sum(report['node_metrics'].values())} raw rows "
+                         f"and rollups {report['rollups']}.")
+        return report
+
+    def _remove_chunk(self, cutoff):
+        """Archives and deletes the oldest expired chunk. Returns rows removed per pool."""
+        db = self.session_factory()
+        try:
+            query = db.query(NodeMetric).filter(NodeMetric.timestamp < cutoff).order_by(NodeMetric.timestamp)
+            if self.archive_dir:
+                rows = query.with_entities(*NodeMetric.__table__.columns).limit(self.batch_size).all()
+                self._archive(rows)
+            else:
+                rows = query.with_entities(NodeMetric.id, NodeMetric.instance_pool_id).limit(self.batch_size).all()
+            if not rows:
+                return {}
+
+            db.query(NodeMetric).filter(
+                NodeMetric.id.in_([row.id for row in rows])
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            removed = {}
+            for row in rows:
+                removed[row.instance_pool_id] = removed.get(row.instance_pool_id, 0) + 1
+            return removed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _remove_rollup_chunk(self, resolution, cutoff):
+        """Deletes the oldest expired chunk of one rollup resolution. Returns the rows removed."""
+        db = self.session_factory()
+        try:
+            ids = [row.id for row in db.query(NodeMetricRollup.id).filter(
+                NodeMetricRollup.resolution == resolution,
+                NodeMetricRollup.bucket_start < cutoff
+            ).order_by(NodeMetricRollup.bucket_start).limit(self.batch_size)]
+            if not ids:
+                return 0
+
+            db.query(NodeMetricRollup).filter(
+                NodeMetricRollup.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return len(ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _acquire_lock(self, db):
+        """
+        Takes the retention lock on the session's connection without waiting. The lock
+        belongs to the database connection, so it is also released if the worker dies.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect in ("mysql", "mariadb"):
+            return db.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": RETENTION_LOCK_NAME}).scalar() == 1
+        if dialect == "postgresql":
+            return bool(db.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": RETENTION_LOCK_NAME}
+            ).scalar())
+        # SQLite databases are only used by a single local process
+        return True
+
+    def _release_lock(self, db):
+        dialect = db.get_bind().dialect.name
+        try:
+            if dialect in ("mysql", "mariadb"):
+                db.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": RETENTION_LOCK_NAME})
+            elif dialect == "postgresql":
+                db.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": RETENTION_LOCK_NAME})
+        except Exception as e:
+            logging.warning(f"Failed to release the metrics retention lock: {e}")
+
+    def _archive(self, rows):
+        files = {}
+        for row in rows:
+            path = os.path.join(
+                self.archive_dir,
+                re.sub(r"[^A-Za-z0-9._-]", "_", row.instance_pool_id),
+                f"{row.timestamp:%Y-%m-%d}.ndjson.gz"
+            )
+            files.setdefault(path, []).append(json.dumps(dict(zip(ARCHIVED_COLUMNS, row)), default=str))
+
+        for path, lines in files.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Each append adds a gzip member; readers decompress concatenated members as one stream
+            with gzip.open(path, "at") as f:
+                f.write("\n".join(lines) + "\n")
+
+
+metrics_retention = MetricsRetention()
@@ -0,0 +1,146 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from database.models import NodeMetricRollup
+from utils.retention import METRICS_RETENTION_DAYS, ROLLUP_RETENTION_DAYS
+from datetime import timedelta
+
+RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600}  # Rollup resolution -> bucket width in seconds, finest first
+MAX_SERIES_POINTS = 1500  # Range queries use the finest resolution that stays within this many buckets
+RAW_MAX_SPAN = timedelta(hours=6)  # Longer ranges are read from the rollups instead of raw samples
+# Rows per multi-row INSERT; 500 rows of ~15 columns stay well below SQLite's 32766 bind
+# parameters and MySQL's max_allowed_packet
+ROWS_PER_STATEMENT = 500
+
+_DIALECT_INSERTS = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def bucket_start(timestamp, seconds):
+    """Start of the bucket of `seconds` width containing `timestamp`; widths must divide an hour."""
+    timestamp = timestamp.replace(microsecond=0)
+    return timestamp - timedelta(seconds=(timestamp.minute * 60 + timestamp.second) % seconds)
+
+
+def chunked(rows, size=ROWS_PER_STATEMENT):
+    """Splits a list of rows into consecutive slices of at most `size` rows."""
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def _retained(span, days):
+    return days <= 0 or span <= timedelta(days=days)
+
+
+def choose_resolution(span, include_raw=False):
+    """
+    Picks the source of a range read: raw samples for short spans, otherwise the finest
+    rollup resolution that covers `span` in at most MAX_SERIES_POINTS buckets and is
+    still kept for that long.
+
+    Returns:
+        str: "raw", "1m", "5m" or "1h".
+    """
+    if include_raw and span <= RAW_MAX_SPAN and _retained(span, METRICS_RETENTION_DAYS):
+        return "raw"
+    for resolution, seconds in RESOLUTIONS.items():
+        if span.total_seconds() / seconds <= MAX_SERIES_POINTS and _retained(span, ROLLUP_RETENTION_DAYS.get(resolution, 0)):
+            return resolution
+    return "1h"
+
+
+def aggregate(rows):
+    """
+    Folds raw metric rows into one rollup row per node, pool, resolution and bucket.
+
+    Args:
+        rows (list): Column dicts of `node_metrics` rows, with naive UTC timestamps.
+
+    Returns:
+        list: Column dicts of `node_metric_rollups` rows, sorted by key.
+    """
+    buckets = {}
+    for row in rows:
+        for resolution, seconds in RESOLUTIONS.items():
+            key = (row["node_id"], row["instance_pool_id"], resolution, bucket_start(row["timestamp"], seconds))
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    "node_id": key[0],
+                    "instance_pool_id": key[1],
+                    "resolution": key[2],
+                    "bucket_start": key[3],
+                    "sample_count": 0,
+                    "cpu_sum": 0.0,
+                    "cpu_min": row["cpu_utilization"],
+                    "cpu_max": row["cpu_utilization"],
+                    "memory_sum": 0.0,
+                    "memory_min": row["memory_utilization"],
+                    "memory_max": row["memory_utilization"],
+                    "instance_count_sum": 0,
+                    "instance_count_min": row["instance_count"],
+                    "instance_count_max": row["instance_count"],
+                    "scaling_events": 0,
+                }
+            bucket["sample_count"] += 1
+            for column, value in (
+                ("cpu", row["cpu_utilization"]),
+                ("memory", row["memory_utilization"]),
+                ("instance_count", row["instance_count"]),
+            ):
+                bucket[f"{column}_sum"] += value
+                bucket[f"{column}_min"] = min(bucket[f"{column}_min"], value)
+                bucket[f"{column}_max"] = max(bucket[f"{column}_max"], value)
+            if row["scaling_event"]:
+                bucket["scaling_events"] += 1
+    # A fixed order keeps concurrent upserts from locking rows in opposite orders
+    return [buckets[key] for key in sorted(buckets)]
+
+
+def upsert_statement(dialect, aggregates):
+    """
+    Builds one INSERT ... ON DUPLICATE KEY (MySQL) or ON CONFLICT (PostgreSQL, SQLite)
+    statement adding rollup rows from `aggregate()` to their buckets.
+    """
+    insert = _DIALECT_INSERTS.get(dialect)
+    if insert is None:
+        raise RuntimeError(f"Metric rollups are not supported on {dialect}")
+
+    table = NodeMetricRollup.__table__
+    stmt = insert(table).values(aggregates)
+    if dialect in ("mysql", "mariadb"):
+        new = stmt.inserted
+        least, greatest = func.least, func.greatest
+    else:
+        new = stmt.excluded
+        # SQLite's two-argument min()/max() are scalar functions
+        least, greatest = (func.min, func.max) if dialect == "sqlite" else (func.least, func.greatest)
+
+    updates = {
+        "sample_count": table.c.sample_count + new.sample_count,
+        "scaling_events": table.c.scaling_events + new.scaling_events,
+    }
+    for column in ("cpu", "memory", "instance_count"):
+        updates[f"{column}_sum"] = table.c[f"{column}_sum"] + new[f"{column}_sum"]
+        updates[f"{column}_min"] = least(table.c[f"{column}_min"], new[f"{column}_min"])
+        updates[f"{column}_max"] = greatest(table.c[f"{column}_max"], new[f"{column}_max"])
+
+    if dialect in ("mysql", "mariadb"):
+        return stmt.on_duplicate_key_update(**updates)
+    return stmt.on_conflict_do_update(
+        index_elements=["node_id", "instance_pool_id", "resolution", "bucket_start"],
+        set_=updates
+    )
+
+
+async def upsert_rollups(db, rows):
+    """
+    Adds raw metric rows to their rollup buckets, ROWS_PER_STATEMENT buckets per
+    statement. Runs in the caller's transaction, so the rollups commit together with
+    the raw rows.
+    """
+    for chunk in chunked(aggregate(rows)):
+        await db.execute(upsert_statement(db.bind.dialect.name, chunk))
+
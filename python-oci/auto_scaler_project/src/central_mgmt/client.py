@@ -1,22 +1,86 @@
 
+import gzip
+import random
 import requests
 import threading
-import time
 import yaml
 import os
+import glob
+import tempfile
 import logging
 from datetime import datetime
 import json
+import uuid
+from requests.adapters import HTTPAdapter
+from central_mgmt.metrics_uplink import MetricsUplink
+
+DEFAULT_TIMEOUT = (5, 30)  # Connect and read timeouts in seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 1  # Seconds; the retry delay grows as base * 2^attempt with full jitter
+DEFAULT_BACKOFF_MAX = 30
+DEFAULT_POOL_SIZE = 4  # Keep-alive connections to the central backend
+GZIP_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+MAX_CONFIG_BACKUPS = 5  # Older config.yaml backups are deleted
+CONFIG_POLL_TIMEOUT = 60  # Seconds the backend holds a config long-poll open
+CONFIG_CHECK_INTERVAL = 30  # Plain config checks when the backend has no long-poll route
+CONFIG_RETRY_MAX_INTERVAL = 600  # Upper bound of the backoff after failed config polls
 
 class CentralManagementClient:
-    def __init__(self, central_api_url, api_key=None, local_config_path="config.yaml"):
-        self.central_api_url = central_api_url
+    def __init__(self, central_api_url, api_key=None, local_config_path="config.yaml", on_config_applied=None,
+                 instance_counts_provider=None, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 state_path=None, max_backups=MAX_CONFIG_BACKUPS, spool_dir=None):
+        """
+        Client of the central management backend.
+
+        All calls share one keep-alive session, use explicit timeouts and compress
+        request bodies larger than GZIP_MIN_BYTES. Calls are retried with jittered
+        exponential backoff on 429 and connect timeouts, and idempotent calls also on
+        other connection errors and 5xx; a POST is only retried that way when it is
+        safe to repeat, such as metrics carrying idempotency keys.
+
+        The node identity and the applied configuration version are kept in a small
+        state file, so config checks are conditional and survive restarts.
+
+        Args:
+            central_api_url (str): Base URL of the backend, without the /api prefix.
+            api_key (str): API key of an already registered node.
+            local_config_path (str): Path of the config.yaml managed by the backend.
+            on_config_applied (Callable): Called after a new config.yaml was written.
+            instance_counts_provider (Callable): Returns {instance_pool_id: current size} for heartbeats.
+            timeout (tuple): Connect and read timeouts in seconds.
+            max_retries (int): Retries after the first attempt of a call.
+            state_path (str): State file, `<local_config_path>.state.json` by default.
+            max_backups (int): Number of config.yaml backups kept.
+            spool_dir (str): Directory where undelivered metrics are kept, `<local_config_path>.spool` by default.
+        """
+        self.central_api_url = central_api_url.rstrip("/")
+        self.on_config_applied = on_config_applied
+        self.instance_counts_provider = instance_counts_provider
         self.api_key = api_key
         self.local_config_path = local_config_path
         self.node_id = None
+        self.state_path = state_path or f"{local_config_path}.state.json"
+        self.max_backups = max_backups
+        self.timeout = timeout
+        self.max_retries = max_retries
         self.stop_event = threading.Event()
         self.hostname = os.uname()[1] if hasattr(os, 'uname') else "unknown-host"
         self.logger = logging.getLogger("central_mgmt_client")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DEFAULT_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.uplink = MetricsUplink(self._send_metrics_batch, spool_dir or f"{local_config_path}.spool")
+        self.metrics_rejected = 0  # Samples the backend refused and that are not resent
+
+        self.state = self._load_state()
+        if not self.api_key and self.state.get("api_key"):
+            self.api_key = self.state["api_key"]
+            self.node_id = self.state.get("node_id")
         
     def start(self):
         """Start the central management client and register with the central system."""
@@ -30,6 +94,14 @@ class CentralManagementClient:
             heartbeat_thread.daemon = True
             heartbeat_thread.start()
             
+            # Start the background metrics sender
+            self.uplink.start()
+            
+            # Start config thread, which waits on the long-poll route for new versions
+            config_thread = threading.Thread(target=self.config_loop)
+            config_thread.daemon = True
+            config_thread.start()
+            
             self.logger.info(f"Started central management client for node {self.node_id}")
         except Exception as e:
             self.logger.error(f"Failed to start central management client: {e}")
@@ -56,9 +128,9 @@ class CentralManagementClient:
                 })
             
             # Send registration request
-            response = requests.post(
-                f"{self.central_api_url}/api/register",
-                headers={"Content-Type": "application/json"},
+            response = self._request(
+                "POST",
+                "/api/register",
                 json={
                     "hostname": self.hostname,
                     "ip_address": self._get_ip_address(),
@@ -80,16 +152,86 @@ class CentralManagementClient:
         except Exception as e:
             self.logger.error(f"Registration error: {e}")
             
+    def rotate_api_key(self):
+        """Replace this node's API key with a new one issued by central management."""
+        try:
+            response = self._request("POST", f"/api/nodes/{self.node_id}/rotate-key")
+            if response.status_code == 200:
+                self.api_key = response.json()["api_key"]
+                self._save_api_key()
+                self.logger.info("Rotated central management API key")
+                return True
+            self.logger.error(f"Failed to rotate API key: {response.status_code} - {response.text}")
+        except Exception as e:
+            self.logger.error(f"API key rotation error: {e}")
+        return False
+
     def heartbeat_loop(self):
         """Send periodic heartbeats to central management."""
         while not self.stop_event.is_set():
             try:
                 self.send_heartbeat()
-                self.check_config_updates()
-                time.sleep(30)  # Send heartbeat every 30 seconds
+                self.stop_event.wait(30)  # Send heartbeat every 30 seconds
             except Exception as e:
                 self.logger.error(f"Error in heartbeat: {e}")
-                time.sleep(60)  # Retry after a minute if there's an error
+                self.stop_event.wait(60)  # Retry after a minute if there's an error
+                
+    def config_loop(self):
+        """Receive configuration updates as soon as they are published."""
+        long_poll = True
+        failures = 0
+        while not self.stop_event.is_set():
+            try:
+                if long_poll:
+                    status_code, advanced = self.poll_config_updates()
+                    if status_code == 304 or advanced:
+                        # Nothing changed, or the new version was acknowledged; wait on the next one
+                        failures = 0
+                        continue
+                    if status_code == 404 and self.node_id:
+                        # Unknown route or node; fall back to plain checks
+                        self.logger.warning("Config long-poll unavailable, checking for updates periodically")
+                        long_poll = False
+                    elif status_code is not None:
+                        # A failed poll or an unacknowledged apply would be answered again at once
+                        failures += 1
+                        delay = min(CONFIG_CHECK_INTERVAL * 2 ** (failures - 1), CONFIG_RETRY_MAX_INTERVAL)
+                        self.logger.warning(f"Config update not applied, polling again in {delay} seconds")
+                        self.stop_event.wait(delay)
+                        continue
+                else:
+                    self.check_config_updates()
+                self.stop_event.wait(CONFIG_CHECK_INTERVAL)
+            except Exception as e:
+                self.logger.error(f"Error in config updates: {e}")
+                self.stop_event.wait(60)  # Retry after a minute if there's an error
+                
+    def poll_config_updates(self, timeout=CONFIG_POLL_TIMEOUT):
+        """
+        Wait on the backend until a configuration newer than the applied one exists.
+
+        Returns:
+            tuple: (status_code, advanced). The status code is None if the node is not
+                registered yet; `advanced` tells whether a new version was applied and
+                acknowledged, so the next poll waits for a later one.
+        """
+        if not self.node_id or not self.api_key:
+            return None, False
+            
+        response = self._request(
+            "GET",
+            f"/api/nodes/{self.node_id}/config/poll",
+            params={"since_version": self._get_config_version(), "timeout": timeout},
+            timeout=(self.timeout[0], timeout + self.timeout[1]),
+        )
+        advanced = False
+        if response.status_code == 200:
+            config_data = response.json()
+            self.logger.info(f"New configuration available (v{config_data['version']})")
+            advanced = self.apply_config_update(config_data, etag=response.headers.get("ETag"))
+        elif response.status_code != 304:
+            self.logger.warning(f"Failed to poll config updates: {response.status_code}")
+        return response.status_code, advanced
                 
     def send_heartbeat(self):
         """Send a heartbeat to the central management system."""
@@ -101,13 +243,15 @@ class CentralManagementClient:
             instance_counts = self._get_instance_counts()
             
             # Send heartbeat
-            response = requests.post(
-                f"{self.central_api_url}/api/nodes/{self.node_id}/heartbeat",
-                headers={"X-API-Key": self.api_key},
+            # A heartbeat overwrites the node's state, so repeating it is harmless
+            response = self._request(
+                "POST",
+                f"/api/nodes/{self.node_id}/heartbeat",
                 json={
                     "uptime": self._get_uptime(),
                     "instance_counts": instance_counts
-                }
+                },
+                idempotent=True
             )
             
             if response.status_code != 200:
@@ -121,83 +265,200 @@ class CentralManagementClient:
             return
             
         try:
-            # Get current config version
-            current_version = self._get_config_version()
-            
-            # Check for configuration updates
-            response = requests.get(
-                f"{self.central_api_url}/api/nodes/{self.node_id}/config",
-                headers={"X-API-Key": self.api_key}
+            # Only download the configuration when it differs from the applied version
+            headers = {}
+            if self.state.get("config_etag"):
+                headers["If-None-Match"] = self.state["config_etag"]
+            response = self._request(
+                "GET",
+                f"/api/nodes/{self.node_id}/config",
+                params={"since_version": self._get_config_version()},
+                headers=headers,
             )
             
-            if response.status_code == 200:
+            if response.status_code == 304:
+                self.logger.debug("Configuration is up to date")
+            elif response.status_code == 200:
                 config_data = response.json()
                 
                 # Compare versions
-                if config_data["version"] > current_version:
+                if config_data["version"] > self._get_config_version():
                     self.logger.info(f"New configuration available (v{config_data['version']})")
-                    self.apply_config_update(config_data)
+                    self.apply_config_update(config_data, etag=response.headers.get("ETag"))
             else:
                 self.logger.warning(f"Failed to check config updates: {response.status_code}")
         except Exception as e:
             self.logger.error(f"Error checking config updates: {e}")
         
-    def apply_config_update(self, config_data):
-        """Apply a new configuration from central management."""
+    def apply_config_update(self, config_data, etag=None):
+        """
+        Apply a new configuration from central management.
+
+        Returns:
+            bool: Whether central acknowledged the configuration and its version was saved.
+        """
+        acknowledged = False
         try:
-            # Backup current config
-            self._backup_config()
-            
-            # Write new config
-            with open(self.local_config_path, 'w') as f:
-                f.write(config_data["config"])
-                
-            self.logger.info(f"Applied new configuration (v{config_data['version']})")
+            changed = self._read_config() != config_data["config"]
+            if changed:
+                # Backup current config, then replace it atomically
+                self._backup_config()
+                self._write_config(config_data["config"])
+                self.logger.info(f"Applied new configuration (v{config_data['version']})")
             
             # Notify central system that config was applied
-            requests.put(
-                f"{self.central_api_url}/api/nodes/{self.node_id}/config/{config_data['config_id']}/applied",
-                headers={"X-API-Key": self.api_key}
-            )
+            response = self._request("PUT", f"/api/nodes/{self.node_id}/config/{config_data['config_id']}/applied")
+            if response.status_code == 200:
+                # Remember the version only once it was acknowledged, so a failed report is retried
+                self.state.update(config_version=config_data["version"], config_etag=etag)
+                self._save_state()
+                acknowledged = True
+            else:
+                self.logger.warning(f"Failed to report applied configuration: {response.status_code}")
             
-            # TODO: Signal for config reload if needed
+            # Let the running autoscaler pick up the new file
+            if changed and self.on_config_applied:
+                self.on_config_applied()
         except Exception as e:
             self.logger.error(f"Error applying config update: {e}")
+        return acknowledged
     
     def send_metrics(self, instance_pool_id, cpu_util, memory_util, instance_count, 
                     scaling_event=False, scaling_direction=None, additional_data=None):
-        """Send metrics to the central management system."""
-        if not self.node_id or not self.api_key:
-            return
-            
-        try:
-            payload = {
-                "instance_pool_id": instance_pool_id,
-                "cpu_utilization": cpu_util,
-                "memory_utilization": memory_util,
-                "instance_count": instance_count,
-                "scaling_event": scaling_event,
-                "scaling_direction": scaling_direction,
-                "additional_data": additional_data or {}
-            }
-            
-            response = requests.post(
-                f"{self.central_api_url}/api/nodes/{self.node_id}/metrics",
-                headers={"X-API-Key": self.api_key},
-                json=payload
-            )
-            
-            if response.status_code != 200:
-                self.logger.warning(f"Failed to send metrics: {response.status_code}")
-        except Exception as e:
-            self.logger.error(f"Error sending metrics: {e}")
+        """Queue metrics for the central management system; sent in batches in the background."""
+        self.uplink.enqueue({
+            "instance_pool_id": instance_pool_id,
+            "cpu_utilization": cpu_util,
+            "memory_utilization": memory_util,
+            "instance_count": instance_count,
+            "scaling_event": scaling_event,
+            "scaling_direction": scaling_direction,
+            "additional_data": additional_data or {},
+            "timestamp": datetime.utcnow().isoformat(),
+            # Lets central store a sample once however often a batch is retried
+            "idempotency_key": uuid.uuid4().hex,
+        })
     
     def stop(self):
         """Stop the central management client."""
         self.stop_event.set()
+        self.uplink.stop()
+        self.session.close()
         self.logger.info("Stopped central management client")
     
     # Helper methods
+    def _send_metrics_batch(self, batch):
+        """
+        Deliver queued metrics in order, in one request to the bulk endpoint.
+
+        Returns:
+            int: Number of samples, from the start of the batch, that were handled.
+        """
+        if not self.node_id or not self.api_key:
+            return 0
+        try:
+            # Every sample carries an idempotency key, so the backend stores a retried batch once
+            response = self._request("POST", f"/api/nodes/{self.node_id}/metrics/bulk", json=batch, idempotent=True)
+        except Exception as e:
+            self.logger.warning(f"Error sending metrics: {e}")
+            return 0
+        if response.status_code == 200:
+            return len(batch)
+        if response.status_code in (400, 404, 422):
+            # Older central without the bulk endpoint, or a sample it rejects; send one by one
+            return self._send_metrics_individually(batch)
+        if response.status_code in RETRY_STATUS_CODES or response.status_code == 401:
+            self.logger.warning(f"Failed to send metrics: {response.status_code}")
+            return 0
+        if response.status_code == 413 and len(batch) > 1:
+            # Too large for the backend; send each half on its own
+            half = len(batch) // 2
+            delivered = self._send_metrics_batch(batch[:half])
+            if delivered < half:
+                return delivered
+            return half + self._send_metrics_batch(batch[half:])
+        # Rejected batches would be rejected again; count them instead of resending
+        self._reject_metrics(len(batch), response)
+        return len(batch)
+
+    def _send_metrics_individually(self, batch):
+        for delivered, payload in enumerate(batch):
+            try:
+                response = self._request("POST", f"/api/nodes/{self.node_id}/metrics", json=payload, idempotent=True)
+            except Exception as e:
+                self.logger.warning(f"Error sending metrics: {e}")
+                return delivered
+            if response.status_code in RETRY_STATUS_CODES or response.status_code in (401, 404):
+                self.logger.warning(f"Failed to send metrics: {response.status_code}")
+                return delivered
+            if response.status_code != 200:
+                # Rejected samples would be rejected again; count them instead of resending
+                self._reject_metrics(1, response)
+        return len(batch)
+
+    def _reject_metrics(self, count, response):
+        self.metrics_rejected += count
+        self.logger.error(
+            f"Central management rejected {count} metric samples: {response.status_code} - {response.text} "
+            f"({self.metrics_rejected} rejected since start)"
+        )
+    
+    def _request(self, method, path, json=None, params=None, headers=None, timeout=None, idempotent=None):
+        """
+        Sends a request over the shared session, retrying transient failures.
+
+        Requests the backend never processed (429, connect timeouts) are always retried.
+        Failures that may come after the backend acted on the request (5xx, connection
+        resets, read timeouts) are only retried for idempotent requests, so a
+        registration or key rotation is never performed twice.
+
+        Args:
+            idempotent (bool): Whether the request may be repeated; defaults to True for
+                IDEMPOTENT_METHODS. Pass True for a POST that is safe to repeat.
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            requests.RequestException: If every attempt failed without a response.
+        """
+        headers = dict(headers or {})
+        if self.api_key:
+            headers["X-API-Key"] = self.api_key
+        data = None
+        if json is not None:
+            data = _json_dumps(json)
+            headers["Content-Type"] = "application/json"
+            if len(data) >= GZIP_MIN_BYTES:
+                data = gzip.compress(data)
+                headers["Content-Encoding"] = "gzip"
+
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retry_status_codes = RETRY_STATUS_CODES if idempotent else (429,)
+
+        url = f"{self.central_api_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.request(
+                    method, url, data=data, params=params, headers=headers, timeout=timeout or self.timeout
+                )
+                if response.status_code not in retry_status_codes or attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                self.logger.warning(f"{method} {path} returned {response.status_code}, retrying")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries or not (idempotent or isinstance(e, requests.ConnectTimeout)):
+                    raise
+                self.logger.warning(f"{method} {path} failed: {e}, retrying")
+
+            delay = random.uniform(0, min(DEFAULT_BACKOFF_MAX, DEFAULT_BACKOFF_BASE * 2 ** attempt))
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, min(int(retry_after), DEFAULT_BACKOFF_MAX))
+            if self.stop_event.wait(delay):
+                raise requests.ConnectionError(f"{method} {path} aborted, client is stopping")
+
     def _get_ip_address(self):
         """Get the IP address of this system."""
         try:
@@ -219,47 +480,87 @@ class CentralManagementClient:
             return 0
     
     def _get_instance_counts(self):
-        """Get number of instances in each pool."""
+        """Get number of instances in each pool from the running autoscaler."""
+        if self.instance_counts_provider is None:
+            return {}
         try:
-            with open(self.local_config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            
-            result = {}
-            for pool in config.get("pools", []):
-                # In a real implementation, this would query actual instance counts
-                # For now, we'll use dummy values
-                result[pool["instance_pool_id"]] = pool.get("current_instances", 1)
-            
-            return result
+            return self.instance_counts_provider()
         except Exception as e:
             self.logger.error(f"Error getting instance counts: {e}")
             return {}
     
     def _get_config_version(self):
-        """Get the current configuration version."""
+        """Get the configuration version applied last, 0 if none."""
+        return self.state.get("config_version", 0)
+    
+    def _read_config(self):
         try:
-            # In a real implementation, this might be stored in a state file
-            # For now, just use 0 to always check for updates
-            return 0
-        except:
-            return 0
+            with open(self.local_config_path, 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def _write_config(self, config_yaml):
+        """Replace config.yaml atomically, so readers never see a partial file."""
+        _atomic_write(self.local_config_path, config_yaml)
     
     def _backup_config(self):
-        """Create a backup of the current configuration."""
+        """Create a backup of the current configuration, keeping the newest `max_backups`."""
         try:
             import shutil
+            if not os.path.exists(self.local_config_path):
+                return
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
             backup_path = f"{self.local_config_path}.{timestamp}.bak"
             shutil.copy2(self.local_config_path, backup_path)
             self.logger.info(f"Configuration backed up to {backup_path}")
+            
+            backups = sorted(glob.glob(f"{glob.escape(self.local_config_path)}.*.bak"))
+            for old_backup in backups[:-self.max_backups] if self.max_backups > 0 else backups:
+                os.remove(old_backup)
         except Exception as e:
             self.logger.error(f"Error backing up config: {e}")
     
     def _save_api_key(self):
-        """Save API key for future use."""
+        """Save the node identity so the node does not register again after a restart."""
+        self.state.update(node_id=self.node_id, api_key=self.api_key)
+        self._save_state()
+    
+    def _load_state(self):
         try:
-            # In a real implementation, this would be saved securely
-            # For simplicity, we'll just log it for now
-            self.logger.info(f"API key for node {self.node_id}: {self.api_key}")
-        except:
-            pass
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.error(f"Error reading client state {self.state_path}: {e}")
+            return {}
+    
+    def _save_state(self):
+        try:
+            _atomic_write(self.state_path, json.dumps(self.state), mode=0o600)
+        except Exception as e:
+            self.logger.error(f"Error saving client state {self.state_path}: {e}")
+
+def _json_dumps(payload):
+    return json.dumps(payload, default=str).encode()
+
+
+def _atomic_write(path, content, mode=None):
+    """Writes a file through a temporary file in the same directory and os.replace."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        elif os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_BATCH_SIZE = 100  # Samples sent per batch
+DEFAULT_MAX_BATCH_AGE = 10  # Seconds a sample may wait in memory before it is sent
+DEFAULT_MAX_QUEUE = 10000  # Samples kept in memory; the oldest are dropped beyond this
+DEFAULT_SPOOL_MAX_BYTES = 64 * 1024 * 1024  # Oldest spool segments are dropped beyond this
+DEFAULT_SEGMENT_MAX_BYTES = 1024 * 1024
+DEFAULT_RETRY_INTERVAL = 30  # Seconds between delivery attempts while central is unreachable
+
+
+class MetricsUplink:
+    def __init__(self, send_batch, spool_dir, batch_size=DEFAULT_BATCH_SIZE, max_batch_age=DEFAULT_MAX_BATCH_AGE,
+                 max_queue=DEFAULT_MAX_QUEUE, spool_max_bytes=DEFAULT_SPOOL_MAX_BYTES,
+                 segment_max_bytes=DEFAULT_SEGMENT_MAX_BYTES, retry_interval=DEFAULT_RETRY_INTERVAL):
+        """
+        Buffers metric samples in memory and delivers them in batches from a background thread.
+
+        `enqueue()` only appends to an in-memory queue, so callers never wait on the
+        network. Batches are sent once `batch_size` samples are queued or the oldest
+        one is `max_batch_age` seconds old. Batches that cannot be delivered are
+        appended to newline-delimited JSON segment files under `spool_dir`, and the
+        spool is replayed oldest first before any newer sample is sent, so the
+        backend receives samples in order.
+
+        Args:
+            send_batch (Callable): Sends a list of samples and returns how many of them,
+                counted from the start, were delivered.
+            spool_dir (str): Directory of the on-disk spool.
+            batch_size (int): Samples sent per batch.
+            max_batch_age (float): Seconds a sample may wait before its batch is sent.
+            max_queue (int): Samples kept in memory before the oldest are dropped.
+            spool_max_bytes (int): Size of the spool before the oldest segments are dropped.
+            segment_max_bytes (int): Size at which a new spool segment is started.
+            retry_interval (float): Seconds between delivery attempts while central is unreachable.
+        """
+        self.send_batch = send_batch
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.max_batch_age = max_batch_age
+        self.max_queue = max_queue
+        self.spool_max_bytes = spool_max_bytes
+        self.segment_max_bytes = segment_max_bytes
+        self.retry_interval = retry_interval
+
+        self.queue = deque()  # (enqueued_at, sample)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.stop_event = threading.Event()
+        self.dropped = 0
+        self.replay_offset = 0  # Samples of the oldest segment already delivered
+        self.thread = None
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def enqueue(self, sample):
+        """Queues one sample for delivery. Never blocks on I/O."""
+        with self.lock:
+            self.queue.append((time.monotonic(), sample))
+            if len(self.queue) > self.max_queue:
+                self.queue.popleft()
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logging.warning(f"Metrics queue full, dropped {self.dropped} samples so far.")
+            # Wake the flusher to start the age timer of a new batch, or to send a full one
+            if len(self.queue) == 1 or len(self.queue) >= self.batch_size:
+                self.wakeup.notify()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="metrics-uplink", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        """Stops the flusher and spools whatever could not be sent."""
+        with self.lock:
+            self.stop_event.set()
+            self.wakeup.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        remaining = self._take(len(self.queue))
+        if remaining:
+            self._spool(remaining)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            with self.lock:
+                self.wakeup.wait(self._seconds_until_due())
+            if self.stop_event.is_set():
+                return
+
+            if not self._replay_spool():
+                # Central is unreachable; keep newer samples behind the spooled ones
+                self._spool(self._take(len(self.queue)))
+                self.stop_event.wait(self.retry_interval)
+                continue
+
+            while self._batch_due():
+                batch = self._take(self.batch_size)
+                delivered = self._send(batch)
+                if delivered < len(batch):
+                    self._spool(batch[delivered:])
+                    break
+
+    def _seconds_until_due(self):
+        """Caller must hold the lock."""
+        if self._segments():
+            return self.retry_interval if not self.queue else 0
+        if not self.queue:
+            return None
+        if len(self.queue) >= self.batch_size:
+            return 0
+        return max(0, self.queue[0][0] + self.max_batch_age - time.monotonic())
+
+    def _batch_due(self):
+        with self.lock:
+            return bool(self.queue) and (
+                len(self.queue) >= self.batch_size
+                or time.monotonic() - self.queue[0][0] >= self.max_batch_age
+                or self.stop_event.is_set()
+            )
+
+    def _take(self, count):
+        with self.lock:
+            return [self.queue.popleft()[1] for _ in range(min(count, len(self.queue)))]
+
+    def _send(self, batch):
+        try:
+            return self.send_batch(batch)
+        except Exception as e:
+            logging.warning(f"Failed to send {len(batch)} metric samples: {e}")
+            return 0
+
+    def _replay_spool(self):
+        """Sends the spooled samples oldest first. Returns True once the spool is empty."""
+        for segment in self._segments():
+            with open(segment, "r") as f:
+                samples = [json.loads(line) for line in f if line.strip()]
+
+            while self.replay_offset < len(samples):
+                batch = samples[self.replay_offset:self.replay_offset + self.batch_size]
+                delivered = self._send(batch)
+                self.replay_offset += delivered
+                if delivered < len(batch):
+                    return False
+
+            os.remove(segment)
+            self.replay_offset = 0
+            logging.info(f"Replayed {len(samples)} spooled metric samples.")
+        return True
+
+    def _spool(self, samples):
+        """Appends undelivered samples to the newest spool segment."""
+        if not samples:
+            return
+        segments = self._segments()
+        if not segments or os.path.getsize(segments[-1]) >= self.segment_max_bytes:
+            segments.append(os.path.join(self.spool_dir, f"{time.time_ns():020d}.ndjson"))
+        try:
+            with open(segments[-1], "a") as f:
+                for sample in samples:
+                    f.write(json.dumps(sample, default=str) + "\n")
+        except OSError as e:
+            logging.error(f"Failed to spool {len(samples)} metric samples: {e}")
+            return
+
+        # Keep the spool bounded by dropping the oldest segments
+        total = sum(os.path.getsize(segment) for segment in segments)
+        while total > self.spool_max_bytes and len(segments) > 1:
+            oldest = segments.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+            self.replay_offset = 0
+            logging.warning(f"Metrics spool exceeded {self.spool_max_bytes} bytes, dropped {oldest}.")
+
+    def _segments(self):
+        return sorted(
+            os.path.join(self.spool_dir, name)
+            for name in os.listdir(self.spool_dir)
+            if name.endswith(".ndjson")
+        )
@@ -6,8 +6,17 @@ import oci
 from oci.monitoring import MonitoringClient
 import sys
 
+
+def _latest_value(aggregated_datapoints):
+    """Returns the value of the most recent datapoint of a series, or None if it has none."""
+    if not aggregated_datapoints:
+        return None
+    return aggregated_datapoints[-1].value
+
+
 class OCIMetricsCollector(MetricsCollector):
-    def __init__(self, monitoring_client, compute_management_client, instance_manager, instance_pool_id, compartment_id):
+    def __init__(self, monitoring_client, compute_management_client, instance_manager, instance_pool_id, compartment_id,
+                 batch_metrics=True):
         """
         Initialize the OCI Metrics Collector.
 
@@ -17,6 +26,8 @@ class OCIMetricsCollector(MetricsCollector):
             instance_manager: InstanceManager to fetch instance details from a pool.
             instance_pool_id: OCID of the instance pool.
             compartment_id: OCID of the compartment.
+            batch_metrics: Fetch pool-wide metrics with one query per metric instead of
+                two queries per instance.
         """
         logging.debug(f"Initializing OCIMetricsCollector with monitoring_client={type(monitoring_client)}, "
                       f"compute_management_client={type(compute_management_client)}, "
@@ -26,6 +37,7 @@ class OCIMetricsCollector(MetricsCollector):
         self.instance_manager = instance_manager
         self.instance_pool_id = instance_pool_id
         self.compartment_id = compartment_id
+        self.batch_metrics = batch_metrics
 
     def fetch_instance_metrics(self, instance_id):
         """
@@ -35,7 +47,8 @@ class OCIMetricsCollector(MetricsCollector):
             instance_id: OCID of the instance.
 
         Returns:
-            Tuple (cpu_utilization, memory_utilization).
+            Tuple (cpu_utilization, memory_utilization) of the most recent datapoints; a value
+            is None when the instance has no datapoint for that metric.
         """
         try:
             namespace = "oci_computeagent"
@@ -68,24 +81,73 @@ class OCIMetricsCollector(MetricsCollector):
                 )
             )
 
-            cpu_utilization = (
-                cpu_response.data[0].aggregated_datapoints[0].value
-                if cpu_response.data else 0
-            )
+            cpu_utilization = _latest_value(cpu_response.data[0].aggregated_datapoints) if cpu_response.data else None
             memory_utilization = (
-                memory_response.data[0].aggregated_datapoints[0].value
-                if memory_response.data else 0
+                _latest_value(memory_response.data[0].aggregated_datapoints) if memory_response.data else None
             )
 
             return cpu_utilization, memory_utilization
         except Exception as e:
             logging.error(f"Failed to fetch metrics for instance {instance_id}: {e}")
-            return 0, 0
+            return None, None
+
+    def fetch_pool_metrics(self, instance_ids):
+        """
+        Fetch metrics (CPU and RAM utilization) for all instances of the pool at once.
+
+        Sends one query per metric filtered on the instancePoolId dimension. OCI returns
+        one series per resourceId, which is split per instance locally.
+
+        Args:
+            instance_ids: OCIDs of the instances currently in the pool.
+
+        Returns:
+            Dict mapping instance_id to (cpu_utilization, memory_utilization) of the most
+            recent datapoints, with None for a metric the instance has no datapoint for.
+            Instances without data in the pool-wide series are left out.
+        """
+        namespace = "oci_computeagent"
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(minutes=5)
+
+        series = {}
+        for metric_name in ("CpuUtilization", "MemoryUtilization"):
+            query = f"{metric_name}[5m]{{instancePoolId = \"{self.instance_pool_id}\"}}.max()"
+            response = self.monitoring_client.summarize_metrics_data(
+                compartment_id=self.compartment_id,
+                summarize_metrics_data_details=oci.monitoring.models.SummarizeMetricsDataDetails(
+                    namespace=namespace,
+                    query=query,
+                    start_time=start_time,
+                    end_time=end_time,
+                    resolution="5m"
+                )
+            )
+
+            values = {}
+            for metric_data in response.data or []:
+                resource_id = (metric_data.dimensions or {}).get("resourceId")
+                value = _latest_value(metric_data.aggregated_datapoints)
+                if resource_id and value is not None:
+                    values[resource_id] = value
+            series[metric_name] = values
+
+        return {
+            instance_id: (
+                series["CpuUtilization"].get(instance_id),
+                series["MemoryUtilization"].get(instance_id),
+            )
+            for instance_id in instance_ids
+            if instance_id in series["CpuUtilization"] or instance_id in series["MemoryUtilization"]
+        }
 
     def get_metrics(self):
         """
         Fetch average CPU and RAM utilization across all instances in the pool.
 
+        Each metric is averaged over the instances that reported it, so an instance
+        without a datapoint (e.g. still booting) does not pull the average towards 0.
+
         Returns:
             Tuple (avg_cpu_utilization, avg_memory_utilization).
         Raises:
@@ -106,36 +168,59 @@ class OCIMetricsCollector(MetricsCollector):
 
             logging.debug(f"Instances found: {[instance.id for instance in instances]}")
 
-            total_cpu = 0
-            total_memory = 0
+            cpu_values = []
+            memory_values = []
             instance_count = len(instances)
             logging.debug(f"Number of instances in pool: {instance_count}")
 
-            # Fetch metrics for each instance
+            pool_metrics = {}
+            if self.batch_metrics:
+                try:
+                    pool_metrics = self.fetch_pool_metrics([instance.id for instance in instances])
+                except Exception as batch_error:
+                    logging.warning(
+                        f"Pool-wide metric query failed for pool {self.instance_pool_id}: {batch_error}. "
+                        "Falling back to per-instance queries."
+                    )
+
+            # Fetch metrics for each instance, querying individually only those missing from the batch
             for instance in instances:
                 instance_id = instance.id
                 logging.debug(f"Fetching metrics for instance: {instance_id}")
 
                 try:
-                    cpu, memory = self.fetch_instance_metrics(instance_id)
+                    if instance_id in pool_metrics:
+                        cpu, memory = pool_metrics[instance_id]
+                    else:
+                        cpu, memory = self.fetch_instance_metrics(instance_id)
                     logging.debug(f"Metrics for instance {instance_id} - CPU: {cpu}%, RAM: {memory}%")
 
-                    total_cpu += cpu
-                    total_memory += memory
+                    if cpu is not None:
+                        cpu_values.append(cpu)
+                    if memory is not None:
+                        memory_values.append(memory)
                 except Exception as metric_error:
                     raise RuntimeError(
                         f"Failed to fetch metrics for instance {instance_id}: {metric_error}"
                     )
 
-            avg_cpu = total_cpu / instance_count if instance_count > 0 else 0
-            avg_memory = total_memory / instance_count if instance_count > 0 else 0
+            if not cpu_values or not memory_values:
+                missing = "CPU" if not cpu_values else "memory"
+                raise RuntimeError(f"No {missing} datapoints for any instance in pool {self.instance_pool_id}.")
+            if len(cpu_values) < instance_count or len(memory_values) < instance_count:
+                logging.warning(
+                    f"Averaging over the instances with data only: {len(cpu_values)}/{instance_count} reported CPU, "
+                    f"{len(memory_values)}/{instance_count} reported memory."
+                )
+
+            avg_cpu = sum(cpu_values) / len(cpu_values)
+            avg_memory = sum(memory_values) / len(memory_values)
 
             logging.info(f"Average CPU: {avg_cpu}%, Average RAM: {avg_memory}%")
             return avg_cpu, avg_memory
 
         except RuntimeError as re:
             logging.error(f"RuntimeError while fetching OCI metrics: {re}")
-            sys.exit(1)
             raise  # Re-raise the RuntimeError to halt execution
         except Exception as e:
             logging.error(f"Unexpected error while fetching OCI metrics for pool {self.instance_pool_id}: {e}")
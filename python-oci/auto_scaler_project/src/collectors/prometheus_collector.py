@@ -1,11 +1,12 @@
-from prometheus_metrics.prometheus_client import get_cpu_ram_metrics
+from prometheus_metrics.prometheus_client import get_cpu_ram_metrics, get_pool_cpu_ram_metrics
 from collectors.base_collector import MetricsCollector
 from instance_manager.instance_pool import get_instances_from_instance_pool
 import logging
 
 
 class PrometheusMetricsCollector(MetricsCollector):
-    def __init__(self, prometheus_url, compute_management_client, instance_pool_id, compartment_id):
+    def __init__(self, prometheus_url, compute_management_client, instance_pool_id, compartment_id,
+                 batch_metrics=True):
         """
         Initialize the Prometheus Metrics Collector.
 
@@ -14,11 +15,14 @@ class PrometheusMetricsCollector(MetricsCollector):
             compute_management_client: OCI ComputeManagementClient instance.
             instance_pool_id (str): OCID of the instance pool.
             compartment_id (str): OCID of the compartment.
+            batch_metrics (bool): Query all instances with one query per metric instead
+                of two queries per instance.
         """
         self.prometheus_url = prometheus_url
         self.compute_management_client = compute_management_client
         self.instance_pool_id = instance_pool_id
         self.compartment_id = compartment_id
+        self.batch_metrics = batch_metrics
 
         logging.debug(f"Initialized PrometheusMetricsCollector with URL: {self.prometheus_url}, "
                       f"instance_pool_id: {self.instance_pool_id}, compartment_id: {self.compartment_id}")
@@ -47,19 +51,36 @@ class PrometheusMetricsCollector(MetricsCollector):
             total_ram = 0
             instance_count = len(instances)
 
-            # Fetch metrics for each instance using its hostname
-            for instance in instances:
-                instance_hostname = instance.display_name  # Using display_name as the hostname
+            # Using display_name as the hostname
+            hostnames = [instance.display_name for instance in instances]
+            pool_metrics = {}
+            if self.batch_metrics:
+                try:
+                    pool_metrics = get_pool_cpu_ram_metrics(hostnames, self.prometheus_url)
+                except Exception as batch_error:
+                    logging.warning(
+                        f"Batched Prometheus query failed for pool {self.instance_pool_id}: {batch_error}. "
+                        "Falling back to per-instance queries."
+                    )
+
+            # Fetch metrics for each instance, querying individually only those missing from the batch
+            for instance_hostname in hostnames:
                 logging.debug(f"Fetching Prometheus metrics for instance hostname: {instance_hostname}")
 
                 try:
-                    cpu_data, ram_data = get_cpu_ram_metrics(instance_hostname, self.prometheus_url)
+                    if instance_hostname in pool_metrics:
+                        cpu, ram = pool_metrics[instance_hostname]
+                    else:
+                        cpu_data, ram_data = get_cpu_ram_metrics(instance_hostname, self.prometheus_url)
+
+                        if not cpu_data or not ram_data:
+                            raise RuntimeError(f"Metrics not found for instance {instance_hostname}.")
+
+                        cpu = float(cpu_data[0]['value'][1])
+                        ram = float(ram_data[0]['value'][1])
 
-                    if not cpu_data or not ram_data:
-                        raise RuntimeError(f"Metrics not found for instance {instance_hostname}.")
-                    
-                    total_cpu += float(cpu_data[0]['value'][1])
-                    total_ram += float(ram_data[0]['value'][1])
+                    total_cpu += cpu
+                    total_ram += ram
                 except Exception as metric_error:
                     raise RuntimeError(
                         f"Failed to fetch metrics for instance {instance_hostname}: {metric_error}"
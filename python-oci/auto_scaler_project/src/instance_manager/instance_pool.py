@@ -1,12 +1,123 @@
 import oci
 import logging
+import threading
+import time
+from instance_manager.resize_tracker import resize_tracker
+from oracle_sdk_wrapper.client_registry import get_work_request_client
+
+POOL_STATE_TTL = 30  # Seconds a fetched instance pool stays fresh
+
+
+class InstancePoolCache:
+    def __init__(self, ttl=POOL_STATE_TTL):
+        """
+        Short-lived cache of instance pool state shared by the autoscaler and the scheduler.
+
+        Concurrent reads of the same pool are merged into one control-plane call,
+        reads within `ttl` seconds are served from memory, and our own
+        `update_instance_pool` calls replace the cached state with their response.
+
+        Args:
+            ttl (int): Seconds a fetched instance pool stays fresh.
+        """
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # instance_pool_id -> (fetched_at, InstancePool)
+        self.in_flight = {}  # instance_pool_id -> pending fetch shared by concurrent readers
+
+    def get(self, compute_management_client, instance_pool_id):
+        """Returns the pool state, fetching it only when the cached copy is stale."""
+        with self.lock:
+            entry = self.entries.get(instance_pool_id)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+
+            fetch = self.in_flight.get(instance_pool_id)
+            leader = fetch is None
+            if leader:
+                fetch = {"done": threading.Event(), "result": None, "error": None}
+                self.in_flight[instance_pool_id] = fetch
+
+        if not leader:
+            fetch["done"].wait()
+            if fetch["error"] is not None:
+                raise fetch["error"]
+            return fetch["result"]
+
+        try:
+            logging.info(f"Fetching details of {instance_pool_id}")
+            fetch["result"] = compute_management_client.get_instance_pool(
+                instance_pool_id=instance_pool_id
+            ).data
+            self.update(instance_pool_id, fetch["result"])
+            return fetch["result"]
+        except Exception as e:
+            fetch["error"] = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(instance_pool_id, None)
+            fetch["done"].set()
+
+    def peek(self, instance_pool_id):
+        """Returns the last known pool state regardless of its age, or None."""
+        with self.lock:
+            entry = self.entries.get(instance_pool_id)
+        return entry[1] if entry else None
+
+    def update(self, instance_pool_id, instance_pool):
+        """Stores pool state obtained from a fetch or from our own update call."""
+        if instance_pool is None:
+            self.invalidate(instance_pool_id)
+            return
+        with self.lock:
+            self.entries[instance_pool_id] = (time.monotonic(), instance_pool)
+
+    def invalidate(self, instance_pool_id):
+        """Drops the cached state so the next read goes to OCI."""
+        with self.lock:
+            self.entries.pop(instance_pool_id, None)
+
+
+pool_state_cache = InstancePoolCache()
+
+
+def update_instance_pool_size(compute_management_client, instance_pool_id, size):
+    """
+    Resizes an instance pool and refreshes the cached pool state from the response.
+    The resize is then followed in the background until the pool is stable again.
+
+    Returns:
+        The OCI response of update_instance_pool.
+    """
+    previous = pool_state_cache.peek(instance_pool_id)
+    try:
+        response = compute_management_client.update_instance_pool(
+            instance_pool_id=instance_pool_id,
+            update_instance_pool_details=oci.core.models.UpdateInstancePoolDetails(size=size),
+        )
+    except Exception:
+        # The pool may have changed even if the call failed, re-read it next time
+        pool_state_cache.invalidate(instance_pool_id)
+        raise
+    pool_state_cache.update(instance_pool_id, response.data)
+
+    if previous is not None and response.data is not None and size != previous.size:
+        resize_tracker.track(
+            compute_management_client,
+            instance_pool_id,
+            response.data.compartment_id,
+            previous.size,
+            size,
+            work_request_id=(response.headers or {}).get("opc-work-request-id"),
+            work_request_client=get_work_request_client(compute_management_client),
+        )
+    return response
+
 
 def get_instance_pool_details(compute_management_client, instance_pool_id):
     try:
-        logging.info(f"Fetching details of {instance_pool_id}")
-        response = compute_management_client.get_instance_pool(
-            instance_pool_id=instance_pool_id
-        ).data
+        response = pool_state_cache.get(compute_management_client, instance_pool_id)
 
         if response:
             return response
@@ -0,0 +1,230 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+import numpy as np
+import oci
+
+DEFAULT_POLL_INTERVAL = 10  # First delay between completion checks of a resize
+DEFAULT_MAX_POLL_INTERVAL = 60  # Backoff ceiling between completion checks
+DEFAULT_RESIZE_TIMEOUT = 1800  # Give up on resizes that never settle
+DEFAULT_MAX_SAMPLES = 50  # Recent latencies kept per pool and direction for percentiles
+LATENCY_BUCKETS = (30, 60, 120, 180, 300, 450, 600, 900, 1200, 1800)  # Histogram upper bounds in seconds
+
+WORK_REQUEST_DONE = ("SUCCEEDED", "FAILED", "CANCELED")
+GONE_STATES = ("terminating", "terminated")
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, max_samples=DEFAULT_MAX_SAMPLES):
+        """
+        Cumulative latency histogram plus the most recent samples for percentiles.
+
+        Args:
+            buckets (tuple): Upper bounds of the buckets in seconds; slower samples land in an overflow bucket.
+            max_samples (int): Number of recent samples kept for percentiles.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=max_samples)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def percentile(self, q):
+        """Returns the q-th percentile of the recent samples, or None if there are none."""
+        if not self.recent:
+            return None
+        return float(np.percentile(list(self.recent), q))
+
+    def snapshot(self):
+        labels = [f"le_{bound}" for bound in self.buckets] + ["overflow"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 1) if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class ResizeTracker:
+    def __init__(self, poll_interval=DEFAULT_POLL_INTERVAL, max_poll_interval=DEFAULT_MAX_POLL_INTERVAL,
+                 timeout=DEFAULT_RESIZE_TIMEOUT, sleep=time.sleep, clock=time.monotonic):
+        """
+        Follows pool resizes until the pool is stable again and records how long they took.
+
+        A resize is followed through its OCI work request when one is available, then
+        confirmed by polling the pool and its instance lifecycle states with backoff.
+        Scale-outs are recorded as provisioning latency and scale-ins as termination
+        latency, per pool. Listeners subscribed to a pool are called once it settles,
+        e.g. to release a cooldown early.
+
+        Args:
+            poll_interval (float): First delay between checks, doubled after each check.
+            max_poll_interval (float): Longest delay between checks.
+            timeout (float): Seconds after which a resize is abandoned without a measurement.
+            sleep (Callable): Sleep function, replaceable in tests.
+            clock (Callable): Monotonic clock, replaceable in tests.
+        """
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.sleep = sleep
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.histograms = {}  # (instance_pool_id, "provisioning" | "termination") -> LatencyHistogram
+        self.generations = {}  # instance_pool_id -> generation of the latest resize
+        self.listeners = {}  # instance_pool_id -> list of callables
+
+    def subscribe(self, instance_pool_id, callback):
+        """Calls `callback(direction)` every time a resize of the pool settles."""
+        with self.lock:
+            self.listeners.setdefault(instance_pool_id, []).append(callback)
+
+    def unsubscribe(self, instance_pool_id, callback):
+        with self.lock:
+            callbacks = self.listeners.get(instance_pool_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def track(self, compute_management_client, instance_pool_id, compartment_id, previous_size, target_size,
+              work_request_id=None, work_request_client=None):
+        """
+        Follows a resize in a background thread. A newer resize of the same pool supersedes it.
+        """
+        generation = self._next_generation(instance_pool_id)
+        thread = threading.Thread(
+            target=self.wait_until_stable,
+            args=(compute_management_client, instance_pool_id, compartment_id, previous_size, target_size,
+                  work_request_id, work_request_client, generation),
+            name=f"resize-{instance_pool_id[-8:]}",
+            daemon=True,
+        )
+        thread.start()
+
+    def wait_until_stable(self, compute_management_client, instance_pool_id, compartment_id, previous_size,
+                          target_size, work_request_id=None, work_request_client=None, generation=None):
+        """
+        Blocks until the resize has settled, then records its latency and notifies listeners.
+
+        Returns:
+            float: Seconds the resize took, or None if it failed, timed out or was superseded.
+        """
+        if generation is None:
+            generation = self._next_generation(instance_pool_id)
+        direction = "provisioning" if target_size > previous_size else "termination"
+        started = self.clock()
+        delay = self.poll_interval
+
+        if work_request_id and work_request_client is not None:
+            while True:
+                status = self._work_request_status(work_request_client, work_request_id)
+                if status in WORK_REQUEST_DONE:
+                    break
+                if not self._wait(delay, started, instance_pool_id, generation):
+                    return None
+                delay = min(delay * 2, self.max_poll_interval)
+            if status != "SUCCEEDED":
+                logging.warning(f"Resize of pool {instance_pool_id} to {target_size} ended with status {status}.")
+                return None
+            delay = self.poll_interval
+
+        while not self._is_stable(compute_management_client, instance_pool_id, compartment_id, target_size):
+            if not self._wait(delay, started, instance_pool_id, generation):
+                return None
+            delay = min(delay * 2, self.max_poll_interval)
+
+        if not self._is_current(instance_pool_id, generation):
+            return None
+        elapsed = self.clock() - started
+        self.record(instance_pool_id, direction, elapsed)
+        self._notify(instance_pool_id, direction)
+        return elapsed
+
+    def record(self, instance_pool_id, direction, seconds):
+        """Adds one measured resize latency to the pool histogram of that direction."""
+        with self.lock:
+            histogram = self.histograms.setdefault((instance_pool_id, direction), LatencyHistogram())
+            histogram.observe(seconds)
+        logging.info(f"Pool {instance_pool_id} settled after {seconds:.0f} seconds of {direction}.")
+
+    def lead_seconds(self, instance_pool_id, percentile=90):
+        """
+        Returns the given percentile of the recent provisioning latencies of a pool,
+        or None before the first measurement.
+        """
+        with self.lock:
+            histogram = self.histograms.get((instance_pool_id, "provisioning"))
+            return histogram.percentile(percentile) if histogram else None
+
+    def snapshot(self, instance_pool_id):
+        """Returns the provisioning and termination histograms of a pool."""
+        with self.lock:
+            return {
+                direction: histogram.snapshot()
+                for (pool_id, direction), histogram in self.histograms.items()
+                if pool_id == instance_pool_id
+            }
+
+    def _next_generation(self, instance_pool_id):
+        with self.lock:
+            generation = self.generations.get(instance_pool_id, 0) + 1
+            self.generations[instance_pool_id] = generation
+            return generation
+
+    def _is_current(self, instance_pool_id, generation):
+        with self.lock:
+            return self.generations.get(instance_pool_id) == generation
+
+    def _wait(self, delay, started, instance_pool_id, generation):
+        """Sleeps before the next check; returns False once the resize timed out or was superseded."""
+        if self.clock() - started >= self.timeout:
+            logging.warning(f"Pool {instance_pool_id} did not settle within {self.timeout} seconds.")
+            return False
+        self.sleep(delay)
+        return self._is_current(instance_pool_id, generation)
+
+    def _work_request_status(self, work_request_client, work_request_id):
+        try:
+            return work_request_client.get_work_request(work_request_id).data.status
+        except Exception as e:
+            logging.warning(f"Failed to read work request {work_request_id}: {e}")
+            return None
+
+    def _is_stable(self, compute_management_client, instance_pool_id, compartment_id, target_size):
+        """A pool is stable once it is RUNNING with exactly `target_size` running instances."""
+        try:
+            pool = compute_management_client.get_instance_pool(instance_pool_id=instance_pool_id).data
+            if pool.lifecycle_state != "RUNNING":
+                return False
+            instances = oci.pagination.list_call_get_all_results(
+                compute_management_client.list_instance_pool_instances,
+                compartment_id=compartment_id,
+                instance_pool_id=instance_pool_id,
+            ).data
+        except Exception as e:
+            logging.warning(f"Failed to check the state of pool {instance_pool_id}: {e}")
+            return False
+
+        states = [(instance.state or "").lower() for instance in instances]
+        active = [state for state in states if state not in GONE_STATES]
+        return len(active) == target_size and all(state == "running" for state in active)
+
+    def _notify(self, instance_pool_id, direction):
+        with self.lock:
+            callbacks = list(self.listeners.get(instance_pool_id, []))
+        for callback in callbacks:
+            try:
+                callback(direction)
+            except Exception as e:
+                logging.error(f"Resize listener of pool {instance_pool_id} failed: {e}")
+
+
+resize_tracker = ResizeTracker()
@@ -1,15 +1,21 @@
 import logging
+import signal
 import time
 import os
 from collectors.prometheus_collector import PrometheusMetricsCollector
 from collectors.oci_collector import OCIMetricsCollector
-from user_config.config_manager import build_oci_config, load_yaml_config
+from user_config.config_manager import load_yaml_config
+from user_config.config_watcher import ConfigWatcher, diff_pools
 from scaling_logic.auto_scaler import evaluate_metrics
-from oracle_sdk_wrapper.oci_scaling import initialize_oci_client
-from instance_manager.instance_pool import get_instances_from_instance_pool
-from oci.monitoring import MonitoringClient
-from oci.core import ComputeManagementClient
+from scaling_logic.pool_state import DEFAULT_EVALUATION_INTERVAL, PoolScalingState
+from scaling_logic.adaptive_interval import build_adaptive_interval
+from oracle_sdk_wrapper.client_registry import get_region_clients, set_connection_pool_size
+from instance_manager.instance_pool import get_instances_from_instance_pool, pool_state_cache
+from instance_manager.resize_tracker import resize_tracker
 from scheduler.scheduler import Scheduler  # Importing Scheduler
+from supervisor.pool_supervisor import PoolSupervisor
+from triggers.webhook_server import TriggerServer
+from central_mgmt.client import CentralManagementClient
 import sys
 
 logging.basicConfig(
@@ -21,6 +27,10 @@ logging.basicConfig(
     ],
 )
 
+DEFAULT_MAX_WORKERS = 16  # Pool cycles allowed to run at the same time
+# Pool settings baked into the clients and collector; changing them reconnects the pool runtime
+STRUCTURAL_POOL_KEYS = ("region", "compartment_id", "monitoring_method", "prometheus_url", "batch_metrics")
+
 
 def get_collector(pool, compute_management_client, monitoring_client):
     """
@@ -45,6 +55,7 @@ def get_collector(pool, compute_management_client, monitoring_client):
             compute_management_client=compute_management_client,
             instance_pool_id=pool["instance_pool_id"],
             compartment_id=pool["compartment_id"],
+            batch_metrics=pool.get("batch_metrics", True),
         )
     elif monitoring_method == "oci":
         # Use ComputeManagementClient to fetch instance data
@@ -54,98 +65,195 @@ def get_collector(pool, compute_management_client, monitoring_client):
             instance_manager=get_instances_from_instance_pool,
             instance_pool_id=pool["instance_pool_id"],
             compartment_id=pool["compartment_id"],
+            batch_metrics=pool.get("batch_metrics", True),
         )
     else:
         raise ValueError(f"Unknown monitoring method: {monitoring_method}")
 
 
-def process_pool(pool):
-    """
-    Process a single pool for monitoring and scaling.
+class PoolRuntime:
+    def __init__(self, pool, central_client=None):
+        """
+        Holds the clients, collector and scheduler of a single pool.
 
-    Args:
-        pool (dict): Pool configuration details from the YAML file.
-    """
-    region = pool.get("region")
-    if not region:
-        logging.error(
-            f"Region not specified for pool {pool['instance_pool_id']}. Skipping."
-        )
-        return
+        Args:
+            pool (dict): Pool configuration details from the YAML file.
+            central_client (CentralManagementClient): Receives the metrics of every cycle, if configured.
+        """
+        self.pool = pool
+        self.central_client = central_client
+        self.instance_pool_id = pool["instance_pool_id"]
+        self.connect(pool)
 
-    # Build OCI clients for the pool
-    try:
-        oci_config = build_oci_config(region)
-        compute_management_client = ComputeManagementClient(
-            oci_config
+        # Define thresholds
+        self.thresholds = {
+            "cpu": pool["cpu_threshold"],
+            "ram": pool["ram_threshold"],
+        }
+
+        # Define scaling limits
+        self.scaling_limits = pool["scaling_limits"]
+        self.evaluation_interval = pool.get("evaluation_interval", DEFAULT_EVALUATION_INTERVAL)
+        self.state = PoolScalingState(pool)
+        self.adaptive_interval = build_adaptive_interval(pool, self.evaluation_interval)
+
+        # End cooldowns as soon as a resize has settled instead of waiting out the full window
+        self.release_cooldown_on_stable = (pool.get("cooldowns") or {}).get("release_on_stable", True)
+        if self.release_cooldown_on_stable:
+            resize_tracker.subscribe(self.instance_pool_id, self.state.cooldown.release)
+
+        # Initialize and start the Scheduler
+        self.scheduler = Scheduler(
+            compute_management_client=self.compute_management_client,
+            instance_pool_id=self.instance_pool_id,
+            max_instances=self.scaling_limits["max"],
+            schedules=pool.get("schedules", []),
+            scheduler_instances=pool.get("scheduler_max_instances", 0),
+            default_timezone=pool.get("schedule_timezone"),
+            pre_warm=pool.get("pre_warm"),
         )
-        monitoring_client = MonitoringClient(
-            oci_config
+        self.scheduler.start()
+        logging.info(f"Starting monitoring for pool: {self.instance_pool_id}")
+
+    def connect(self, pool):
+        """
+        Sets up the OCI clients and the metrics collector for the pool's region and monitoring settings.
+
+        Raises:
+            RuntimeError: If the region is missing or the collector cannot be created.
+        """
+        region = pool.get("region")
+        if not region:
+            raise RuntimeError(f"Region not specified for pool {self.instance_pool_id}.")
+
+        # Reuse the OCI clients shared by every pool of the region
+        region_clients = get_region_clients(region)
+
+        # Create the appropriate collector
+        try:
+            collector = get_collector(pool, region_clients.compute_management_client, region_clients.monitoring_client)
+        except ValueError as ve:
+            logging.error(ve)
+            raise RuntimeError(
+                f"Collector creation failed for pool {self.instance_pool_id}: {ve}"
+            )
+
+        self.compute_management_client = region_clients.compute_management_client
+        self.monitoring_client = region_clients.monitoring_client
+        self.collector = collector
+
+    def run_once(self):
+        """
+        Runs a single evaluate/scale cycle.
+
+        Returns:
+            int: Seconds to wait before the next cycle.
+        """
+        last_sample = self.state.window.last("timestamp")
+        scaling_direction = evaluate_metrics(
+            self.collector, self.thresholds, self.scaling_limits, self.scheduler.is_active, self.state
         )
-    except Exception as e:
-        logging.error(f"Failed to initialize OCI clients for region {region}: {e}")
-        raise RuntimeError(f"OCI client initialization failed for region {region}: {e}")
+        if self.central_client is not None and self.state.window.last("timestamp") != last_sample:
+            # Only queued here; the client sends in the background
+            self.central_client.send_metrics(
+                self.instance_pool_id,
+                self.state.window.last("cpu"),
+                self.state.window.last("ram"),
+                int(self.state.window.last("instances")),
+                scaling_event=scaling_direction is not None,
+                scaling_direction=scaling_direction,
+            )
 
-    # Create the appropriate collector
-    try:
-        collector = get_collector(pool, compute_management_client, monitoring_client)
-    except ValueError as ve:
-        logging.error(ve)
-        raise RuntimeError(
-            f"Collector creation failed for pool {pool['instance_pool_id']}: {ve}"
+        if self.adaptive_interval is None:
+            interval = self.evaluation_interval
+        else:
+            interval = self.adaptive_interval.next_interval(self.state.window, self.thresholds)
+        logging.info(f"Next evaluation of pool {self.instance_pool_id} in {interval} seconds.")
+        return interval
+
+    def update(self, pool):
+        """
+        Re-parameterizes the pool in place, keeping its samples, cooldowns and scheduler thread.
+
+        A change to a structural setting reconnects the clients and collector, but the
+        scheduler keeps the instances an active window added, so they are neither added
+        twice nor left behind when the window closes.
+
+        Returns:
+            bool: True, the runtime never needs to be rebuilt.
+
+        Raises:
+            RuntimeError: If the new structural settings cannot be applied.
+        """
+        if any(pool.get(key) != self.pool.get(key) for key in STRUCTURAL_POOL_KEYS):
+            self.connect(pool)
+            self.scheduler.set_compute_management_client(self.compute_management_client)
+            logging.info(f"Clients and collector of pool {self.instance_pool_id} reconnected.")
+
+        self.thresholds = {
+            "cpu": pool["cpu_threshold"],
+            "ram": pool["ram_threshold"],
+        }
+        self.scaling_limits = pool["scaling_limits"]
+        self.evaluation_interval = pool.get("evaluation_interval", DEFAULT_EVALUATION_INTERVAL)
+        self.state.update(pool)
+        self.adaptive_interval = build_adaptive_interval(pool, self.evaluation_interval)
+
+        release_cooldown_on_stable = (pool.get("cooldowns") or {}).get("release_on_stable", True)
+        if release_cooldown_on_stable != self.release_cooldown_on_stable:
+            if release_cooldown_on_stable:
+                resize_tracker.subscribe(self.instance_pool_id, self.state.cooldown.release)
+            else:
+                resize_tracker.unsubscribe(self.instance_pool_id, self.state.cooldown.release)
+            self.release_cooldown_on_stable = release_cooldown_on_stable
+
+        self.scheduler.update(
+            max_instances=self.scaling_limits["max"],
+            schedules=pool.get("schedules", []),
+            scheduler_instances=pool.get("scheduler_max_instances", 0),
+            default_timezone=pool.get("schedule_timezone"),
+            pre_warm=pool.get("pre_warm"),
         )
+        self.pool = pool
+        logging.info(f"Configuration of pool {self.instance_pool_id} updated in place.")
+        return True
+
+    def stop(self):
+        """Stops the scheduler gracefully when monitoring ends."""
+        logging.info(f"Terminating monitoring for pool: {self.instance_pool_id}")
+        if self.release_cooldown_on_stable:
+            resize_tracker.unsubscribe(self.instance_pool_id, self.state.cooldown.release)
+        self.scheduler.stop()
 
-    # Define thresholds
-    thresholds = {
-        "cpu": pool["cpu_threshold"],
-        "ram": pool["ram_threshold"],
-    }
-
-    # Define scaling limits
-    scaling_limits = pool["scaling_limits"]
-
-    # Initialize and start the Scheduler
-    max_instances = scaling_limits["max"]
-    schedules = pool["schedules"]  # List of schedule dictionaries
-    scheduler_instances = pool["scheduler_max_instances"]
-
-    scheduler = Scheduler(
-        compute_management_client=compute_management_client,
-        instance_pool_id=pool["instance_pool_id"],
-        max_instances=max_instances,
-        schedules=schedules,
-        scheduler_instances=scheduler_instances
+
+def apply_config_changes(supervisor, old_config, new_config):
+    """
+    Starts, stops or re-parameterizes only the pools that differ between two configurations.
+    """
+    added, removed, changed = diff_pools(old_config, new_config)
+    for pool in removed:
+        supervisor.remove_pool(pool["instance_pool_id"])
+    for pool in added:
+        supervisor.add_pool(pool)
+    for pool in changed:
+        supervisor.update_pool(pool)
+    logging.info(
+        f"Configuration applied: {len(added)} pools added, {len(removed)} removed, {len(changed)} changed."
     )
-    scheduler.start()
 
+    for key in ("max_workers", "triggers", "central_management"):
+        if old_config.get(key) != new_config.get(key):
+            logging.warning(f"Changes to '{key}' take effect after a restart.")
 
-    # function to determine whether the scheduler is active or not
-    def scheduler_active_callback():
-        return scheduler.is_active()
 
-    # Monitor and scale
-    try:
-        logging.info(f"Starting monitoring loop for pool: {pool['instance_pool_id']}")
-        while True:
-            try:
-                # Pass scaling_limits to evaluate_metrics
-                evaluate_metrics(collector, thresholds, scaling_limits, scheduler_active_callback)
-            except RuntimeError as e:
-                logging.error(f"Runtime error in evaluate_metrics: {e}")
-                raise  # Re-raise to stop further execution
-            time.sleep(300)  # Sleep for 5 minutes between checks
-    except KeyboardInterrupt:
-        logging.info(f"Terminating monitoring for pool: {pool['instance_pool_id']}")
-    except Exception as e:
-        logging.error(
-            f"Error in autoscaling loop for pool {pool['instance_pool_id']}: {e}"
-        )
-        raise RuntimeError(
-            f"Critical failure in autoscaling for pool {pool['instance_pool_id']}: {e}"
-        )
-    
-    finally:
-        scheduler.stop()  # Ensure the scheduler stops gracefully when monitoring ends
+def current_pool_sizes(supervisor):
+    """Returns the last known size of every supervised pool without calling OCI."""
+    sizes = {}
+    for pool_id in supervisor.status():
+        pool_details = pool_state_cache.peek(pool_id)
+        if pool_details is not None:
+            sizes[pool_id] = pool_details.size
+    return sizes
 
 
 def main():
@@ -162,16 +270,80 @@ def main():
         logging.error(f"Failed to load configuration file: {e}")
         raise RuntimeError(f"Configuration file load failed: {e}")
 
-    # Process each pool from the configuration
-    for pool in config["pools"]:
-        logging.debug(f"Starting processing for pool: {pool}")
+    logging.debug(f"Loaded pools from config: {config.get('pools')}")
+
+    # Optionally report to central management; the client is started once the pools run
+    central_client = None
+    central_config = config.get("central_management") or {}
+    if central_config.get("enabled", False):
+        central_client = CentralManagementClient(
+            central_api_url=central_config["api_url"],
+            api_key=central_config.get("api_key"),
+            local_config_path=config_path,
+        )
+
+    # Run every pool concurrently; a failing pool is restarted without touching the others
+    max_workers = config.get("max_workers", DEFAULT_MAX_WORKERS)
+    set_connection_pool_size(max_workers)
+    supervisor = PoolSupervisor(
+        runtime_factory=lambda pool: PoolRuntime(pool, central_client=central_client),
+        max_workers=max_workers,
+        default_interval=DEFAULT_EVALUATION_INTERVAL,
+    )
+    for pool in config.get("pools") or []:
+        supervisor.add_pool(pool)
+
+    supervisor.start()
+
+    def pool_status():
+        status = supervisor.status()
+        for pool_id, pool_status in status.items():
+            pool_status["resize_latency"] = resize_tracker.snapshot(pool_id)
+        return status
+
+    # Optionally let alerts trigger immediate evaluations; polling remains the safety net
+    trigger_server = None
+    triggers_config = config.get("triggers") or {}
+    if triggers_config.get("enabled", False):
         try:
-            process_pool(pool)
-        except RuntimeError as re:
-            logging.error(f"Error processing pool {pool['instance_pool_id']}: {re}")
-            continue  # Skip to the next pool
-        logging.debug(f"Loaded pools from config: {config.get('pools')}")
-        
+            trigger_server = TriggerServer(
+                trigger_callback=supervisor.trigger,
+                status_callback=pool_status,
+                host=triggers_config.get("host", "127.0.0.1"),
+                port=triggers_config.get("port", 9095),
+                token=triggers_config.get("token"),
+            )
+            trigger_server.start()
+        except ValueError as e:
+            logging.error(f"Trigger server not started: {e}")
+
+    # Reload config.yaml on change, on SIGHUP or when central management pushed a new version
+    config_watcher = ConfigWatcher(
+        config_path,
+        on_change=lambda old_config, new_config: apply_config_changes(supervisor, old_config, new_config),
+        initial_config=config,
+    )
+    config_watcher.start()
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: config_watcher.request_reload())
+
+    if central_client is not None:
+        central_client.on_config_applied = config_watcher.request_reload
+        central_client.instance_counts_provider = lambda: current_pool_sizes(supervisor)
+        central_client.start()
+
+    try:
+        supervisor.wait()
+    except KeyboardInterrupt:
+        logging.info("Received interrupt. Shutting down...")
+    finally:
+        config_watcher.stop()
+        if trigger_server is not None:
+            trigger_server.stop()
+        supervisor.stop()
+        # Last, so the samples of the final cycles are sent or spooled
+        if central_client is not None:
+            central_client.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import logging
+import threading
+from oci.core import ComputeManagementClient
+from oci.monitoring import MonitoringClient
+from oci.signer import Signer
+from oci.work_requests import WorkRequestClient
+from requests.adapters import HTTPAdapter
+from user_config.config_manager import build_oci_config
+
+DEFAULT_CONNECTION_POOL_SIZE = 16  # Keep-alive connections per client, should match the worker count
+
+_registry = {}
+_registry_lock = threading.Lock()
+_connection_pool_size = DEFAULT_CONNECTION_POOL_SIZE
+
+
+class RegionClients:
+    def __init__(self, region, connection_pool_size):
+        """
+        OCI config, signer and service clients shared by every pool of a region.
+
+        The private key is loaded once by the signer and each client keeps one
+        requests session, so pools in the same region reuse TLS connections.
+
+        Args:
+            region (str): Region name as used in config.yaml (mapped through REGION_MAP).
+            connection_pool_size (int): Maximum keep-alive connections per client.
+        """
+        self.region = region
+        self.config = build_oci_config(region)
+        self.signer = Signer(
+            tenancy=self.config["tenancy"],
+            user=self.config["user"],
+            fingerprint=self.config["fingerprint"],
+            private_key_file_location=self.config["key_file"],
+        )
+        self.compute_management_client = ComputeManagementClient(self.config, signer=self.signer)
+        self.monitoring_client = MonitoringClient(self.config, signer=self.signer)
+        self.work_request_client = WorkRequestClient(self.config, signer=self.signer)
+
+        for client in (self.compute_management_client, self.monitoring_client, self.work_request_client):
+            _mount_connection_pool(client, connection_pool_size)
+
+
+def set_connection_pool_size(size):
+    """Sets the keep-alive pool size used for clients created after this call."""
+    global _connection_pool_size
+    _connection_pool_size = size
+
+
+def get_region_clients(region):
+    """
+    Returns the shared clients of a region, creating them on first use.
+
+    Safe to call from any thread; concurrent first calls build the clients once.
+
+    Raises:
+        RuntimeError: If the OCI config or clients cannot be built for the region.
+    """
+    with _registry_lock:
+        clients = _registry.get(region)
+        if clients is None:
+            try:
+                clients = RegionClients(region, _connection_pool_size)
+            except Exception as e:
+                logging.error(f"Failed to initialize OCI clients for region {region}: {e}")
+                raise RuntimeError(f"OCI client initialization failed for region {region}: {e}")
+            _registry[region] = clients
+            logging.info(f"Initialized shared OCI clients for region {region}.")
+        return clients
+
+
+def get_work_request_client(compute_management_client):
+    """
+    Returns the WorkRequestClient of the region a shared ComputeManagementClient belongs to,
+    or None for clients that were not created by the registry.
+    """
+    with _registry_lock:
+        for clients in _registry.values():
+            if clients.compute_management_client is compute_management_client:
+                return clients.work_request_client
+    return None
+
+
+def _mount_connection_pool(client, size):
+    """Lets concurrent pool workers share keep-alive connections instead of discarding them."""
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+    client.base_client.session.mount("https://", adapter)
@@ -1,14 +1,18 @@
 import oci
 import logging
-import time
 from oci.core import ComputeManagementClient
-from instance_manager.instance_pool import get_instance_pool_details
-from user_config.config_manager import build_oci_config  # Ensure to use this
+from instance_manager.instance_pool import get_instance_pool_details, update_instance_pool_size
 
 def initialize_oci_client(config):
     return ComputeManagementClient(config)
 
 def scale_up(compute_management_client, instance_pool_id, compartment_id, max_limit):
+    """
+    Adds one instance to the pool unless it has reached max_limit.
+
+    Returns:
+        int: The new target size, or None if the pool was not resized.
+    """
     try:
         # Fetch current instance pool details
         pool_details = get_instance_pool_details(compute_management_client,instance_pool_id)
@@ -23,18 +27,20 @@ def scale_up(compute_management_client, instance_pool_id, compartment_id, max_li
         # Update the instance pool size (scale up)
         new_size = current_size + 1
         logging.info(f"Scaling up instance pool {instance_pool_id} to {new_size}")
-        compute_management_client.update_instance_pool(
-            instance_pool_id=instance_pool_id,
-            update_instance_pool_details=oci.core.models.UpdateInstancePoolDetails(size=new_size),
-        )
+        update_instance_pool_size(compute_management_client, instance_pool_id, new_size)
 
         logging.info(f"Scaled up: Target instance count updated to {new_size}")
-        logging.info("Waiting for 15 minutes after scaling up...")
-        time.sleep(900)
+        return new_size
     except Exception as e:
         logging.error(f"Failed to scale up: {str(e)}")
 
 def scale_down(compute_management_client, instance_pool_id, compartment_id, min_limit):
+    """
+    Removes one instance from the pool unless it has reached min_limit.
+
+    Returns:
+        int: The new target size, or None if the pool was not resized.
+    """
     try:
         # Fetch current instance pool details
         pool_details = get_instance_pool_details(compute_management_client, instance_pool_id=instance_pool_id)
@@ -49,14 +55,35 @@ def scale_down(compute_management_client, instance_pool_id, compartment_id, min_
         # Update the instance pool size (scale down)
         new_size = current_size - 1
         logging.info(f"Scaling down instance pool {instance_pool_id} to {new_size}")
-        compute_management_client.update_instance_pool(
-            instance_pool_id=instance_pool_id,
-            update_instance_pool_details=oci.core.models.UpdateInstancePoolDetails(size=new_size),
-        )
+        update_instance_pool_size(compute_management_client, instance_pool_id, new_size)
 
         logging.info(f"Scaled down: Target instance count updated to {new_size}")
-        logging.info("Waiting for 15 minutes after scaling down...")
-        time.sleep(900)
-
+        return new_size
     except Exception as e:
         logging.error(f"Failed to scale down: {str(e)}")
+
+
+def scale_to(compute_management_client, instance_pool_id, current_size, target_size):
+    """
+    Resizes the pool to target_size in a single update.
+
+    Args:
+        compute_management_client: OCI ComputeManagementClient instance.
+        instance_pool_id (str): OCID of the instance pool.
+        current_size (int): Size the decision was based on, used for logging.
+        target_size (int): New target size, already clamped to the scaling limits.
+
+    Returns:
+        int: The new target size, or None if the pool was not resized.
+    """
+    try:
+        direction = "up" if target_size > current_size else "down"
+        logging.info(
+            f"Scaling {direction} instance pool {instance_pool_id} from {current_size} to {target_size}"
+        )
+        update_instance_pool_size(compute_management_client, instance_pool_id, target_size)
+
+        logging.info(f"Scaled {direction}: Target instance count updated to {target_size}")
+        return target_size
+    except Exception as e:
+        logging.error(f"Failed to scale instance pool {instance_pool_id} to {target_size}: {str(e)}")
@@ -1,16 +1,93 @@
+import threading
 from prometheus_api_client import PrometheusConnect
 
+# Hostnames per batched query, keeps the query URL well below server limits
+BATCH_SIZE = 100
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+# Characters with a special meaning in a PromQL (RE2) regular expression
+_REGEX_SPECIAL_CHARS = set(".^$*+?()[]{}|\\")
+
+
+def get_prometheus_connection(prometheus_url):
+    """
+    Returns a long-lived PrometheusConnect for the given URL.
+
+    The connection keeps its HTTP session, so repeated queries reuse pooled
+    keep-alive connections instead of opening a new one per call.
+    """
+    with _connections_lock:
+        prom = _connections.get(prometheus_url)
+        if prom is None:
+            prom = PrometheusConnect(url=prometheus_url, disable_ssl=True)
+            _connections[prometheus_url] = prom
+        return prom
+
 
 def get_cpu_ram_metrics(instance_hostname, prometheus_url):
-    prom = PrometheusConnect(url=prometheus_url, disable_ssl=True)
+    prom = get_prometheus_connection(prometheus_url)
 
     # CPU utilization query for the specific instance
     cpu_query = f'100 - (avg by (instance) (rate(node_cpu_seconds_total{{mode="idle", instance="{instance_hostname}"}}[5m])) * 100)'
-    
+
     # RAM utilization query for the specific instance
     ram_query = f'(node_memory_Active_bytes{{instance="{instance_hostname}"}} / node_memory_MemTotal_bytes{{instance="{instance_hostname}"}}) * 100'
-    
+
     cpu_data = prom.custom_query(query=cpu_query)
     ram_data = prom.custom_query(query=ram_query)
-    
-    return cpu_data, ram_data
\ No newline at end of file
+
+    return cpu_data, ram_data
+
+
+def get_pool_cpu_ram_metrics(instance_hostnames, prometheus_url):
+    """
+    Fetches CPU and RAM utilization for many instances with one query per metric.
+
+    Args:
+        instance_hostnames (list): Values of the `instance` label to query.
+        prometheus_url (str): URL of the Prometheus server.
+
+    Returns:
+        Dict mapping hostname to (cpu_utilization, ram_utilization). Hostnames
+        without both series are left out.
+    """
+    prom = get_prometheus_connection(prometheus_url)
+    cpu_values = {}
+    ram_values = {}
+
+    for start in range(0, len(instance_hostnames), BATCH_SIZE):
+        selector = _instance_regex(instance_hostnames[start:start + BATCH_SIZE])
+
+        cpu_query = f'100 - (avg by (instance) (rate(node_cpu_seconds_total{{mode="idle", instance=~"{selector}"}}[5m])) * 100)'
+        ram_query = (
+            f'avg by (instance) ((node_memory_Active_bytes{{instance=~"{selector}"}} '
+            f'/ node_memory_MemTotal_bytes{{instance=~"{selector}"}}) * 100)'
+        )
+
+        cpu_values.update(_values_by_instance(prom.custom_query(query=cpu_query)))
+        ram_values.update(_values_by_instance(prom.custom_query(query=ram_query)))
+
+    return {
+        hostname: (cpu_values[hostname], ram_values[hostname])
+        for hostname in instance_hostnames
+        if hostname in cpu_values and hostname in ram_values
+    }
+
+
+def _instance_regex(instance_hostnames):
+    """Builds an escaped `h1|h2|...` alternation usable inside a PromQL string."""
+    escaped = []
+    for hostname in instance_hostnames:
+        # A regex escape needs a literal backslash, which is itself escaped in a PromQL string
+        escaped.append("".join(f"\\\\{c}" if c in _REGEX_SPECIAL_CHARS else c for c in hostname))
+    return "|".join(escaped)
+
+
+def _values_by_instance(result):
+    """Splits an instant-vector result into {instance: value}."""
+    return {
+        sample["metric"].get("instance"): float(sample["value"][1])
+        for sample in result
+    }
@@ -0,0 +1,96 @@
+import numpy as np
+
+DEFAULT_MIN_INTERVAL = 60  # Floor of the evaluation interval in seconds
+DEFAULT_MAX_INTERVAL = 900  # Ceiling of the evaluation interval in seconds
+DEFAULT_NEAR_MARGIN = 10  # Percentage points from a threshold considered "near"
+DEFAULT_VOLATILE_DELTA = 10  # Change between consecutive samples considered "fast"
+DEFAULT_FLAT_RANGE = 5  # Spread of recent samples considered "flat"
+DEFAULT_FLAT_SAMPLES = 6  # Samples that must stay flat before the interval grows
+
+
+class AdaptiveInterval:
+    def __init__(self, base_interval, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 near_margin=DEFAULT_NEAR_MARGIN, volatile_delta=DEFAULT_VOLATILE_DELTA,
+                 flat_range=DEFAULT_FLAT_RANGE, flat_samples=DEFAULT_FLAT_SAMPLES):
+        """
+        Chooses the delay until a pool's next evaluation from its recent samples.
+
+        The interval halves while utilization is near a threshold or moving fast,
+        grows by half once the pool has been flat for `flat_samples` samples, and
+        otherwise drifts back towards `base_interval`.
+
+        Args:
+            base_interval (int): Interval used for pools that are neither busy nor quiet.
+            min_interval (int): Shortest allowed interval.
+            max_interval (int): Longest allowed interval.
+            near_margin (float): Distance to a threshold, in percentage points, that counts as near.
+            volatile_delta (float): Change between consecutive samples that counts as fast.
+            flat_range (float): Max spread of the last `flat_samples` samples that counts as flat.
+            flat_samples (int): Number of samples inspected for flatness.
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.near_margin = near_margin
+        self.volatile_delta = volatile_delta
+        self.flat_range = flat_range
+        self.flat_samples = flat_samples
+        self.current = base_interval
+
+    def next_interval(self, window, thresholds):
+        """
+        Returns the seconds until the next evaluation.
+
+        Args:
+            window (MetricWindow): Recent samples of the pool.
+            thresholds (dict): Threshold values for CPU and RAM.
+        """
+        samples = window.arrays(self.flat_samples)
+        if samples["cpu"].size == 0:
+            return self.current
+
+        busy = False
+        for metric in ("cpu", "ram"):
+            values = samples[metric]
+            bounds = np.array([thresholds[metric]["min"], thresholds[metric]["max"]], dtype=float)
+            if np.abs(bounds - values[-1]).min() <= self.near_margin:
+                busy = True
+            if values.size > 1 and np.abs(np.diff(values[-3:])).max() >= self.volatile_delta:
+                busy = True
+
+        flat = samples["cpu"].size >= self.flat_samples and all(
+            np.ptp(samples[metric]) <= self.flat_range for metric in ("cpu", "ram")
+        )
+
+        if busy:
+            self.current = self.current / 2
+        elif flat:
+            self.current = self.current * 1.5
+        elif self.current < self.base_interval:
+            self.current = min(self.base_interval, self.current * 1.5)
+        else:
+            self.current = max(self.base_interval, self.current / 2)
+
+        self.current = int(min(self.max_interval, max(self.min_interval, self.current)))
+        return self.current
+
+
+def build_adaptive_interval(pool, base_interval):
+    """
+    Creates the AdaptiveInterval configured under `adaptive_interval` in the pool configuration.
+
+    Returns:
+        AdaptiveInterval, or None when the pool uses a fixed interval.
+    """
+    interval_config = pool.get("adaptive_interval") or {}
+    if not interval_config.get("enabled", False):
+        return None
+    return AdaptiveInterval(
+        base_interval=base_interval,
+        min_interval=interval_config.get("min", DEFAULT_MIN_INTERVAL),
+        max_interval=interval_config.get("max", DEFAULT_MAX_INTERVAL),
+        near_margin=interval_config.get("near_margin", DEFAULT_NEAR_MARGIN),
+        volatile_delta=interval_config.get("volatile_delta", DEFAULT_VOLATILE_DELTA),
+        flat_range=interval_config.get("flat_range", DEFAULT_FLAT_RANGE),
+        flat_samples=interval_config.get("flat_samples", DEFAULT_FLAT_SAMPLES),
+    )
@@ -1,8 +1,9 @@
 import logging
-from oracle_sdk_wrapper.oci_scaling import scale_up, scale_down
-import sys
+from oracle_sdk_wrapper.oci_scaling import scale_up, scale_down, scale_to
+from scaling_logic.policies import ThresholdPolicy
+from instance_manager.instance_pool import get_instance_pool_details
 
-def evaluate_metrics(collector, thresholds, scaling_limits, scheduler_active_callback):
+def evaluate_metrics(collector, thresholds, scaling_limits, scheduler_active_callback, state=None):
     """
     Evaluate metrics and scale the instance pool as needed.
 
@@ -11,7 +12,13 @@ def evaluate_metrics(collector, thresholds, scaling_limits, scheduler_active_cal
         thresholds (dict): Threshold values for CPU and RAM.
         scaling_limits (dict): Limits for scaling (min and max instance count).
         scheduler_active_callback (Callable): Function to check if the scheduler is active.
+        state (PoolScalingState): Per-pool state kept between cycles (cooldowns, scaling policy, metric window).
+
+    Returns:
+        str: "UP" or "DOWN" if the pool was resized, otherwise None.
     """
+    cooldown = state.cooldown if state is not None else None
+    policy = state.policy if state is not None else ThresholdPolicy(thresholds)
     try:
         avg_cpu, avg_ram = collector.get_metrics()
 
@@ -35,10 +42,20 @@ def evaluate_metrics(collector, thresholds, scaling_limits, scheduler_active_cal
             f"Scaling Limits - Min: {scaling_limits['min']}, Max: {scaling_limits['max']}"
         )
 
-        # Fetch current instance pool size
-        current_size = collector.compute_management_client.get_instance_pool(
-            instance_pool_id=collector.instance_pool_id
-        ).data.size
+        # Fetch current instance pool size (served from the pool state cache when fresh)
+        pool_details = get_instance_pool_details(collector.compute_management_client, collector.instance_pool_id)
+        if not pool_details:
+            raise RuntimeError(f"Instance pool {collector.instance_pool_id} details unavailable.")
+        current_size = pool_details.size
+
+        if state is not None:
+            state.record_sample(avg_cpu, avg_ram, current_size)
+            # Decide on the smoothed view of the recent samples rather than a single snapshot
+            avg_cpu, avg_ram = state.smoothed_metrics()
+            if state.smoothing_method != "last":
+                logging.info(
+                    f"Smoothed ({state.smoothing_method}) CPU: {avg_cpu:.2f}%, RAM: {avg_ram:.2f}%"
+                )
 
         # Ensure instance count is within bounds
         if current_size < scaling_limits["min"]:
@@ -46,52 +63,104 @@ def evaluate_metrics(collector, thresholds, scaling_limits, scheduler_active_cal
                 f"Current size ({current_size}) is below the minimum limit ({scaling_limits['min']}). "
                 "Prioritizing scaling up."
             )
-            scale_up(
+            if scale_up(
                 collector.compute_management_client,
                 collector.instance_pool_id,
                 collector.compartment_id,
                 scaling_limits["max"],
-            )
-            return
+            ) is None:
+                return
+            if cooldown:
+                cooldown.record_scale_out()
+            return "UP"
 
         if current_size > scaling_limits["max"]:
             logging.warning(
                 f"Current size ({current_size}) exceeds the maximum limit ({scaling_limits['max']}). "
                 "Prioritizing scaling down."
             )
-            scale_down(
+            if scale_down(
                 collector.compute_management_client,
                 collector.instance_pool_id,
                 collector.compartment_id,
                 scaling_limits["min"],
+            ) is None:
+                return
+            if cooldown:
+                cooldown.record_scale_in()
+            return "DOWN"
+
+        # Let the pool's scaling policy decide the target size only if instance count is within limits
+        desired_size = policy.desired_size(current_size, avg_cpu, avg_ram, scaling_limits)
+
+        # Require the policy's decision to hold for several consecutive samples
+        if (desired_size != current_size and state is not None
+                and not state.breach_confirmed(current_size, desired_size, scaling_limits)):
+            logging.info(
+                f"Scaling to {desired_size} not yet confirmed by {state.breach_samples} consecutive samples. "
+                "Keeping current size."
             )
-            return
+            desired_size = current_size
 
-        # Check CPU and RAM thresholds only if instance count is within limits
-        if avg_cpu > thresholds["cpu"]["max"] or avg_ram > thresholds["ram"]["max"]:
-            logging.info("CPU or RAM exceeds thresholds, checking for scaling up...")
-            scale_up(
+        # Scale out ahead of forecast peaks; the forecast never scales in on its own
+        if state is not None and state.predictor is not None:
+            predicted_size = state.predictor.desired_size(current_size, state.history_arrays(), scaling_limits)
+            if predicted_size > desired_size:
+                logging.info(
+                    f"Forecast peak within {state.predictor.lead_time():.0f} seconds requires {predicted_size} instances."
+                )
+                desired_size = predicted_size
+
+        if desired_size > current_size:
+            logging.info(
+                f"Scaling policy '{policy.name}' requests scaling up from {current_size} to {desired_size} instances..."
+            )
+            if cooldown and not cooldown.can_scale_out():
+                logging.info(
+                    f"Scale-out cooldown active for another {cooldown.scale_out_remaining():.0f} seconds. "
+                    "Skipping scaling up."
+                )
+                return
+            if scale_to(
                 collector.compute_management_client,
                 collector.instance_pool_id,
-                collector.compartment_id,
-                scaling_limits["max"],
+                current_size,
+                desired_size,
+            ) is None:
+                return
+            if cooldown:
+                cooldown.record_scale_out()
+            return "UP"
+        elif desired_size < current_size:
+            logging.info(
+                f"Scaling policy '{policy.name}' requests scaling down from {current_size} to {desired_size} instances..."
             )
-        elif avg_cpu < thresholds["cpu"]["min"] or avg_ram < thresholds["ram"]["min"]:
-            logging.info("CPU or RAM is below thresholds, checking for scaling down...")
             # Check if the scheduler is active before considering scaling down
             if scheduler_active_callback():
                 logging.info("Scheduler is active. Temporarily preventing scaling down.")
                 return
-            scale_down(
+            if cooldown and not cooldown.can_scale_in():
+                logging.info(
+                    f"Scale-in cooldown active for another {cooldown.scale_in_remaining():.0f} seconds. "
+                    "Skipping scaling down."
+                )
+                return
+            if scale_to(
                 collector.compute_management_client,
                 collector.instance_pool_id,
-                collector.compartment_id,
-                scaling_limits["min"],
-            )
+                current_size,
+                desired_size,
+            ) is None:
+                return
+            if cooldown:
+                cooldown.record_scale_in()
+            return "DOWN"
         else:
             logging.info("No scaling required: Metrics are within thresholds.")
     except Exception as e:
         logging.error(
             f"Error during metrics evaluation for pool {collector.instance_pool_id}: {e}"
         )
-        sys.exit(1)
+        raise RuntimeError(
+            f"Metrics evaluation failed for pool {collector.instance_pool_id}: {e}"
+        )
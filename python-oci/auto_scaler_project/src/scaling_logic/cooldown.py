@@ -0,0 +1,103 @@
+import threading
+import time
+
+DEFAULT_SCALE_OUT_COOLDOWN = 300  # Seconds after a scale-out before the next scale-out
+DEFAULT_SCALE_IN_COOLDOWN = 900  # Seconds after any resize before the next scale-in
+DEFAULT_STABILIZATION = 60  # Seconds a settled resize is observed before its cooldown is released
+
+
+class CooldownTracker:
+    def __init__(self, scale_out_cooldown=DEFAULT_SCALE_OUT_COOLDOWN, scale_in_cooldown=DEFAULT_SCALE_IN_COOLDOWN,
+                 stabilization=DEFAULT_STABILIZATION, clock=time.monotonic):
+        """
+        Tracks the scale-out and scale-in cooldown windows of one pool.
+
+        A scale-out only waits for the previous scale-out, so a new spike can be
+        handled while a scale-in cooldown is still running. A scale-in waits for
+        the scale-in cooldown after any resize in either direction.
+
+        Args:
+            scale_out_cooldown (int): Seconds to wait after a scale-out before scaling out again.
+            scale_in_cooldown (int): Seconds to wait after any resize before scaling in.
+            stabilization (int): Seconds after a resize settled before `release()` lets the
+                same direction act again.
+            clock (Callable): Monotonic clock, replaceable in tests.
+        """
+        self.scale_out_cooldown = scale_out_cooldown
+        self.scale_in_cooldown = scale_in_cooldown
+        self.stabilization = stabilization
+        self.clock = clock
+        self.last_scale_out = None
+        self.last_scale_in = None
+        self.scale_out_settled = None  # When the last scale-out settled, if it did
+        self.scale_in_settled = None
+        self.lock = threading.Lock()
+
+    def record_scale_out(self):
+        """Starts the cooldown windows after a scale-out."""
+        with self.lock:
+            self.last_scale_out = self.clock()
+
+    def record_scale_in(self):
+        """Starts the scale-in cooldown window after a scale-in."""
+        with self.lock:
+            self.last_scale_in = self.clock()
+
+    def release(self, direction):
+        """
+        Shortens the cooldown of the direction that just settled to `stabilization` seconds.
+
+        Only the settled direction is released: after a scale-out settles, further
+        scale-outs are allowed once the pool has been stable for `stabilization`
+        seconds, while the scale-in cooldown started by that scale-out keeps running,
+        so the pool cannot flap straight back in.
+
+        Args:
+            direction (str): "provisioning" for a settled scale-out, "termination" for a
+                settled scale-in, as passed by the resize tracker.
+        """
+        with self.lock:
+            if direction == "provisioning":
+                self.scale_out_settled = self.clock()
+            elif direction == "termination":
+                self.scale_in_settled = self.clock()
+            else:
+                raise ValueError(f"Unknown resize direction: {direction}")
+
+    def scale_out_remaining(self):
+        """Returns the seconds left before a scale-out is allowed."""
+        with self.lock:
+            remaining = self._remaining(self.scale_out_cooldown, self.last_scale_out)
+            if self._settled(self.scale_out_settled, self.last_scale_out):
+                remaining = min(remaining, self._remaining(self.stabilization, self.scale_out_settled))
+            return remaining
+
+    def scale_in_remaining(self):
+        """Returns the seconds left before a scale-in is allowed."""
+        with self.lock:
+            last_resize = max(
+                (t for t in (self.last_scale_out, self.last_scale_in) if t is not None),
+                default=None,
+            )
+            remaining = self._remaining(self.scale_in_cooldown, last_resize)
+            # Only a settled scale-in shortens the window; after a scale-out it runs in full
+            if last_resize is not None and last_resize == self.last_scale_in \
+                    and self._settled(self.scale_in_settled, self.last_scale_in):
+                remaining = min(remaining, self._remaining(self.stabilization, self.scale_in_settled))
+            return remaining
+
+    def can_scale_out(self):
+        return self.scale_out_remaining() == 0
+
+    def can_scale_in(self):
+        return self.scale_in_remaining() == 0
+
+    @staticmethod
+    def _settled(settled_at, last_action):
+        """True if the resize started at `last_action` has settled since."""
+        return settled_at is not None and last_action is not None and settled_at >= last_action
+
+    def _remaining(self, cooldown, last_action):
+        if last_action is None:
+            return 0
+        return max(0, cooldown - (self.clock() - last_action))
@@ -0,0 +1,71 @@
+import threading
+import numpy as np
+
+
+class MetricWindow:
+    FIELDS = ("timestamp", "cpu", "ram", "instances")
+
+    def __init__(self, capacity):
+        """
+        Fixed-size ring of per-pool samples backed by a single NumPy array.
+
+        Memory is allocated once, so it stays constant however long the agent runs;
+        the oldest sample is overwritten once `capacity` samples are stored.
+
+        Args:
+            capacity (int): Maximum number of samples kept.
+        """
+        self.capacity = capacity
+        self.data = np.zeros((len(self.FIELDS), capacity), dtype=float)
+        self.count = 0
+        self.next = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, cpu, ram, instances):
+        """Stores one sample, overwriting the oldest when the window is full."""
+        with self.lock:
+            self.data[:, self.next] = (timestamp, cpu, ram, instances)
+            self.next = (self.next + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def values(self, field, n=None):
+        """
+        Returns the last `n` values of a field (all stored values by default), oldest first.
+        """
+        with self.lock:
+            n = self.count if n is None else min(n, self.count)
+            indexes = (self.next - n + np.arange(n)) % self.capacity
+            return self.data[self.FIELDS.index(field), indexes]
+
+    def arrays(self, n=None):
+        """Returns the last `n` samples as arrays keyed by field name, oldest first."""
+        return {field: self.values(field, n) for field in self.FIELDS}
+
+    def last(self, field):
+        """Returns the most recent value of a field, or None if the window is empty."""
+        values = self.values(field, 1)
+        return float(values[0]) if values.size else None
+
+    def ewma(self, field, alpha, n=None):
+        """
+        Returns the exponentially weighted moving average of a field.
+
+        Args:
+            alpha (float): Weight of the newest sample, between 0 and 1.
+            n (int): Number of recent samples included, all stored samples by default.
+        """
+        values = self.values(field, n)
+        if values.size == 0:
+            return None
+        weights = (1 - alpha) ** np.arange(values.size - 1, -1, -1)
+        return float(np.dot(weights, values) / weights.sum())
+
+    def percentile(self, field, q, n=None):
+        """Returns the q-th percentile of the last `n` values of a field."""
+        values = self.values(field, n)
+        if values.size == 0:
+            return None
+        return float(np.percentile(values, q))
@@ -0,0 +1,130 @@
+import logging
+import math
+
+DEFAULT_SCALE_IN_TOLERANCE = 0.1  # Target tracking only scales in when utilization is 10% below target
+
+
+class ThresholdPolicy:
+    name = "threshold"
+
+    def __init__(self, thresholds):
+        """
+        Moves the pool by one instance when CPU or RAM leaves its min/max band.
+
+        Args:
+            thresholds (dict): Threshold values for CPU and RAM.
+        """
+        self.thresholds = thresholds
+
+    def desired_size(self, current_size, avg_cpu, avg_ram, scaling_limits):
+        if avg_cpu > self.thresholds["cpu"]["max"] or avg_ram > self.thresholds["ram"]["max"]:
+            desired = current_size + 1
+        elif avg_cpu < self.thresholds["cpu"]["min"] or avg_ram < self.thresholds["ram"]["min"]:
+            desired = current_size - 1
+        else:
+            desired = current_size
+        return clamp_size(desired, scaling_limits)
+
+
+class TargetTrackingPolicy:
+    name = "target_tracking"
+
+    def __init__(self, targets, scale_in_tolerance=DEFAULT_SCALE_IN_TOLERANCE):
+        """
+        Sizes the pool so that utilization returns to its target.
+
+        The desired size is `ceil(current_size * observed / target)` for the metric
+        furthest above its target, so a large spike is absorbed in a single step.
+
+        Args:
+            targets (dict): Target utilization per metric, e.g. {"cpu": 60, "ram": 70}.
+            scale_in_tolerance (float): Relative margin below target required before
+                scaling in, which keeps the pool from flapping around the target.
+        """
+        if not targets:
+            raise ValueError("Target tracking policy requires at least one target (cpu or ram).")
+        self.targets = targets
+        self.scale_in_tolerance = scale_in_tolerance
+
+    def desired_size(self, current_size, avg_cpu, avg_ram, scaling_limits):
+        observed = {"cpu": avg_cpu, "ram": avg_ram}
+        ratio = max(observed[metric] / target for metric, target in self.targets.items())
+        desired = math.ceil(current_size * ratio)
+
+        if desired < current_size and ratio > 1 - self.scale_in_tolerance:
+            desired = current_size
+        return clamp_size(desired, scaling_limits)
+
+
+class StepScalingPolicy:
+    name = "step"
+
+    def __init__(self, steps):
+        """
+        Changes the pool size by the amount of the largest matching step.
+
+        Each step either has `above` and a positive `change` (scale out) or `below`
+        and a negative `change` (scale in). `metric` limits a step to "cpu" or "ram";
+        without it the step matches either metric. Scale-out steps take precedence.
+
+        Args:
+            steps (list): Step definitions, e.g.
+                [{"above": 75, "change": 1}, {"above": 90, "change": 3}, {"below": 30, "change": -1}].
+        """
+        if not steps:
+            raise ValueError("Step scaling policy requires at least one step.")
+        self.scale_out_steps = [step for step in steps if "above" in step]
+        self.scale_in_steps = [step for step in steps if "below" in step]
+
+    def desired_size(self, current_size, avg_cpu, avg_ram, scaling_limits):
+        observed = {"cpu": avg_cpu, "ram": avg_ram}
+
+        change = max(
+            (step["change"] for step in self.scale_out_steps
+             if any(observed[m] > step["above"] for m in _step_metrics(step))),
+            default=0,
+        )
+        if change == 0:
+            change = min(
+                (step["change"] for step in self.scale_in_steps
+                 if any(observed[m] < step["below"] for m in _step_metrics(step))),
+                default=0,
+            )
+        return clamp_size(current_size + change, scaling_limits)
+
+
+def build_policy(pool):
+    """
+    Creates the scaling policy selected by `scaling_policy.type` in the pool configuration.
+
+    Args:
+        pool (dict): Pool configuration details from the YAML file.
+
+    Returns:
+        A policy object exposing `desired_size(current_size, avg_cpu, avg_ram, scaling_limits)`.
+    """
+    policy_config = pool.get("scaling_policy") or {}
+    policy_type = policy_config.get("type", ThresholdPolicy.name)
+
+    if policy_type == ThresholdPolicy.name:
+        return ThresholdPolicy({"cpu": pool["cpu_threshold"], "ram": pool["ram_threshold"]})
+    if policy_type == TargetTrackingPolicy.name:
+        return TargetTrackingPolicy(
+            targets=policy_config.get("targets"),
+            scale_in_tolerance=policy_config.get("scale_in_tolerance", DEFAULT_SCALE_IN_TOLERANCE),
+        )
+    if policy_type == StepScalingPolicy.name:
+        return StepScalingPolicy(policy_config.get("steps"))
+
+    logging.error(f"Unknown scaling policy: {policy_type}")
+    raise ValueError(f"Unknown scaling policy: {policy_type}")
+
+
+def clamp_size(size, scaling_limits):
+    """Keeps a pool size within the configured min/max limits."""
+    return max(scaling_limits["min"], min(scaling_limits["max"], size))
+
+
+def _step_metrics(step):
+    metric = step.get("metric")
+    return (metric,) if metric else ("cpu", "ram")
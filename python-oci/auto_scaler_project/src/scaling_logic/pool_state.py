@@ -0,0 +1,129 @@
+import logging
+import math
+import time
+from scaling_logic.adaptive_interval import DEFAULT_MIN_INTERVAL
+from scaling_logic.cooldown import CooldownTracker, DEFAULT_SCALE_IN_COOLDOWN, DEFAULT_SCALE_OUT_COOLDOWN, DEFAULT_STABILIZATION
+from scaling_logic.metric_window import MetricWindow
+from scaling_logic.policies import build_policy
+from scaling_logic.predictive import build_predictive_scaler
+
+DEFAULT_EVALUATION_INTERVAL = 300  # Seconds between evaluation cycles of a pool
+DEFAULT_HISTORY_SAMPLES = 288  # One day of samples at the default 5 minute interval
+SMOOTHING_METHODS = ("last", "ewma", "percentile")
+
+
+def shortest_interval(pool):
+    """
+    Returns the shortest number of seconds between two scheduled evaluation cycles of a pool.
+
+    Args:
+        pool (dict): Pool configuration details from the YAML file.
+    """
+    interval = pool.get("evaluation_interval", DEFAULT_EVALUATION_INTERVAL)
+    adaptive_config = pool.get("adaptive_interval") or {}
+    if adaptive_config.get("enabled", False):
+        interval = min(interval, adaptive_config.get("min", DEFAULT_MIN_INTERVAL))
+    return max(1, interval)
+
+
+class PoolScalingState:
+    def __init__(self, pool):
+        """
+        Scaling state of a single pool that must survive between evaluation cycles.
+
+        Args:
+            pool (dict): Pool configuration details from the YAML file.
+        """
+        self.cooldown = None
+        self.window = None
+        self.update(pool)
+
+    def update(self, pool):
+        """
+        Applies a changed pool configuration while keeping the recorded samples
+        and the running cooldown windows.
+
+        Args:
+            pool (dict): Pool configuration details from the YAML file.
+        """
+        cooldowns = pool.get("cooldowns") or {}
+        scale_out_cooldown = cooldowns.get("scale_out", DEFAULT_SCALE_OUT_COOLDOWN)
+        scale_in_cooldown = cooldowns.get("scale_in", DEFAULT_SCALE_IN_COOLDOWN)
+        stabilization = cooldowns.get("stabilization", DEFAULT_STABILIZATION)
+        if self.cooldown is None:
+            self.cooldown = CooldownTracker(scale_out_cooldown=scale_out_cooldown, scale_in_cooldown=scale_in_cooldown,
+                                            stabilization=stabilization)
+        else:
+            self.cooldown.scale_out_cooldown = scale_out_cooldown
+            self.cooldown.scale_in_cooldown = scale_in_cooldown
+            self.cooldown.stabilization = stabilization
+        self.policy = build_policy(pool)
+        self.predictor = build_predictive_scaler(pool)
+
+        smoothing = pool.get("smoothing") or {}
+        smoothing_method = smoothing.get("method", "last")
+        if smoothing_method not in SMOOTHING_METHODS:
+            logging.error(f"Unknown smoothing method: {smoothing_method}")
+            raise ValueError(f"Unknown smoothing method: {smoothing_method}")
+        self.smoothing_method = smoothing_method
+        self.smoothing_alpha = smoothing.get("alpha", 0.3)
+        self.smoothing_percentile = smoothing.get("percentile", 90)
+        self.smoothing_samples = smoothing.get("samples", 6)
+        self.breach_samples = max(1, smoothing.get("breach_samples", 1))
+
+        history_samples = DEFAULT_HISTORY_SAMPLES
+        if self.predictor is not None:
+            # Enough samples to span the fitted window even if every cycle ran at the shortest
+            # interval, doubled so triggered cycles in between do not push out the oldest season
+            history_samples = math.ceil(2 * self.predictor.history_seconds() / shortest_interval(pool))
+        capacity = max(history_samples, self.smoothing_samples, self.breach_samples)
+        if self.window is None or self.window.capacity != capacity:
+            window = MetricWindow(capacity)
+            if self.window is not None:
+                # Carry the most recent samples over into the resized window
+                samples = self.window.arrays(capacity)
+                for sample in zip(*(samples[field] for field in MetricWindow.FIELDS)):
+                    window.append(*sample)
+            self.window = window
+
+    def record_sample(self, avg_cpu, avg_ram, instance_count):
+        """Appends the metrics of one evaluation cycle to the pool window."""
+        self.window.append(time.time(), avg_cpu, avg_ram, instance_count)
+
+    def history_arrays(self):
+        """Returns the pool history as arrays keyed by timestamp, cpu, ram and instances."""
+        return self.window.arrays()
+
+    def smoothed_metrics(self):
+        """
+        Returns (cpu, ram) after applying the configured smoothing to the recent samples.
+        """
+        if self.smoothing_method == "ewma":
+            return (
+                self.window.ewma("cpu", self.smoothing_alpha, self.smoothing_samples),
+                self.window.ewma("ram", self.smoothing_alpha, self.smoothing_samples),
+            )
+        if self.smoothing_method == "percentile":
+            return (
+                self.window.percentile("cpu", self.smoothing_percentile, self.smoothing_samples),
+                self.window.percentile("ram", self.smoothing_percentile, self.smoothing_samples),
+            )
+        return self.window.last("cpu"), self.window.last("ram")
+
+    def breach_confirmed(self, current_size, desired_size, scaling_limits):
+        """
+        Checks that the policy asked for the same direction on each of the last
+        `breach_samples` raw samples, so a single noisy sample cannot resize the pool.
+        """
+        if self.breach_samples <= 1:
+            return True
+        samples = self.window.arrays(self.breach_samples)
+        if samples["cpu"].size < self.breach_samples:
+            return False
+
+        direction = 1 if desired_size > current_size else -1
+        for cpu, ram in zip(samples["cpu"], samples["ram"]):
+            sample_size = self.policy.desired_size(current_size, cpu, ram, scaling_limits)
+            if (sample_size - current_size) * direction <= 0:
+                return False
+        return True
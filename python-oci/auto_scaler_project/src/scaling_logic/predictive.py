@@ -0,0 +1,211 @@
+import logging
+import math
+import numpy as np
+from instance_manager.resize_tracker import resize_tracker
+
+DEFAULT_SEASON_SECONDS = 86400  # Daily load pattern
+DEFAULT_SAMPLE_SECONDS = 300  # Resolution the history is resampled to before fitting
+DEFAULT_SEASONS = 3  # Number of past seasons averaged into the seasonal profile
+DEFAULT_LEAD_SECONDS = 600  # How far ahead of a forecast peak capacity must be ready, until resizes are measured
+DEFAULT_LEAD_PERCENTILE = 90  # Percentile of measured provisioning latencies used as lead time
+
+
+def seasonal_forecast(values, season_length, horizon, seasons=DEFAULT_SEASONS):
+    """
+    Forecasts a regularly sampled series with a seasonal-naive plus linear trend model.
+
+    The last `seasons` full seasons are stacked into a matrix. Their column means
+    give the seasonal profile and the slope of their row means gives the trend, so
+    fitting is a handful of vectorized NumPy operations with no iterative solver.
+
+    Args:
+        values (array-like): Regularly sampled history, oldest first.
+        season_length (int): Number of samples in one season.
+        horizon (int): Number of samples to forecast.
+        seasons (int): Maximum number of past seasons used for the fit.
+
+    Returns:
+        numpy.ndarray of length `horizon`, or None if less than one full season is available.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.size
+    k = min(seasons, n // season_length)
+    if k < 1 or horizon < 1:
+        return None
+
+    recent = values[n - k * season_length:].reshape(k, season_length)
+    profile = recent.mean(axis=0)
+
+    slope = 0.0
+    if k > 1:
+        # Change of the season means per season, expressed per sample
+        slope = np.polyfit(np.arange(k), recent.mean(axis=1), 1)[0] / season_length
+
+    # Absolute sample indexes to forecast and their phase within the season
+    t = np.arange(n, n + horizon)
+    phase = (t - (n - k * season_length)) % season_length
+    # The profile value of a phase is centred on the middle season of the fitted window
+    profile_time = n - k * season_length + phase + (k - 1) * season_length / 2
+    return profile[phase] + slope * (t - profile_time)
+
+
+def resample(timestamps, values, sample_seconds):
+    """
+    Resamples an irregular series onto a regular grid ending at its last timestamp.
+
+    Args:
+        timestamps (array-like): Sample times in seconds, ascending.
+        values (array-like): Sample values.
+        sample_seconds (int): Spacing of the regular grid.
+
+    Returns:
+        numpy.ndarray of regularly spaced values, oldest first.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if timestamps.size < 2:
+        return values
+    grid = np.arange(timestamps[-1], timestamps[0] - 1e-9, -sample_seconds)[::-1]
+    return np.interp(grid, timestamps, values)
+
+
+def backtest(values, season_length, horizon, seasons=DEFAULT_SEASONS):
+    """
+    Replays a recorded series and measures the forecast error offline.
+
+    Every origin with at least one full season of history forecasts the next
+    `horizon` samples, which are compared against the recorded values.
+
+    Args:
+        values (array-like): Recorded, regularly sampled series.
+        season_length (int): Number of samples in one season.
+        horizon (int): Number of samples forecast from each origin.
+        seasons (int): Maximum number of past seasons used for each fit.
+
+    Returns:
+        Dict with the mean absolute error (`mae`) and the error on the forecast
+        peak of each window (`peak_mae`), or None if the series is too short.
+    """
+    values = np.asarray(values, dtype=float)
+    origins = range(season_length, values.size - horizon + 1)
+    if not origins:
+        return None
+
+    forecasts = np.array([seasonal_forecast(values[:o], season_length, horizon, seasons) for o in origins])
+    actuals = np.lib.stride_tricks.sliding_window_view(values[season_length:], horizon)[:len(origins)]
+    return {
+        "mae": float(np.abs(forecasts - actuals).mean()),
+        "peak_mae": float(np.abs(forecasts.max(axis=1) - actuals.max(axis=1)).mean()),
+    }
+
+
+class PredictiveScaler:
+    name = "predictive"
+
+    def __init__(self, targets, lead_seconds=DEFAULT_LEAD_SECONDS, season_seconds=DEFAULT_SEASON_SECONDS,
+                 sample_seconds=DEFAULT_SAMPLE_SECONDS, seasons=DEFAULT_SEASONS, instance_pool_id=None,
+                 lead_percentile=DEFAULT_LEAD_PERCENTILE):
+        """
+        Scales out ahead of forecast utilization peaks.
+
+        The forecast window is the provisioning latency of the pool as measured by the
+        resize tracker, so new instances are running when the peak arrives.
+
+        Args:
+            targets (dict): Target utilization per metric, e.g. {"cpu": 60, "ram": 70}.
+            lead_seconds (int): Forecast window until the first resize of the pool has been measured.
+            season_seconds (int): Length of the load pattern, one day by default.
+            sample_seconds (int): Resolution the history is resampled to before fitting.
+            seasons (int): Number of past seasons averaged into the forecast.
+            instance_pool_id (str): Pool whose measured provisioning latencies set the window.
+            lead_percentile (int): Percentile of the measured latencies used as the window.
+        """
+        if not targets:
+            raise ValueError("Predictive scaling requires at least one target (cpu or ram).")
+        self.targets = targets
+        self.lead_seconds = lead_seconds
+        self.sample_seconds = sample_seconds
+        self.season_length = max(1, int(season_seconds // sample_seconds))
+        self.seasons = seasons
+        self.instance_pool_id = instance_pool_id
+        self.lead_percentile = lead_percentile
+        self.warming_up = False
+
+    def lead_time(self):
+        """Returns the forecast window: the measured provisioning latency, or `lead_seconds` before any."""
+        if self.instance_pool_id is not None:
+            seconds = resize_tracker.lead_seconds(self.instance_pool_id, self.lead_percentile)
+            if seconds is not None:
+                return seconds
+        return self.lead_seconds
+
+    def history_seconds(self):
+        """Returns how much history the forecaster needs."""
+        return self.seasons * self.season_length * self.sample_seconds
+
+    def forecast_peak(self, timestamps, values, lead_seconds=None):
+        """
+        Returns the highest forecast value within the lead time, or None without enough history.
+        """
+        if lead_seconds is None:
+            lead_seconds = self.lead_time()
+        series = resample(timestamps, values, self.sample_seconds)
+        horizon = max(1, math.ceil(lead_seconds / self.sample_seconds))
+        forecast = seasonal_forecast(series, self.season_length, horizon, self.seasons)
+        if forecast is None:
+            return None
+        return float(forecast.max())
+
+    def desired_size(self, current_size, history, scaling_limits):
+        """
+        Returns the size needed for the forecast peak, never below the current size.
+
+        Args:
+            current_size (int): Current pool size.
+            history (dict): Arrays "timestamp", "cpu" and "ram", oldest first.
+            scaling_limits (dict): Limits for scaling (min and max instance count).
+        """
+        lead_seconds = self.lead_time()
+        ratio = 0.0
+        for metric, target in self.targets.items():
+            peak = self.forecast_peak(history["timestamp"], history[metric], lead_seconds)
+            if peak is None:
+                if not self.warming_up:
+                    # Logged once per warm-up, e.g. after a restart or a rebuild of the pool state
+                    covered = history["timestamp"][-1] - history["timestamp"][0] if len(history["timestamp"]) else 0
+                    logging.info(
+                        f"Predictive scaling of pool {self.instance_pool_id} is warming up: "
+                        f"{covered / 3600:.1f} of {self.season_length * self.sample_seconds / 3600:.1f} hours "
+                        f"of history recorded before the first forecast."
+                    )
+                    self.warming_up = True
+                return current_size
+            ratio = max(ratio, peak / target)
+
+        if self.warming_up:
+            logging.info(f"Predictive scaling of pool {self.instance_pool_id} has enough history to forecast.")
+            self.warming_up = False
+
+        desired = math.ceil(current_size * ratio)
+        return max(current_size, min(scaling_limits["max"], desired))
+
+
+def build_predictive_scaler(pool):
+    """
+    Creates the PredictiveScaler configured under `predictive` in the pool configuration.
+
+    Returns:
+        PredictiveScaler, or None when predictive scaling is not enabled.
+    """
+    predictive_config = pool.get("predictive") or {}
+    if not predictive_config.get("enabled", False):
+        return None
+    return PredictiveScaler(
+        targets=predictive_config.get("targets"),
+        lead_seconds=predictive_config.get("lead_seconds", DEFAULT_LEAD_SECONDS),
+        season_seconds=predictive_config.get("season_seconds", DEFAULT_SEASON_SECONDS),
+        sample_seconds=predictive_config.get("sample_seconds", DEFAULT_SAMPLE_SECONDS),
+        seasons=predictive_config.get("seasons", DEFAULT_SEASONS),
+        instance_pool_id=pool.get("instance_pool_id"),
+        lead_percentile=predictive_config.get("lead_percentile", DEFAULT_LEAD_PERCENTILE),
+    )
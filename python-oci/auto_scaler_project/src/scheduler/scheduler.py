@@ -1,12 +1,21 @@
 import logging
 import threading
-import time
-from datetime import datetime
+from datetime import timedelta
 import oci
-from instance_manager.instance_pool import get_instance_pool_details
+from instance_manager.instance_pool import get_instance_pool_details, update_instance_pool_size
+from instance_manager.resize_tracker import resize_tracker
+from scheduler.timeline import ScheduleTimeline
+from scheduler.utils.time_utils import utc_now, format_datetime
+
+MAX_SLEEP_SECONDS = 3600  # Re-check at least hourly to absorb clock changes
+DEFAULT_PRE_WARM_PERCENTILE = 90  # Percentile of measured provisioning latencies used as lead time
+DEFAULT_PRE_WARM_SECONDS = 0  # Lead time before the first measurement
+DEFAULT_MAX_PRE_WARM_SECONDS = 1800
+
 
 class Scheduler:
-    def __init__(self, compute_management_client, instance_pool_id, max_instances, schedules, scheduler_instances):
+    def __init__(self, compute_management_client, instance_pool_id, max_instances, schedules, scheduler_instances,
+                 default_timezone=None, pre_warm=None):
         """
         Initializes the Scheduler.
 
@@ -14,19 +23,23 @@ class Scheduler:
             compute_management_client: OCI ComputeManagementClient instance.
             instance_pool_id (str): The ID of the instance pool to manage.
             max_instances (int): Maximum number of instances to add during peak time.
-            schedules (list): List of schedule dictionaries with start and end times.
+            schedules (list): List of schedule dictionaries (start/end times or cron expressions).
+            default_timezone (str): Timezone for schedules without one, local time if None.
+            pre_warm (dict): Pre-warm settings (`enabled`, `percentile`, `default_seconds`, `max_seconds`).
+                Windows open early by the measured time recent resizes took to reach RUNNING.
         """
         self.compute_management_client = compute_management_client
         self.instance_pool_id = instance_pool_id
         self.max_supported_instances = max_instances
         self.scheduler_instances = scheduler_instances
         self.schedules = schedules
+        self.timeline = ScheduleTimeline(schedules, default_timezone=default_timezone)
+        self.pre_warm = pre_warm or {}
         self.active_instances = 0
         self.stop_event = threading.Event()
+        self.wake_event = threading.Event()  # Set when the timeline changes or the scheduler stops
         self.lock = threading.Lock()  # Ensure thread-safe operations
         self.currently_active = False  # Track active status
-        self.scaled_up = False  # Flag to track if scaling up was done
-        self.scaled_down = False  # Flag to track if scaling down was done
 
     def start(self):
         """Starts the scheduler in a separate thread."""
@@ -34,51 +47,83 @@ class Scheduler:
         scheduler_thread.start()
 
     def run(self):
-        """Main loop of the scheduler."""
+        """Main loop of the scheduler; sleeps until the next window opens or closes."""
         logging.info(f"Scheduler started for instance pool: {self.instance_pool_id}")
         while not self.stop_event.is_set():
-            current_time = datetime.now().time()
-            active = False
-
-            for schedule in self.schedules:
-                start_time = datetime.strptime(schedule['start_time'], '%H:%M').time()
-                end_time = datetime.strptime(schedule['end_time'], '%H:%M').time()
-
-                if start_time <= current_time <= end_time:
-                    active = True
-                    self.currently_active = active  # Update the active status
-                    self.execute_schedule_logic(current_time, start_time, end_time)
-                    break  # Exit loop once the active schedule is found
-
-            if not active:
-                self.currently_active = active
-                logging.info(f"Scheduler is currently inactive for pool {self.instance_pool_id}. Resetting scale flags.")
-                self.scaled_up = False  # Reset the flag when schedule period is over
-                self.scaled_down = False  # Reset the flag when schedule period is over
-                time.sleep(60)  # Sleep for 1 minute before checking again
+            now = utc_now()
+            lead = self.pre_warm_lead()
+            window = self.timeline.active_window(now, lead)
+
+            if window and not self.currently_active:
+                self.currently_active = True
+                if now < window[0]:
+                    logging.info(
+                        f"Pre-warming pool {self.instance_pool_id} {(window[0] - now).total_seconds():.0f} "
+                        f"seconds ahead of its schedule window."
+                    )
+                self.execute_schedule_logic(*window)
+            elif not window and self.currently_active:
+                self.currently_active = False
+                self.end_schedule_logic()
+
+            next_transition = self.timeline.next_transition(now, lead)
+            sleep_seconds = min((next_transition - utc_now()).total_seconds(), MAX_SLEEP_SECONDS)
+            logging.debug(
+                f"Scheduler for pool {self.instance_pool_id} sleeping until {format_datetime(next_transition)}"
+            )
+            self.wake_event.wait(max(sleep_seconds, 0))
+            self.wake_event.clear()
+
+    def update(self, max_instances, schedules, scheduler_instances, default_timezone=None, pre_warm=None):
+        """
+        Applies new schedule settings without restarting the scheduler thread.
+
+        Instances already added by an active window stay accounted for and are removed
+        when the (new) window closes.
+        """
+        timeline = ScheduleTimeline(schedules, default_timezone=default_timezone)
+        with self.lock:
+            self.max_supported_instances = max_instances
+            self.scheduler_instances = scheduler_instances
+            self.schedules = schedules
+            self.timeline = timeline
+            self.pre_warm = pre_warm or {}
+        logging.info(f"Schedules of pool {self.instance_pool_id} updated.")
+        self.wake_event.set()
+
+    def set_compute_management_client(self, compute_management_client):
+        """Resizes the pool through another client from now on, e.g. after its region changed."""
+        with self.lock:
+            self.compute_management_client = compute_management_client
+
+    def pre_warm_lead(self):
+        """Returns how long before a window opens the scheduled instances are added."""
+        if not self.pre_warm.get("enabled", True):
+            return timedelta(0)
+        seconds = resize_tracker.lead_seconds(
+            self.instance_pool_id, self.pre_warm.get("percentile", DEFAULT_PRE_WARM_PERCENTILE)
+        )
+        if seconds is None:
+            seconds = self.pre_warm.get("default_seconds", DEFAULT_PRE_WARM_SECONDS)
+        return timedelta(seconds=min(seconds, self.pre_warm.get("max_seconds", DEFAULT_MAX_PRE_WARM_SECONDS)))
 
     def is_active(self):
         """Returns whether the scheduler is currently active."""
         return self.currently_active
 
-    def execute_schedule_logic(self, current_time, start_time, end_time):
-        """Executes the add/remove logic during the active schedule period."""
-        logging.info(f"Scheduler is active between {start_time} and {end_time} for pool {self.instance_pool_id}")
-
-        pool_details = get_instance_pool_details(self.compute_management_client, self.instance_pool_id)
-        current_size = pool_details.size
-
-        # Scale up only once per active schedule window
-        if not self.scaled_up and current_size < self.max_supported_instances:
-            self.add_instances(self.scheduler_instances)
-            self.scaled_up = True  # Mark that scaling up was done
+    def execute_schedule_logic(self, start_time, end_time):
+        """Adds the scheduled instances once when a schedule window opens."""
+        logging.info(
+            f"Scheduler is active between {format_datetime(start_time)} and {format_datetime(end_time)} "
+            f"for pool {self.instance_pool_id}"
+        )
+        self.add_instances(self.scheduler_instances)
 
-        # Scale down only once after the schedule window ends
-        if current_time > end_time and not self.scaled_down and current_size > self.scheduler_instances:
-            self.remove_instances(self.scheduler_instances)
-            self.scaled_down = True  # Mark that scaling down was done
-        
-        time.sleep(60)
+    def end_schedule_logic(self):
+        """Removes the instances the scheduler added once its window closes."""
+        logging.info(f"Scheduler is now inactive for pool {self.instance_pool_id}.")
+        if self.active_instances > 0:
+            self.remove_instances(self.active_instances)
 
     def add_instances(self, count):
         """Adds instances to the instance pool using OCI SDK."""
@@ -93,10 +138,7 @@ class Scheduler:
 
             try:
                 logging.info(f"Adding {count} instances to pool {self.instance_pool_id}.")
-                self.compute_management_client.update_instance_pool(
-                    instance_pool_id=self.instance_pool_id,
-                    update_instance_pool_details=oci.core.models.UpdateInstancePoolDetails(size=new_size),
-                )
+                update_instance_pool_size(self.compute_management_client, self.instance_pool_id, new_size)
                 self.active_instances += count
                 logging.info(f"{count} instances added. New size: {new_size}")
             except Exception as e:
@@ -115,10 +157,7 @@ class Scheduler:
 
             try:
                 logging.info(f"Removing {count} instances from pool {self.instance_pool_id}.")
-                self.compute_management_client.update_instance_pool(
-                    instance_pool_id=self.instance_pool_id,
-                    update_instance_pool_details=oci.core.models.UpdateInstancePoolDetails(size=new_size),
-                )
+                update_instance_pool_size(self.compute_management_client, self.instance_pool_id, new_size)
                 self.active_instances -= count
                 logging.info(f"{count} instances removed. New size: {new_size}")
             except Exception as e:
@@ -128,3 +167,4 @@ class Scheduler:
         """Stops the scheduler."""
         logging.info(f"Stopping scheduler for instance pool: {self.instance_pool_id}")
         self.stop_event.set()
+        self.wake_event.set()
@@ -0,0 +1,186 @@
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+DEFAULT_HORIZON = timedelta(days=8)  # How far ahead windows are compiled
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# (min, max) of each cron field: minute, hour, day of month, month, day of week
+CRON_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def parse_cron_field(field, low, high):
+    """
+    Expands one cron field (`*`, `*/n`, `a`, `a-b`, `a-b/n` and comma lists) into a set of values.
+    """
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Cron field '{field}' is out of range {low}-{high}.")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    def __init__(self, expression):
+        """
+        Standard five-field cron expression (minute hour day-of-month month day-of-week).
+
+        As in cron, when both day fields are restricted a day matches if either does.
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have five fields.")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELD_RANGES)
+        )
+        # Cron uses 0 and 7 for Sunday, Python uses 6
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches_day(self, day):
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days
+        weekday_match = day.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def occurrences(self, start_day, end_day, tz):
+        """Yields every firing time between two local dates (inclusive) as aware datetimes."""
+        day = start_day
+        while day <= end_day:
+            if self.matches_day(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        yield _local_datetime(day, hour, minute, tz)
+            day += timedelta(days=1)
+
+
+class ScheduleTimeline:
+    def __init__(self, schedules, default_timezone=None, horizon=DEFAULT_HORIZON):
+        """
+        Schedule windows compiled once into a sorted, merged interval timeline.
+
+        Each schedule is either a daily window with `start_time`/`end_time` ("HH:MM",
+        an end before the start crosses midnight) and optional `days`, or a `cron`
+        expression with a `duration_minutes`. Both accept a `timezone` name.
+        Windows are expanded for `horizon` ahead and recompiled as time moves on,
+        so lookups are a binary search instead of re-parsing every schedule.
+
+        Args:
+            schedules (list): Schedule dictionaries from the pool configuration.
+            default_timezone (str): Timezone for schedules without one, local time if None.
+            horizon (timedelta): How far ahead windows are compiled.
+        """
+        self.default_timezone = default_timezone
+        self.horizon = horizon
+        self.rules = [self._parse(schedule) for schedule in schedules or []]
+        self.starts = []
+        self.ends = []
+        self.compiled_until = None
+
+    def active_window(self, now, lead=timedelta(0)):
+        """
+        Returns the (start, end) window containing `now`, or None.
+
+        With a `lead`, a window also counts as active from `lead` before its start.
+        """
+        self._ensure_compiled(now + lead)
+        # Windows are merged, so ends are sorted too and only the latest start can still be open
+        index = bisect.bisect_right(self.starts, now + lead) - 1
+        if index >= 0 and now < self.ends[index]:
+            return self.starts[index], self.ends[index]
+        return None
+
+    def next_transition(self, now, lead=timedelta(0)):
+        """Returns the next time a window (opened `lead` early) opens or closes after `now`."""
+        window = self.active_window(now, lead)
+        if window:
+            return window[1]
+        index = bisect.bisect_right(self.starts, now + lead)
+        if index < len(self.starts):
+            return self.starts[index] - lead
+        # Nothing within the compiled horizon; wake up when it needs extending
+        return self.compiled_until - lead
+
+    def _ensure_compiled(self, now):
+        if self.compiled_until is not None and now < self.compiled_until - timedelta(days=1):
+            return
+
+        windows = []
+        for rule in self.rules:
+            windows.extend(rule(now - timedelta(days=1), now + self.horizon))
+        windows.sort()
+
+        # Merge overlapping windows so each transition is handled once
+        starts, ends = [], []
+        for start, end in windows:
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts, self.ends = starts, ends
+        self.compiled_until = now + self.horizon
+        logging.debug(f"Compiled {len(starts)} schedule windows until {self.compiled_until}.")
+
+    def _parse(self, schedule):
+        tz = _timezone(schedule.get("timezone", self.default_timezone))
+        cron = schedule.get("cron") or schedule.get("cron_expression")
+
+        if cron:
+            expression = CronExpression(cron)
+            duration = timedelta(minutes=schedule["duration_minutes"])
+
+            def cron_windows(start, end):
+                for fire_time in expression.occurrences(_local_date(start, tz), _local_date(end, tz), tz):
+                    yield fire_time, fire_time + duration
+            return cron_windows
+
+        start_hour, start_minute = (int(v) for v in schedule["start_time"].split(":"))
+        end_hour, end_minute = (int(v) for v in schedule["end_time"].split(":"))
+        days = {WEEKDAYS.index(day.lower()[:3]) for day in schedule.get("days") or WEEKDAYS}
+
+        def daily_windows(start, end):
+            day = _local_date(start, tz) - timedelta(days=1)
+            while day <= _local_date(end, tz):
+                if day.weekday() in days:
+                    window_start = _local_datetime(day, start_hour, start_minute, tz)
+                    window_end = _local_datetime(day, end_hour, end_minute, tz)
+                    if window_end <= window_start:
+                        # Window crosses midnight
+                        window_end = _local_datetime(day + timedelta(days=1), end_hour, end_minute, tz)
+                    yield window_start, window_end
+                day += timedelta(days=1)
+        return daily_windows
+
+
+def _timezone(name):
+    return ZoneInfo(name) if name else None
+
+
+def _local_date(moment, tz):
+    return (moment.astimezone(tz) if tz else moment.astimezone()).date()
+
+
+def _local_datetime(day, hour, minute, tz):
+    """Builds an aware UTC datetime for a wall-clock time in `tz` (system local time if None)."""
+    local = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz)
+    if tz is None:
+        local = local.astimezone()
+    return local.astimezone(timezone.utc)
@@ -0,0 +1,275 @@
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSupervisor:
+    def __init__(self, runtime_factory, max_workers=16, default_interval=300,
+                 restart_backoff=30, max_restart_backoff=900, min_trigger_interval=15):
+        """
+        Runs the evaluate/scale cycle of many instance pools concurrently.
+
+        Every pool is represented by a runtime object created through
+        `runtime_factory(pool)`. A runtime exposes `run_once()`, which performs one
+        evaluation cycle and may return the number of seconds until its next cycle,
+        `stop()`, which releases its resources, and optionally `update(pool)`, which
+        applies a changed configuration in place and returns False if it cannot. Cycles are dispatched onto a
+        bounded thread pool, so hundreds of pools share `max_workers` threads
+        instead of each holding a thread in a sleep loop.
+
+        Args:
+            runtime_factory (Callable): Builds a runtime from a pool configuration dict.
+            max_workers (int): Maximum number of pool cycles running at the same time.
+            default_interval (int): Seconds between cycles when a runtime returns None.
+            restart_backoff (int): Initial delay before retrying a failed cycle or rebuilding
+                a runtime that could not be built.
+            max_restart_backoff (int): Upper bound for the retry delay.
+            min_trigger_interval (int): Minimum seconds between two cycles of a pool
+                started by external triggers, so an alert storm cannot hammer the pool.
+        """
+        self.runtime_factory = runtime_factory
+        self.max_workers = max_workers
+        self.default_interval = default_interval
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.min_trigger_interval = min_trigger_interval
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pool-worker")
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.pools = {}  # instance_pool_id -> pool entry
+        self.queue = []  # heap of (due_time, sequence, instance_pool_id)
+        self.sequence = 0
+        self.dispatcher_thread = None
+
+    def add_pool(self, pool):
+        """Registers a pool and schedules its first cycle immediately."""
+        pool_id = pool["instance_pool_id"]
+        with self.lock:
+            if pool_id in self.pools:
+                logging.warning(f"Pool {pool_id} is already supervised. Ignoring duplicate entry.")
+                return
+            self.pools[pool_id] = {
+                "config": pool,
+                "runtime": None,
+                "running": False,
+                "failures": 0,
+                "next_run": None,
+                "last_started": None,
+                "triggered": False,
+                "interval": None,
+                "reconfigure": False,
+            }
+            self._schedule_locked(pool_id, 0)
+        logging.info(f"Pool {pool_id} added to supervisor.")
+
+    def remove_pool(self, pool_id):
+        """Stops supervising a pool and releases its runtime."""
+        with self.lock:
+            entry = self.pools.pop(pool_id, None)
+            running = entry is not None and entry["running"]
+        if entry is None:
+            return
+        # A running cycle stops its own runtime once it notices the removal
+        if not running:
+            self._stop_runtime(pool_id, entry["runtime"])
+        logging.info(f"Pool {pool_id} removed from supervisor.")
+
+    def update_pool(self, pool):
+        """
+        Replaces the configuration of a supervised pool.
+
+        The change is applied at the start of the pool's next cycle, which is brought
+        forward to now unless a cycle is already running. The runtime is updated in
+        place when it supports it and rebuilt otherwise; other pools are not touched.
+        """
+        pool_id = pool["instance_pool_id"]
+        with self.lock:
+            entry = self.pools.get(pool_id)
+            if entry is None:
+                logging.warning(f"Pool {pool_id} is not supervised. Ignoring configuration update.")
+                return
+            entry["config"] = pool
+            entry["reconfigure"] = True
+            if not entry["running"]:
+                self._schedule_locked(pool_id, 0)
+        logging.info(f"Configuration update queued for pool {pool_id}.")
+
+    def trigger(self, pool_id, reason=""):
+        """
+        Runs a pool's next cycle as soon as possible instead of waiting for its interval.
+
+        A trigger that arrives while the pool's cycle is running queues one more cycle
+        right after it. Triggered cycles are at least `min_trigger_interval` apart.
+
+        Returns:
+            bool: False if the pool is not supervised.
+        """
+        with self.lock:
+            entry = self.pools.get(pool_id)
+            if entry is None:
+                return False
+            logging.info(f"Evaluation of pool {pool_id} triggered{f' by {reason}' if reason else ''}.")
+            if entry["running"]:
+                entry["triggered"] = True
+                return True
+
+            delay = 0
+            if entry["last_started"] is not None:
+                delay = max(0, entry["last_started"] + self.min_trigger_interval - time.monotonic())
+            if entry["next_run"] is None or time.monotonic() + delay < entry["next_run"]:
+                self._schedule_locked(pool_id, delay)
+            return True
+
+    def status(self):
+        """
+        Returns a snapshot of every supervised pool.
+
+        Returns:
+            dict: instance_pool_id -> {"running", "interval", "next_run_in", "failures"}.
+        """
+        now = time.monotonic()
+        with self.lock:
+            return {
+                pool_id: {
+                    "running": entry["running"],
+                    "interval": entry["interval"],
+                    "next_run_in": round(entry["next_run"] - now, 1) if entry["next_run"] is not None else None,
+                    "failures": entry["failures"],
+                }
+                for pool_id, entry in self.pools.items()
+            }
+
+    def start(self):
+        """Starts the dispatcher thread."""
+        self.dispatcher_thread = threading.Thread(target=self.run, name="pool-supervisor", daemon=True)
+        self.dispatcher_thread.start()
+
+    def run(self):
+        """Dispatches due pool cycles onto the worker pool until stopped."""
+        logging.info(f"Pool supervisor started with {self.max_workers} workers.")
+        with self.lock:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                while self.queue and self.queue[0][0] <= now:
+                    due, _, pool_id = heapq.heappop(self.queue)
+                    entry = self.pools.get(pool_id)
+                    # Stale heap entries (removed or rescheduled pools) are skipped
+                    if entry is None or entry["running"] or entry["next_run"] != due:
+                        continue
+                    entry["running"] = True
+                    entry["next_run"] = None
+                    entry["last_started"] = now
+                    self.executor.submit(self._run_cycle, pool_id, entry)
+
+                timeout = self.queue[0][0] - now if self.queue else None
+                self.wakeup.wait(timeout)
+
+    def wait(self):
+        """Blocks the calling thread until the supervisor is stopped."""
+        while not self.stop_event.wait(1):
+            pass
+
+    def stop(self):
+        """Stops dispatching, waits for running cycles and stops every runtime."""
+        logging.info("Stopping pool supervisor...")
+        with self.lock:
+            self.stop_event.set()
+            self.wakeup.notify_all()
+            entries = list(self.pools.items())
+        self.executor.shutdown(wait=True)
+        for pool_id, entry in entries:
+            self._stop_runtime(pool_id, entry["runtime"])
+
+    def _run_cycle(self, pool_id, entry):
+        """
+        Runs one cycle for a pool, building its runtime first if needed.
+
+        A failed cycle keeps the runtime, so its scaling state (cooldowns, metric
+        window, active schedules) survives transient errors such as throttling; the
+        cycle is retried with backoff. The runtime is only discarded and rebuilt
+        when building or reconfiguring it fails.
+        """
+        delay = self.default_interval
+        try:
+            try:
+                if entry["reconfigure"]:
+                    entry["reconfigure"] = False
+                    self._reconfigure(pool_id, entry)
+                if entry["runtime"] is None:
+                    entry["runtime"] = self.runtime_factory(entry["config"])
+                    logging.info(f"Runtime started for pool {pool_id}.")
+            except Exception as e:
+                delay = self._failure_delay(entry)
+                logging.error(
+                    f"Pool {pool_id} runtime could not be built ({entry['failures']} consecutive failures): {e}. "
+                    f"Rebuilding in {delay} seconds."
+                )
+                runtime, entry["runtime"] = entry["runtime"], None
+                self._stop_runtime(pool_id, runtime)
+            else:
+                try:
+                    interval = entry["runtime"].run_once()
+                    entry["failures"] = 0
+                    if interval is not None:
+                        delay = interval
+                except Exception as e:
+                    delay = self._failure_delay(entry)
+                    logging.error(
+                        f"Pool {pool_id} cycle failed ({entry['failures']} consecutive failures): {e}. "
+                        f"Retrying in {delay} seconds."
+                    )
+        finally:
+            with self.lock:
+                entry["running"] = False
+                removed = self.pools.get(pool_id) is not entry
+                if entry["triggered"]:
+                    # A trigger arrived during the cycle, evaluate again soon
+                    entry["triggered"] = False
+                    delay = min(delay, self.min_trigger_interval)
+                entry["interval"] = delay
+                if not removed and not self.stop_event.is_set():
+                    self._schedule_locked(pool_id, delay)
+
+        if removed:
+            # The pool was removed while its cycle was running
+            self._stop_runtime(pool_id, entry["runtime"])
+
+    def _failure_delay(self, entry):
+        """Counts a failure and returns the backoff before the pool's next attempt."""
+        entry["failures"] += 1
+        return min(
+            self.restart_backoff * (2 ** (entry["failures"] - 1)),
+            self.max_restart_backoff,
+        )
+
+    def _reconfigure(self, pool_id, entry):
+        """Applies a queued configuration change, rebuilding the runtime if it cannot be updated in place."""
+        runtime = entry["runtime"]
+        if runtime is None:
+            return
+        update = getattr(runtime, "update", None)
+        if update is not None and update(entry["config"]):
+            return
+        logging.info(f"Rebuilding runtime of pool {pool_id} for its new configuration.")
+        entry["runtime"] = None
+        self._stop_runtime(pool_id, runtime)
+
+    def _schedule_locked(self, pool_id, delay):
+        """Queues the next cycle of a pool. Caller must hold the lock."""
+        due = time.monotonic() + delay
+        self.pools[pool_id]["next_run"] = due
+        self.sequence += 1
+        heapq.heappush(self.queue, (due, self.sequence, pool_id))
+        self.wakeup.notify()
+
+    def _stop_runtime(self, pool_id, runtime):
+        if runtime is None:
+            return
+        try:
+            runtime.stop()
+        except Exception as e:
+            logging.error(f"Failed to stop runtime for pool {pool_id}: {e}")
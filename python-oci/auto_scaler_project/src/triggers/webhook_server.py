@@ -0,0 +1,185 @@
+import ipaddress
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Label or dimension names that may carry the instance pool OCID
+POOL_ID_KEYS = ("instance_pool_id", "instancePoolId", "pool_id")
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class TriggerServer:
+    def __init__(self, trigger_callback, status_callback=None, host="127.0.0.1", port=9095, token=None):
+        """
+        Small HTTP listener that turns external alerts into immediate pool evaluations.
+
+        Endpoints:
+            POST /alertmanager: Prometheus Alertmanager webhook payloads.
+            POST /oci-alarm: OCI Monitoring alarm messages delivered through Notifications.
+            POST /samples: Newline-delimited JSON samples, one object per line, as a minimal
+                stand-in for a remote-write stream.
+            GET /status: Per-pool state such as the current evaluation interval.
+
+        Args:
+            trigger_callback (Callable): Called with (instance_pool_id, reason) for every pool to evaluate.
+            status_callback (Callable): Returns the per-pool status served on /status.
+            host (str): Address to listen on, loopback only by default.
+            port (int): Port to listen on.
+            token (str): Shared secret expected as `Authorization: Bearer <token>`; required
+                when listening on anything but a loopback address.
+
+        Raises:
+            ValueError: If `host` is not a loopback address and no token is set, since anyone
+                reaching the port could then force scaling cycles.
+        """
+        if not token and not _is_loopback(host):
+            raise ValueError(f"Trigger server on {host} requires a token; set triggers.token or listen on 127.0.0.1.")
+        self.trigger_callback = trigger_callback
+        self.status_callback = status_callback
+        self.host = host
+        self.port = port
+        self.token = token
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        """Starts serving in a background thread."""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="trigger-server", daemon=True)
+        self.thread.start()
+        logging.info(f"Trigger server listening on {self.host}:{self.httpd.server_port}")
+
+    def stop(self):
+        """Stops the listener."""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            logging.info("Trigger server stopped.")
+
+    def handle_payload(self, path, body):
+        """
+        Extracts the affected pools from a payload and triggers them.
+
+        Returns:
+            list: The instance pool OCIDs that were triggered.
+        """
+        if path == "/alertmanager":
+            pool_ids = pools_from_alertmanager(json.loads(body))
+            source = "alertmanager"
+        elif path == "/oci-alarm":
+            pool_ids = pools_from_oci_alarm(json.loads(body))
+            source = "oci-alarm"
+        elif path == "/samples":
+            pool_ids = pools_from_samples(body)
+            source = "samples"
+        else:
+            raise KeyError(path)
+
+        triggered = []
+        for pool_id in sorted(pool_ids):
+            if self.trigger_callback(pool_id, source):
+                triggered.append(pool_id)
+            else:
+                logging.debug(f"Ignoring {source} trigger for unmanaged pool {pool_id}.")
+        return triggered
+
+    def _handler_class(self):
+        server = self
+
+        class TriggerRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path.split("?", 1)[0] != "/status" or server.status_callback is None:
+                    self._respond(404, {"error": "unknown endpoint"})
+                    return
+                self._respond(200, server.status_callback())
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    if length < 0:
+                        raise ValueError(f"negative length {length}")
+                except ValueError as e:
+                    logging.warning(f"Rejected trigger request on {self.path} with invalid Content-Length: {e}")
+                    self._respond(400, {"error": "invalid content length"})
+                    return
+                if length > MAX_BODY_BYTES:
+                    self._respond(413, {"error": "payload too large"})
+                    return
+
+                try:
+                    triggered = server.handle_payload(self.path.split("?", 1)[0], self.rfile.read(length))
+                except KeyError:
+                    self._respond(404, {"error": "unknown endpoint"})
+                    return
+                except (ValueError, AttributeError, TypeError) as e:
+                    logging.warning(f"Rejected trigger payload on {self.path}: {e}")
+                    self._respond(400, {"error": "invalid payload"})
+                    return
+                self._respond(202, {"triggered": triggered})
+
+            def _authorized(self):
+                if server.token and self.headers.get("Authorization") != f"Bearer {server.token}":
+                    self._respond(401, {"error": "unauthorized"})
+                    return False
+                return True
+
+            def _respond(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logging.debug(f"Trigger server: {format % args}")
+
+        return TriggerRequestHandler
+
+
+def pools_from_alertmanager(payload):
+    """Returns the pool OCIDs referenced by the labels of an Alertmanager webhook."""
+    pool_ids = set()
+    label_sets = [payload.get("commonLabels") or {}]
+    label_sets += [alert.get("labels") or {} for alert in payload.get("alerts") or []]
+    for labels in label_sets:
+        pool_ids.update(_pool_ids_from(labels))
+    return pool_ids
+
+
+def pools_from_oci_alarm(payload):
+    """Returns the pool OCIDs referenced by the metric dimensions of an OCI alarm message."""
+    pool_ids = set()
+    for alarm in payload.get("alarmMetaData") or []:
+        for dimensions in alarm.get("dimensions") or []:
+            pool_ids.update(_pool_ids_from(dimensions))
+    return pool_ids
+
+
+def pools_from_samples(body):
+    """Returns the pool OCIDs found in a newline-delimited JSON sample stream."""
+    pool_ids = set()
+    for line in body.decode().splitlines():
+        if line.strip():
+            pool_ids.update(_pool_ids_from(json.loads(line)))
+    return pool_ids
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _pool_ids_from(mapping):
+    return {mapping[key] for key in POOL_ID_KEYS if mapping.get(key)}
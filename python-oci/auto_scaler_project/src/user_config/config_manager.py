@@ -2,15 +2,20 @@ import os
 from .yaml_loader import load_yaml_config
 import logging
 import json
+import functools
 from dotenv import load_dotenv
 
 def load_config(file_path="config.yaml"):
     return load_yaml_config(file_path)
 
-def build_oci_config(selected_region):
+@functools.lru_cache(maxsize=None)
+def _load_region_map():
+    """Loads .env and parses REGION_MAP once per process."""
     load_dotenv()
+    return json.loads(os.getenv("REGION_MAP"))
 
-    region_map = json.loads(os.getenv("REGION_MAP"))
+def build_oci_config(selected_region):
+    region_map = _load_region_map()
     actual_region = region_map.get(selected_region, None)
 
     logging.debug(f"Selected region: {selected_region}, Mapped region: {actual_region}")
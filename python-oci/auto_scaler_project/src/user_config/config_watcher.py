@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+from .yaml_loader import load_yaml_config
+
+DEFAULT_POLL_INTERVAL = 5  # Seconds between checks of the config file
+
+
+class ConfigWatcher:
+    def __init__(self, config_path, on_change, initial_config=None, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Reloads the YAML configuration when the file changes or a reload is requested.
+
+        The file is checked every `poll_interval` seconds; `request_reload()` (used
+        by the central management client and the SIGHUP handler) reloads right away.
+        A file that fails to parse is logged and the running configuration is kept.
+
+        Args:
+            config_path (str): Path of config.yaml.
+            on_change (Callable): Called with (old_config, new_config) after every successful reload
+                that changed the configuration.
+            initial_config (dict): Configuration the application is currently running with.
+            poll_interval (int): Seconds between file checks.
+        """
+        self.config_path = config_path
+        self.on_change = on_change
+        self.config = initial_config
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.reload_event = threading.Event()
+        self.file_state = self._file_state()
+        self.thread = None
+
+    def start(self):
+        """Starts watching in a background thread."""
+        self.thread = threading.Thread(target=self.run, name="config-watcher", daemon=True)
+        self.thread.start()
+        logging.info(f"Watching {self.config_path} for changes.")
+
+    def run(self):
+        while not self.stop_event.is_set():
+            requested = self.reload_event.wait(self.poll_interval)
+            self.reload_event.clear()
+            if self.stop_event.is_set():
+                return
+
+            file_state = self._file_state()
+            if requested or file_state != self.file_state:
+                self.file_state = file_state
+                self.reload()
+
+    def request_reload(self):
+        """Asks the watcher to reload the configuration as soon as possible. Safe in signal handlers."""
+        self.reload_event.set()
+
+    def reload(self):
+        """Loads the file and hands the change to `on_change`."""
+        try:
+            new_config = load_yaml_config(self.config_path) or {}
+        except Exception as e:
+            logging.error(f"Failed to reload configuration from {self.config_path}, keeping the current one: {e}")
+            return
+
+        if new_config == self.config:
+            logging.debug("Configuration file touched without changes.")
+            return
+
+        old_config, self.config = self.config, new_config
+        logging.info(f"Configuration reloaded from {self.config_path}.")
+        try:
+            self.on_change(old_config or {}, new_config)
+        except Exception as e:
+            logging.error(f"Failed to apply reloaded configuration: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        self.reload_event.set()
+
+    def _file_state(self):
+        try:
+            stat = os.stat(self.config_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+
+def diff_pools(old_config, new_config):
+    """
+    Compares the `pools` of two configurations by instance_pool_id.
+
+    Returns:
+        tuple: (added, removed, changed) lists of pool dicts; `removed` holds the old entries.
+    """
+    old_pools = {pool["instance_pool_id"]: pool for pool in old_config.get("pools") or []}
+    new_pools = {pool["instance_pool_id"]: pool for pool in new_config.get("pools") or []}
+
+    added = [pool for pool_id, pool in new_pools.items() if pool_id not in old_pools]
+    removed = [pool for pool_id, pool in old_pools.items() if pool_id not in new_pools]
+    changed = [
+        pool for pool_id, pool in new_pools.items()
+        if pool_id in old_pools and pool != old_pools[pool_id]
+    ]
+    return added, removed, changed
@@ -0,0 +1,142 @@
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from central_mgmt.client import CentralManagementClient
+
+
+class FakeSession:
+    """Answers requests from a list of status codes or exceptions and records them."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.bodies = []
+
+    def request(self, method, url, data=None, headers=None, **kwargs):
+        self.calls.append((method, url))
+        if data is not None:
+            if (headers or {}).get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            self.bodies.append(json.loads(data))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, SimpleNamespace):
+            return outcome
+        return SimpleNamespace(status_code=outcome, headers={}, text="")
+
+
+def make_client(tmp_path, outcomes):
+    client = CentralManagementClient("http://central", api_key="key", local_config_path=str(tmp_path / "config.yaml"))
+    client.session = FakeSession(outcomes)
+    client.stop_event.wait = lambda delay: False
+    return client
+
+
+def test_register_is_not_repeated_after_server_error(tmp_path):
+    client = make_client(tmp_path, [502, 200])
+
+    assert client._request("POST", "/api/register", json={}).status_code == 502
+    assert len(client.session.calls) == 1
+
+
+def test_register_is_not_repeated_after_read_timeout(tmp_path):
+    client = make_client(tmp_path, [requests.ReadTimeout("read timed out"), 200])
+
+    with pytest.raises(requests.ReadTimeout):
+        client._request("POST", "/api/register", json={})
+    assert len(client.session.calls) == 1
+
+
+def test_unprocessed_post_is_retried(tmp_path):
+    client = make_client(tmp_path, [429, requests.ConnectTimeout("connect timed out"), 200])
+
+    assert client._request("POST", "/api/register", json={}).status_code == 200
+    assert len(client.session.calls) == 3
+
+
+def test_idempotent_requests_are_retried_after_server_error(tmp_path):
+    client = make_client(tmp_path, [503, requests.ConnectionError("reset"), 200, 500, 200])
+
+    assert client._request("GET", "/api/nodes/n/config").status_code == 200
+    assert client._request("POST", "/api/nodes/n/metrics/bulk", json=[], idempotent=True).status_code == 200
+    assert len(client.session.calls) == 5
+
+
+class StopAfterWaits:
+    """Stands in for the client's stop event, recording waits and stopping after `limit` of them."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.waits = []
+
+    def is_set(self):
+        return len(self.waits) >= self.limit
+
+    def wait(self, delay):
+        self.waits.append(delay)
+        return self.is_set()
+
+
+def config_response(version):
+    body = {"config_id": 7, "version": version, "config": "pools: []\n"}
+    return SimpleNamespace(status_code=200, headers={"ETag": f'"{version}"'}, text="", json=lambda: body)
+
+
+def test_unacknowledged_config_is_polled_again_with_backoff(tmp_path):
+    # Every poll returns the same version because reporting it as applied keeps failing
+    client = make_client(tmp_path, [config_response(3), 500, config_response(3), 500])
+    client.node_id = "node-1"
+    client.max_retries = 0
+    client.stop_event = StopAfterWaits(limit=2)
+
+    client.config_loop()
+
+    assert client.stop_event.waits == [30, 60]
+    assert client._get_config_version() != 3
+
+
+def test_acknowledged_config_is_followed_by_the_next_poll(tmp_path):
+    client = make_client(tmp_path, [config_response(3), 200, 304, 503])
+    client.node_id = "node-1"
+    client.max_retries = 0
+    client.stop_event = StopAfterWaits(limit=1)
+
+    client.config_loop()
+
+    assert [method for method, url in client.session.calls] == ["GET", "PUT", "GET", "GET"]
+    assert client._get_config_version() == 3
+
+
+def metric_samples(count):
+    return [{"instance_pool_id": "pool", "idempotency_key": f"key-{i}"} for i in range(count)]
+
+
+def test_oversized_metrics_batch_is_split_and_resent(tmp_path):
+    client = make_client(tmp_path, [413, 413, 200, 200, 200])
+    client.node_id = "node-1"
+
+    assert client._send_metrics_batch(metric_samples(8)) == 8
+    assert [len(body) for body in client.session.bodies] == [8, 4, 2, 2, 4]
+    assert client.metrics_rejected == 0
+
+
+def test_split_batch_stops_at_the_first_undelivered_half(tmp_path):
+    client = make_client(tmp_path, [413, 200, 503])
+    client.node_id = "node-1"
+    client.max_retries = 0
+
+    # The second half is left to the uplink, which spools it
+    assert client._send_metrics_batch(metric_samples(6)) == 3
+
+
+def test_rejected_metrics_batch_is_counted(tmp_path):
+    client = make_client(tmp_path, [403])
+    client.node_id = "node-1"
+
+    assert client._send_metrics_batch(metric_samples(5)) == 5
+    assert client.metrics_rejected == 5
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+from collectors import oci_collector
+from collectors.oci_collector import OCIMetricsCollector
+
+
+def series(resource_id, *values):
+    return SimpleNamespace(
+        dimensions={"resourceId": resource_id},
+        aggregated_datapoints=[SimpleNamespace(value=value) for value in values],
+    )
+
+
+class FakeMonitoringClient:
+    """Returns the series of a metric for pool-wide queries and per-instance queries alike."""
+
+    def __init__(self, metrics, batch=True):
+        self.metrics = metrics  # metric name -> list of series
+        self.batch = batch
+
+    def summarize_metrics_data(self, compartment_id, summarize_metrics_data_details):
+        query = summarize_metrics_data_details.query
+        metric_name = query.split("[")[0]
+        if "instancePoolId" in query:
+            if not self.batch:
+                raise RuntimeError("pool-wide query not supported")
+            return SimpleNamespace(data=self.metrics[metric_name])
+        return SimpleNamespace(data=[
+            data for data in self.metrics[metric_name] if f'"{data.dimensions["resourceId"]}"' in query
+        ])
+
+
+def make_collector(monkeypatch, metrics, instance_ids, batch=True):
+    monkeypatch.setattr(
+        oci_collector, "get_instances_from_instance_pool",
+        lambda client, pool_id, compartment_id: [SimpleNamespace(id=instance_id) for instance_id in instance_ids],
+    )
+    return OCIMetricsCollector(FakeMonitoringClient(metrics, batch), None, None, "pool", "compartment")
+
+
+@pytest.mark.parametrize("batch", [True, False])
+def test_latest_datapoint_is_used_and_missing_values_are_skipped(monkeypatch, batch):
+    metrics = {
+        "CpuUtilization": [series("a", 10, 80), series("b", 20, 40)],
+        # Instance b has not reported memory yet
+        "MemoryUtilization": [series("a", 30, 50), series("b")],
+    }
+    collector = make_collector(monkeypatch, metrics, ["a", "b"], batch)
+
+    assert collector.get_metrics() == (60, 50)
+
+
+def test_pool_without_any_datapoint_is_an_error(monkeypatch):
+    metrics = {"CpuUtilization": [series("a", 10)], "MemoryUtilization": []}
+    collector = make_collector(monkeypatch, metrics, ["a"])
+
+    with pytest.raises(RuntimeError):
+        collector.get_metrics()
@@ -0,0 +1,75 @@
+from supervisor.pool_supervisor import PoolSupervisor
+
+
+class FlakyRuntime:
+    def __init__(self, failures):
+        self.failures = failures
+        self.cycles = 0
+        self.stopped = False
+
+    def run_once(self):
+        self.cycles += 1
+        if self.cycles <= self.failures:
+            raise RuntimeError("TooManyRequests")
+        return 60
+
+    def stop(self):
+        self.stopped = True
+
+
+def make_supervisor(factory):
+    supervisor = PoolSupervisor(factory, max_workers=1, restart_backoff=30, max_restart_backoff=900)
+    supervisor.add_pool({"instance_pool_id": "pool-1"})
+    return supervisor, supervisor.pools["pool-1"]
+
+
+def run_cycle(supervisor, entry):
+    entry["running"] = True
+    supervisor._run_cycle("pool-1", entry)
+
+
+def test_failed_cycle_keeps_runtime_and_backs_off():
+    built = []
+
+    def factory(pool):
+        built.append(FlakyRuntime(failures=2))
+        return built[-1]
+
+    supervisor, entry = make_supervisor(factory)
+    try:
+        run_cycle(supervisor, entry)
+        assert entry["interval"] == 30
+        run_cycle(supervisor, entry)
+        assert entry["interval"] == 60  # Second failure doubles the backoff
+        run_cycle(supervisor, entry)
+
+        assert len(built) == 1
+        assert not built[0].stopped
+        assert built[0].cycles == 3
+        assert entry["failures"] == 0
+        assert entry["interval"] == 60
+    finally:
+        supervisor.stop()
+
+
+def test_failed_build_is_retried_with_backoff():
+    attempts = []
+
+    def factory(pool):
+        attempts.append(pool)
+        if len(attempts) == 1:
+            raise RuntimeError("config invalid")
+        return FlakyRuntime(failures=0)
+
+    supervisor, entry = make_supervisor(factory)
+    try:
+        run_cycle(supervisor, entry)
+        assert entry["runtime"] is None
+        assert entry["interval"] == 30
+
+        run_cycle(supervisor, entry)
+        assert entry["runtime"] is not None
+        assert entry["runtime"].cycles == 1
+        assert entry["failures"] == 0
+    finally:
+        supervisor.stop()
@@ -0,0 +1,79 @@
+import logging
+
+import numpy as np
+
+from instance_manager.resize_tracker import ResizeTracker
+from scaling_logic import predictive
+from scaling_logic.pool_state import PoolScalingState
+from scaling_logic.predictive import PredictiveScaler, backtest, build_predictive_scaler
+
+SEASON_LENGTH = 48  # Samples per day at 30 minute resolution
+
+
+def daily_load(days, noise=2.0, trend_per_day=1.0, seed=7):
+    """CPU-like series with a daily peak, a slow upward trend and some noise."""
+    t = np.arange(days * SEASON_LENGTH)
+    rng = np.random.default_rng(seed)
+    return (
+        50
+        + 25 * np.sin(2 * np.pi * t / SEASON_LENGTH)
+        + trend_per_day * t / SEASON_LENGTH
+        + rng.normal(0, noise, t.size)
+    )
+
+
+def test_backtest_error_of_seasonal_series_stays_near_noise():
+    result = backtest(daily_load(days=6), SEASON_LENGTH, horizon=4)
+
+    # Noise with a standard deviation of 2 alone averages errors of about 1.6
+    assert result["mae"] < 3.0
+    assert result["peak_mae"] < 3.0
+
+
+def test_backtest_needs_a_full_season():
+    assert backtest(daily_load(days=1)[:SEASON_LENGTH], SEASON_LENGTH, horizon=4) is None
+
+
+def test_forecast_window_follows_measured_provisioning_latency(monkeypatch):
+    # A private tracker, so the recorded latencies do not leak into other tests
+    tracker = ResizeTracker()
+    monkeypatch.setattr(predictive, "resize_tracker", tracker)
+    pool = {
+        "instance_pool_id": "pool-predictive",
+        "predictive": {"enabled": True, "targets": {"cpu": 60}, "lead_seconds": 600},
+    }
+    scaler = build_predictive_scaler(pool)
+    assert isinstance(scaler, PredictiveScaler)
+    # The configured value applies until a resize of the pool has been measured
+    assert scaler.lead_time() == 600
+
+    for seconds in (100, 120, 140, 160, 900):
+        tracker.record("pool-predictive", "provisioning", seconds)
+    assert 160 <= scaler.lead_time() <= 900
+    assert scaler.lead_time() == tracker.lead_seconds("pool-predictive", 90)
+
+
+def test_history_spans_the_fitted_seasons_at_the_shortest_interval():
+    pool = {
+        "predictive": {"enabled": True, "targets": {"cpu": 60}, "season_seconds": 86400, "sample_seconds": 300,
+                       "seasons": 3},
+        "cpu_threshold": {"min": 20, "max": 80},
+        "ram_threshold": {"min": 20, "max": 80},
+        "evaluation_interval": 300,
+        "adaptive_interval": {"enabled": True, "min": 60},
+    }
+    state = PoolScalingState(pool)
+    # Three days of cycles at the 60 second floor, doubled
+    assert state.window.capacity == 2 * 3 * 86400 // 60
+
+
+def test_predictor_logs_once_while_warming_up(caplog):
+    scaler = PredictiveScaler({"cpu": 60}, season_seconds=3600, sample_seconds=300, instance_pool_id="pool-warm")
+    timestamps = np.arange(0, 1800, 300, dtype=float)
+    history = {"timestamp": timestamps, "cpu": np.full(timestamps.size, 50.0)}
+    limits = {"min": 1, "max": 10}
+
+    with caplog.at_level(logging.INFO):
+        assert scaler.desired_size(2, history, limits) == 2
+        assert scaler.desired_size(2, history, limits) == 2
+    assert sum("warming up" in record.getMessage() for record in caplog.records) == 1
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+from instance_manager.resize_tracker import ResizeTracker
+from scaling_logic.cooldown import CooldownTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def response(data):
+    return SimpleNamespace(data=data, has_next_page=False, next_page=None, status=200, request=None, headers={})
+
+
+class FakeWorkRequestClient:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get_work_request(self, work_request_id):
+        status = self.statuses[min(self.calls, len(self.statuses) - 1)]
+        self.calls += 1
+        return response(SimpleNamespace(status=status))
+
+
+class FakeComputeManagementClient:
+    """Reports the pool as RUNNING with `running` instances once the work request succeeded."""
+
+    def __init__(self, work_requests, running):
+        self.work_requests = work_requests
+        self.running = running
+
+    def get_instance_pool(self, instance_pool_id):
+        return response(SimpleNamespace(lifecycle_state="RUNNING"))
+
+    def list_instance_pool_instances(self, compartment_id, instance_pool_id, **kwargs):
+        return response([SimpleNamespace(state="Running") for _ in range(self.running)])
+
+
+def track_resize(tracker, clock, previous_size, target_size, statuses):
+    work_requests = FakeWorkRequestClient(statuses)
+    compute = FakeComputeManagementClient(work_requests, running=target_size)
+    elapsed = tracker.wait_until_stable(
+        compute, "pool-1", "compartment", previous_size, target_size,
+        work_request_id="wr-1", work_request_client=work_requests,
+    )
+    return elapsed, work_requests
+
+
+def test_tracker_follows_work_request_and_releases_only_the_settled_direction():
+    clock = FakeClock()
+    tracker = ResizeTracker(poll_interval=10, max_poll_interval=60, sleep=clock.sleep, clock=clock)
+    cooldown = CooldownTracker(scale_out_cooldown=300, scale_in_cooldown=900, stabilization=60, clock=clock)
+    tracker.subscribe("pool-1", cooldown.release)
+
+    cooldown.record_scale_out()
+    elapsed, work_requests = track_resize(
+        tracker, clock, previous_size=2, target_size=4,
+        statuses=["ACCEPTED", "IN_PROGRESS", "IN_PROGRESS", "SUCCEEDED"],
+    )
+
+    # Three waits with backoff: 10 + 20 + 40 seconds
+    assert elapsed == 70
+    assert work_requests.calls == 4
+    assert tracker.lead_seconds("pool-1") == 70
+    assert tracker.snapshot("pool-1")["provisioning"]["count"] == 1
+
+    # The scale-out window is cut to the stabilization period...
+    assert cooldown.scale_out_remaining() == 60
+    # ...while the scale-in window started by the scale-out keeps running
+    assert cooldown.scale_in_remaining() == 900 - 70
+
+    clock.now += 60
+    assert cooldown.can_scale_out()
+    assert not cooldown.can_scale_in()
+
+
+def test_settled_scale_in_releases_only_the_scale_in_window():
+    clock = FakeClock()
+    tracker = ResizeTracker(poll_interval=10, sleep=clock.sleep, clock=clock)
+    cooldown = CooldownTracker(scale_out_cooldown=300, scale_in_cooldown=900, stabilization=60, clock=clock)
+    tracker.subscribe("pool-1", cooldown.release)
+
+    cooldown.record_scale_in()
+    track_resize(tracker, clock, previous_size=4, target_size=3, statuses=["IN_PROGRESS", "SUCCEEDED"])
+    assert cooldown.scale_in_remaining() == 60
+
+    # A scale-out issued meanwhile keeps both of its windows despite the settled scale-in
+    cooldown.record_scale_in()
+    clock.now += 5
+    cooldown.record_scale_out()
+    track_resize(tracker, clock, previous_size=3, target_size=2, statuses=["SUCCEEDED"])
+    assert cooldown.scale_out_remaining() == 300
+    assert cooldown.scale_in_remaining() == 900
+
+
+def test_failed_work_request_records_nothing_and_keeps_cooldowns():
+    clock = FakeClock()
+    tracker = ResizeTracker(poll_interval=10, sleep=clock.sleep, clock=clock)
+    cooldown = CooldownTracker(scale_out_cooldown=300, scale_in_cooldown=900, clock=clock)
+    tracker.subscribe("pool-1", cooldown.release)
+
+    cooldown.record_scale_out()
+    elapsed, _ = track_resize(tracker, clock, previous_size=2, target_size=4, statuses=["IN_PROGRESS", "FAILED"])
+
+    assert elapsed is None
+    assert tracker.lead_seconds("pool-1") is None
+    assert cooldown.scale_out_remaining() == 300 - 10
@@ -0,0 +1,101 @@
+import http.client
+import json
+
+import pytest
+import requests
+
+from triggers.webhook_server import TriggerServer
+
+MANAGED_POOL = "ocid1.instancepool.oc1..managed"
+
+ALERTMANAGER_PAYLOAD = {
+    "status": "firing",
+    "commonLabels": {"alertname": "HighCpu"},
+    "alerts": [
+        {"labels": {"instance_pool_id": MANAGED_POOL}},
+        {"labels": {"instance_pool_id": "ocid1.instancepool.oc1..unmanaged"}},
+    ],
+}
+
+
+@pytest.fixture
+def trigger_server():
+    triggered = []
+
+    def trigger(pool_id, reason):
+        triggered.append((pool_id, reason))
+        return pool_id == MANAGED_POOL
+
+    server = TriggerServer(trigger, status_callback=lambda: {MANAGED_POOL: {"interval": 60}},
+                           host="127.0.0.1", port=0, token="secret")
+    server.start()
+    try:
+        yield f"http://127.0.0.1:{server.httpd.server_port}", triggered
+    finally:
+        server.stop()
+
+
+def test_authorized_alert_triggers_managed_pools(trigger_server):
+    url, triggered = trigger_server
+
+    response = requests.post(f"{url}/alertmanager", data=json.dumps(ALERTMANAGER_PAYLOAD),
+                             headers={"Authorization": "Bearer secret"}, timeout=5)
+
+    assert response.status_code == 202
+    assert response.json() == {"triggered": [MANAGED_POOL]}
+    assert (MANAGED_POOL, "alertmanager") in triggered
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}])
+def test_unauthorized_alert_is_rejected(trigger_server, headers):
+    url, triggered = trigger_server
+
+    response = requests.post(f"{url}/alertmanager", data=json.dumps(ALERTMANAGER_PAYLOAD), headers=headers, timeout=5)
+
+    assert response.status_code == 401
+    assert triggered == []
+
+
+def test_oci_alarm_and_samples_trigger_by_dimension(trigger_server):
+    url, triggered = trigger_server
+    headers = {"Authorization": "Bearer secret"}
+
+    alarm = {"alarmMetaData": [{"dimensions": [{"instancePoolId": MANAGED_POOL}]}]}
+    assert requests.post(f"{url}/oci-alarm", data=json.dumps(alarm), headers=headers, timeout=5).status_code == 202
+    samples = json.dumps({"pool_id": MANAGED_POOL, "cpu": 93}) + "\n"
+    assert requests.post(f"{url}/samples", data=samples, headers=headers, timeout=5).status_code == 202
+
+    assert triggered == [(MANAGED_POOL, "oci-alarm"), (MANAGED_POOL, "samples")]
+
+
+def test_invalid_payloads_and_unknown_endpoints(trigger_server):
+    url, triggered = trigger_server
+    headers = {"Authorization": "Bearer secret"}
+
+    assert requests.post(f"{url}/alertmanager", data="not json", headers=headers, timeout=5).status_code == 400
+    assert requests.post(f"{url}/unknown", data="{}", headers=headers, timeout=5).status_code == 404
+    assert requests.get(f"{url}/status", headers=headers, timeout=5).json() == {MANAGED_POOL: {"interval": 60}}
+    assert triggered == []
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-1"])
+def test_invalid_content_length_is_rejected(trigger_server, content_length):
+    url, triggered = trigger_server
+    connection = http.client.HTTPConnection(url.split("//")[1], timeout=5)
+    try:
+        connection.putrequest("POST", "/alertmanager")
+        connection.putheader("Authorization", "Bearer secret")
+        connection.putheader("Content-Length", content_length)
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+    finally:
+        connection.close()
+    assert triggered == []
+
+
+def test_public_listener_requires_a_token():
+    with pytest.raises(ValueError):
+        TriggerServer(lambda pool_id, reason: True, host="0.0.0.0")
+    # Loopback listeners and token-protected ones are allowed
+    TriggerServer(lambda pool_id, reason: True)
+    TriggerServer(lambda pool_id, reason: True, host="0.0.0.0", token="secret")